@@ -0,0 +1,1014 @@
+#!/usr/bin/env python
+"""
+# NPC generator benchmarks
+# _______________________________________
+# Measures speed of parts of NPC generator
+# _______________________________________
+# Run: python benchmark.py
+# Stage suite: python benchmark.py suite --json results.json --baseline baseline.json
+# Console startup: python benchmark.py startup
+# _______________________________________
+"""
+
+import collections
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import main
+
+
+def legacy_merge_rarity_lists(base_list, added_list):
+    """
+    merge_rarity_lists as it was before keyed merge, kept only as reference for benchmark
+
+    :param base_list: list to which parameters are added
+    :param added_list: list from which parameters are added
+    :return: list that have parameters from both lists with rarity class prioritized by added_list
+    """
+
+    tmp_active_list = base_list + added_list
+
+    for tmp_counter_base_list in range(len(base_list)):
+        for tmp_counter_added_list in range(len(added_list)):
+
+            tmp_pattern = re.compile(r'(\(\w{1,3}\))$')
+            tmp_base_list_rarity = re.findall(tmp_pattern, base_list[tmp_counter_base_list])
+            tmp_added_list_rarity = re.findall(tmp_pattern, added_list[tmp_counter_added_list])
+
+            try:
+                tmp_base_list_element = base_list[tmp_counter_base_list].replace(tmp_base_list_rarity[0], '')
+            except IndexError:
+                tmp_base_list_element = base_list[tmp_counter_base_list]
+            try:
+                tmp_added_list_element = added_list[tmp_counter_added_list].replace(tmp_added_list_rarity[0], '')
+            except IndexError:
+                tmp_added_list_element = added_list[tmp_counter_added_list]
+
+            if tmp_base_list_element == tmp_added_list_element:
+                tmp_active_list[tmp_counter_base_list] = added_list[tmp_counter_added_list]
+
+    return list(dict.fromkeys(set(tmp_active_list)))
+
+
+def legacy_select_parameters(pool_size, k, rng):
+    """
+    rejection sampling that select_parameter_for_groups used before RandomSource.sample, kept only as reference
+    for benchmark (index of slot is compared to pool size like in original code, so it stops when k > pool_size)
+
+    :param pool_size: number of parameters in choosing pool
+    :param k: number of parameters to select
+    :param rng: random.Random
+    :return: list of selected indexes
+    """
+
+    tmp_all_random_chances = []
+    for tmp_parameter_index in range(1, k + 1):
+        if tmp_parameter_index <= pool_size:
+            tmp_parameter_chance = rng.randint(0, pool_size - 1)
+            while tmp_parameter_chance in tmp_all_random_chances:
+                tmp_parameter_chance = rng.randint(0, pool_size - 1)
+            tmp_all_random_chances.append(tmp_parameter_chance)
+    return tmp_all_random_chances
+
+
+def synthetic_parameters(size, offset=0, rarity_classes=('', '(C)', '(U)', '(R)', '(M)')):
+    """
+    makes list of unique parameters that look like names from database
+
+    :param size: number of parameters
+    :param offset: number of first parameter, lists with overlapping offsets share parameters
+    :param rarity_classes: rarity classes that are given to parameters in turn
+    :return: list of parameters
+    """
+
+    return [f'Name{ins_number}{rarity_classes[ins_number % len(rarity_classes)]}'
+            for ins_number in range(offset, offset + size)]
+
+
+def synthetic_legacy_database(groups, parameters):
+    """
+    makes legacy database document, every group has one conditioned group with a quarter of its parameters
+
+    :param groups: number of groups
+    :param parameters: number of parameters in every group
+    :return: string of legacy database
+    """
+
+    tmp_lines = ['## synthetic database', '-' * 40]
+    for tmp_group_number in range(groups):
+        tmp_lines.append(f'__Group{tmp_group_number}__')
+        tmp_lines.extend(synthetic_parameters(parameters))
+        tmp_lines.extend(('/end', '-' * 40, ''))
+        tmp_lines.append(f'==Male{tmp_group_number}Group{tmp_group_number}==')
+        tmp_lines.extend(synthetic_parameters(parameters // 4))
+        tmp_lines.extend(('/end', '-' * 40, ''))
+    return '\n'.join(tmp_lines)
+
+
+def legacy_parse_database(inp_data):
+    """
+    regex search for every group in whole document, the way database.txt was read before single pass parser
+
+    :param inp_data: string of legacy database
+    :return: dictionary of groups and dictionary of conditioned groups
+    """
+
+    out_groups = {ins_group: main.extract_list(inp_data, ins_group)[0]
+                  for ins_group in main.extract_groups(inp_data)[0]}
+    out_subgroups = {ins_group: main.extract_list(inp_data, ins_group, '==')[0]
+                     for ins_group in main.extract_groups(inp_data, '==')[0]}
+    return out_groups, out_subgroups
+
+
+def time_call(function, *args, repeat=3):
+    """
+    :param function: function to be timed
+    :param args: arguments for function
+    :param repeat: number of runs, best one is taken
+    :return: best time of one call in seconds
+    """
+
+    out_best_time = float('inf')
+    for _ in range(repeat):
+        tmp_start = time.perf_counter()
+        function(*args)
+        out_best_time = min(out_best_time, time.perf_counter() - tmp_start)
+    return out_best_time
+
+
+def benchmark_merge_rarity_lists(sizes=(100, 1000, 10000, 100000), legacy_limit=10 ** 6):
+    """
+    compares keyed merge_rarity_lists with legacy double loop, half of added list overrides base list
+
+    :param sizes: number of parameters in each of merged lists
+    :param legacy_limit: legacy merge is only run when size * size is under this limit, otherwise its time is
+    estimated from the largest size that was run
+    :return: printed table of times
+    """
+
+    print(f'{"merge_rarity_lists": <20}{"size": >10}{"keyed [s]": >14}{"legacy [s]": >14}')
+
+    tmp_legacy_time_per_pair = None
+    for tmp_size in sizes:
+        tmp_base_list = synthetic_parameters(tmp_size)
+        tmp_added_list = synthetic_parameters(tmp_size, tmp_size // 2, ('(S)', '(R)'))
+
+        tmp_keyed_time = time_call(main.merge_rarity_lists, tmp_base_list, tmp_added_list)
+
+        if tmp_size * tmp_size <= legacy_limit:
+            tmp_legacy_time = time_call(legacy_merge_rarity_lists, tmp_base_list, tmp_added_list, repeat=1)
+            tmp_legacy_time_per_pair = tmp_legacy_time / (tmp_size * tmp_size)
+            tmp_legacy_str = f'{tmp_legacy_time:.6f}'
+        elif tmp_legacy_time_per_pair is not None:
+            tmp_legacy_str = f'~{tmp_legacy_time_per_pair * tmp_size * tmp_size:.1f}'
+        else:
+            tmp_legacy_str = 'skipped'
+
+        print(f'{"": <20}{tmp_size: >10}{tmp_keyed_time: >14.6f}{tmp_legacy_str: >14}')
+
+
+def benchmark_select_parameters(cases=((400, 4), (10, 10), (1000, 100), (1000, 1000), (10000, 1000)), draws=200):
+    """
+    compares RandomSource.sample with legacy rejection sampling for groups with many parameters per NPC
+    (Personalities_by_55_min1max4 is first case, others are groups with high multiplicity or small choosing pool)
+
+    :param cases: pairs of choosing pool size and number of selected parameters
+    :param draws: number of selections timed for every case
+    :return: printed table of times for one selection
+    """
+
+    print(f'{"select_parameters": <20}{"pool": >10}{"k": >8}{"sample [s]": >14}{"legacy [s]": >14}')
+
+    for tmp_pool_size, tmp_k in cases:
+        tmp_random_source = main.RandomSource(1)
+        tmp_random = random.Random(1)
+        tmp_draws = max(draws * 100 // tmp_k, 1)
+
+        tmp_sample_time = time_call(lambda: [tmp_random_source.sample(tmp_pool_size, tmp_k)
+                                             for _ in range(tmp_draws)]) / tmp_draws
+        tmp_legacy_time = time_call(lambda: [legacy_select_parameters(tmp_pool_size, tmp_k, tmp_random)
+                                             for _ in range(max(tmp_draws // 100, 1))], repeat=1) \
+            / max(tmp_draws // 100, 1)
+
+        print(f'{"": <20}{tmp_pool_size: >10}{tmp_k: >8}{tmp_sample_time: >14.8f}{tmp_legacy_time: >14.8f}')
+
+
+def benchmark_sampling_modes(cases=((10, 1), (400, 1), (400, 4), (10000, 1), (10000, 100), (10000, 6000)),
+                             draws=2000):
+    """
+    compares RarityList.select (choosing pool) with RarityList.select_weighted (alias table)
+
+    :param cases: pairs of number of parameters and number of selected parameters
+    :param draws: number of selections timed for every case
+    :return: printed table of times for one selection
+    """
+
+    tmp_rarity_classes = {'C': 80, 'U': 50, 'R': 30, 'M': 10}
+
+    print(f'{"sampling_modes": <20}{"size": >10}{"k": >8}{"pool [s]": >14}{"weighted [s]": >14}')
+    for tmp_size, tmp_k in cases:
+        tmp_rarity_list = main.RarityList(synthetic_parameters(tmp_size), tmp_rarity_classes)
+        tmp_random_source = main.RandomSource(1)
+        tmp_draws = max(draws // tmp_k, 10)
+
+        tmp_pool_time = time_call(lambda: [tmp_rarity_list.select(tmp_random_source, tmp_k)
+                                           for _ in range(tmp_draws)]) / tmp_draws
+        tmp_weighted_time = time_call(lambda: [tmp_rarity_list.select_weighted(tmp_random_source, tmp_k)
+                                               for _ in range(tmp_draws)]) / tmp_draws
+
+        print(f'{"": <20}{tmp_size: >10}{tmp_k: >8}{tmp_pool_time: >14.8f}{tmp_weighted_time: >14.8f}')
+
+
+def benchmark_legacy_parser(cases=((10, 1000), (100, 1000), (400, 1000)), legacy_limit=10 ** 6):
+    """
+    compares single pass parse_legacy_database with regex search for every group in legacy database
+
+    :param cases: pairs of number of groups and number of parameters in every group
+    :param legacy_limit: regex path is only run when groups * parameters is under this limit
+    :return: printed table of times
+    """
+
+    print(f'{"legacy_parser": <20}{"groups": >10}{"size [MB]": >12}{"single [s]": >14}{"regex [s]": >14}')
+
+    for tmp_groups, tmp_parameters in cases:
+        tmp_data = synthetic_legacy_database(tmp_groups, tmp_parameters)
+        assert main.parse_legacy_database(tmp_data) == legacy_parse_database(tmp_data)
+
+        tmp_single_time = time_call(main.parse_legacy_database, tmp_data)
+        if tmp_groups * tmp_parameters <= legacy_limit:
+            tmp_legacy_str = f'{time_call(legacy_parse_database, tmp_data, repeat=1):.6f}'
+        else:
+            tmp_legacy_str = 'skipped'
+
+        print(f'{"": <20}{tmp_groups: >10}{len(tmp_data) / 10 ** 6: >12.2f}{tmp_single_time: >14.6f}'
+              f'{tmp_legacy_str: >14}')
+
+
+def traced_memory(function, *args):
+    """
+    :param function: function that loads something
+    :param args: arguments for function
+    :return: result of function and memory that python allocated for it and still holds, in MB
+    """
+
+    tracemalloc.start()
+    out_result = function(*args)
+    tmp_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out_result, tmp_memory / 10 ** 6
+
+
+def benchmark_mapped_database(sizes=(10000, 100000, 400000), draws=2000):
+    """
+    compares memory held by CompiledDatabase and MappedDatabase of database with one large group, and time of
+    picking one parameter from that group
+
+    :param sizes: number of parameters in large group
+    :param draws: number of picks timed
+    :return: printed table of memory and times
+    """
+
+    print(f'{"mapped_database": <20}{"size": >10}{"memory [MB]": >14}{"mapped [MB]": >14}'
+          f'{"pick [s]": >14}{"mapped [s]": >14}')
+
+    with tempfile.TemporaryDirectory() as tmp_directory:
+        for tmp_size in sizes:
+            tmp_data_path = os.path.join(tmp_directory, f'database{tmp_size}.txt')
+            with open(tmp_data_path, 'w', encoding='utf-8') as tmp_data_f:
+                tmp_data_f.write(synthetic_legacy_database(1, tmp_size))
+            tmp_image_path = os.path.join(tmp_directory, f'database{tmp_size}.image')
+            main.write_database_image(main.CompiledDatabase(tmp_data_path), tmp_image_path)
+
+            tmp_rarity_classes = {'C': 80, 'U': 40, 'R': 10, 'M': 1}
+            tmp_rarity_list, tmp_memory = traced_memory(
+                lambda: main.CompiledDatabase(tmp_data_path).compile_rarity_lists(tmp_rarity_classes)['Group0'])
+            tmp_mapped_rarity_list, tmp_mapped_memory = traced_memory(
+                lambda: main.MappedDatabase(tmp_image_path).compile_rarity_lists(tmp_rarity_classes)['Group0'])
+
+            tmp_random_source = main.RandomSource(1)
+            tmp_pick_time = time_call(lambda: [tmp_rarity_list.select(tmp_random_source, 1)
+                                               for _ in range(draws)]) / draws
+            tmp_mapped_pick_time = time_call(lambda: [tmp_mapped_rarity_list.select(tmp_random_source, 1)
+                                                      for _ in range(draws)]) / draws
+
+            print(f'{"": <20}{tmp_size: >10}{tmp_memory: >14.2f}{tmp_mapped_memory: >14.2f}'
+                  f'{tmp_pick_time: >14.8f}{tmp_mapped_pick_time: >14.8f}')
+
+
+def write_sink(path, npc_data_list):
+    """
+    :param path: path to output file, format is taken from its extension
+    :param npc_data_list: list of NPC-s
+    :return: NPC-s written through sink
+    """
+
+    with main.open_sink(path) as tmp_sink:
+        tmp_sink.write_many(npc_data_list)
+
+
+def benchmark_sinks(count=20000, paths=('npc.txt', 'npc.jsonl', 'npc.csv', 'npc.jsonl.gz')):
+    """
+    compares saving NPC-s one by one with print_non_playable_character against sinks that keep file open,
+    run from directory with config.txt and database
+
+    :param count: number of NPC-s written
+    :param paths: output files written through sinks
+    :return: printed table of times and throughput
+    """
+
+    tmp_npc_data_list = list(main.NonPlayableCharacter(main.load_generation_plan(cache_path=None), 1)
+                             .generate_many(count))
+
+    print(f'{"sinks": <20}{"output": >14}{"time [s]": >14}{"NPC/s": >12}')
+
+    tmp_working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_directory:
+        os.chdir(tmp_directory)
+        try:
+            tmp_times = {'save.txt': time_call(lambda: [main.print_non_playable_character(ins_npc_data, False, True)
+                                                        for ins_npc_data in tmp_npc_data_list], repeat=1)}
+            for tmp_path in paths:
+                tmp_times[tmp_path] = time_call(write_sink, tmp_path, tmp_npc_data_list)
+        finally:
+            os.chdir(tmp_working_directory)
+
+    for tmp_path, tmp_time in tmp_times.items():
+        print(f'{"": <20}{tmp_path: >14}{tmp_time: >14.4f}{count / tmp_time: >12.0f}')
+
+
+def benchmark_pool_cache(sizes=(0, 64, 1024), count=5000):
+    """
+    times generating NPC-s with conditioned pool cache of different sizes, run from directory with config.txt and
+    database
+
+    :param sizes: sizes of cache, 0 turns it off
+    :param count: number of NPC-s generated for every size
+    :return: printed table of time per NPC and hit rate
+    """
+
+    tmp_plan = main.load_generation_plan(cache_path=None)
+
+    print(f'{"pool_cache": <20}{"size": >10}{"NPC [s]": >14}{"hit rate": >10}{"pools": >8}')
+    for tmp_size in sizes:
+        tmp_npc = main.NonPlayableCharacter(tmp_plan, 1, tmp_size)
+        tmp_time = time_call(tmp_npc.generate_many, count, repeat=1) / count
+        tmp_stats = tmp_npc.loc_pool_cache.stats()
+        print(f'{"": <20}{tmp_size: >10}{tmp_time: >14.8f}{tmp_stats["hit_rate"]: >10.3f}{tmp_stats["pools"]: >8}')
+
+
+def benchmark_constrained_population(count=2000, races=(('Elf', 40), ('Dwarf', 30), ('Human', 20), ('Catfolk', 10))):
+    """
+    generates district population with exact race mix by stratified sampling and by generating NPC-s until every
+    race has its count (what had to be done before), run from directory with config.txt and database
+
+    :param count: number of NPC-s in population
+    :param races: races and their percentage in population
+    :return: printed table of NPC-s generated and time of both ways
+    """
+
+    tmp_plan = main.load_generation_plan(cache_path=None)
+    tmp_force = [['Nationality', 'Resident of Črnjamura(Centar)']]
+    tmp_targets = {'Race': dict(races)}
+    tmp_counts = dict(zip(tmp_targets['Race'], main.apportion(list(tmp_targets['Race'].values()), count)))
+
+    def rejection():
+        tmp_left = dict(tmp_counts)
+        tmp_generated = 0
+        tmp_npc = main.NonPlayableCharacter(tmp_plan, 1)
+        while any(tmp_left.values()):
+            tmp_race = tmp_npc.generate_record(tmp_force).get('Race')
+            tmp_generated += 1
+            if tmp_race and len(tmp_race) == 1 and tmp_left.get(tmp_race[0]):
+                tmp_left[tmp_race[0]] -= 1
+        return tmp_generated
+
+    def stratified():
+        tmp_batch = main.NonPlayableCharacter(tmp_plan, 1).generate_constrained(count, tmp_targets, tmp_force)
+        assert collections.Counter(ins_race[0] for ins_race in tmp_batch.column('Race')) == tmp_counts
+        return len(tmp_batch)
+
+    print(f'{"constrained": <20}{"way": <12}{"NPC-s": >10}{"generated": >12}{"time [s]": >10}')
+    for tmp_name, tmp_function in (('rejection', rejection), ('stratified', stratified)):
+        tmp_generated, tmp_time = timed(tmp_function)
+        print(f'{"": <20}{tmp_name: <12}{count: >10}{tmp_generated: >12}{tmp_time: >10.3f}')
+
+
+def legacy_duplicates(npc_data_list):
+    """
+    finds duplicate NPC-s by comparing every pair, kept only as reference for benchmark
+
+    :param npc_data_list: list of NPC-s ([[group, parameter, ...], ... ])
+    :return: number of NPC-s that are same as some earlier NPC
+    """
+
+    out_duplicates = 0
+    for tmp_index, tmp_npc_data in enumerate(npc_data_list):
+        for tmp_earlier_npc_data in npc_data_list[:tmp_index]:
+            if tmp_earlier_npc_data == tmp_npc_data:
+                out_duplicates += 1
+                break
+    return out_duplicates
+
+
+def benchmark_unique_population(counts=(1000, 5000), small_count=600, legacy_limit=5000):
+    """
+    times unique mode against plain generation and against checking duplicates by comparing every pair, and
+    generates unique population from small pool (brave female merfolk of Centar aged 20-25 without religion, so
+    only names differ), run from directory with config.txt and database
+
+    :param counts: numbers of NPC-s
+    :param small_count: number of NPC-s generated from small pool
+    :param legacy_limit: the largest count for which every pair is compared
+    :return: printed table of times and retries
+    """
+
+    tmp_plan = main.load_generation_plan(cache_path=None)
+
+    print(f'{"unique": <20}{"NPC-s": >10}{"plain [s]": >12}{"unique [s]": >12}{"pairs [s]": >12}{"retries": >10}')
+    for tmp_count in counts:
+        tmp_npc = main.NonPlayableCharacter(tmp_plan, 1)
+        tmp_batch, tmp_plain_time = timed(tmp_npc.generate_many, tmp_count)
+        _, tmp_unique_time = timed(tmp_npc.generate_many, tmp_count, None, None, True)
+        # retries are counted in separate run, timed stages would slow down timed run
+        tmp_npc.enable_stats()
+        tmp_npc.generate_many(tmp_count, None, None, True)
+        tmp_retries = tmp_npc.stats()['counters'].get('unique_retries', 0)
+        tmp_npc.disable_stats()
+        tmp_pairs_str = f'{timed(legacy_duplicates, list(tmp_batch))[1]:.3f}' \
+            if tmp_count <= legacy_limit else '-'
+        print(f'{"": <20}{tmp_count: >10}{tmp_plain_time: >12.3f}{tmp_unique_time: >12.3f}{tmp_pairs_str: >12}'
+              f'{tmp_retries: >10}')
+
+    tmp_npc = main.NonPlayableCharacter(tmp_plan, 1)
+    tmp_force = [['Race', 'Merfolk'], ['Sex', 'Female'], ['Nationality', 'Resident of Črnjamura(Centar)'],
+                 ['Personalities', 'Brave'], ['Years', '20-25']]
+    tmp_targets = {'Religion': {None: small_count}}
+    tmp_capacity = tmp_npc.capacity(tmp_force, {'Religion': False})
+    tmp_npc.enable_stats()
+    tmp_batch, tmp_time = timed(tmp_npc.generate_constrained, None, tmp_targets, tmp_force, None, True)
+    assert legacy_duplicates(list(tmp_batch)) == 0
+    print(f'{"small pool": <20}{small_count: >10}{"-": >12}{tmp_time: >12.3f}{"-": >12}'
+          f'{tmp_npc.stats()["counters"].get("unique_retries", 0): >10}  (capacity at most {tmp_capacity})')
+
+
+def population_distances(batch, other_batch):
+    """
+    :param batch: NonPlayableCharacterBatch
+    :param other_batch: NonPlayableCharacterBatch of same size
+    :return: dictionary of groups and total variation distances of frequencies of parameters and of number of
+    parameters of NPC-s (-1 counts NPC-s without group)
+    """
+
+    import collections
+
+    out_distances = {}
+    for tmp_group in dict.fromkeys(batch.loc_groups + other_batch.loc_groups):
+        tmp_distances = []
+        for tmp_count_cell in (lambda cell: cell if cell is not None else (None,),
+                               lambda cell: (len(cell) if cell is not None else -1,)):
+            tmp_counters = [collections.Counter(ins_value for ins_cell in ins_batch.loc_columns.get(
+                tmp_group, [None] * len(ins_batch)) for ins_value in tmp_count_cell(ins_cell))
+                for ins_batch in (batch, other_batch)]
+            tmp_distances.append(sum(abs(tmp_counters[0][ins_value] - tmp_counters[1][ins_value])
+                                     for ins_value in tmp_counters[0].keys() | tmp_counters[1].keys()) / 2 / len(batch))
+        out_distances[tmp_group] = tuple(tmp_distances)
+    return out_distances
+
+
+def benchmark_population_engine(count=20000, force=(), tolerance=1.5):
+    """
+    compares PopulationEngine with NonPlayableCharacter, distances between engine and generator are checked against
+    distances between two runs of generator with different seeds, run from directory with config.txt and database
+
+    :param count: number of NPC-s of every population
+    :param force: forced parameters used for every NPC
+    :param tolerance: how many times distance of engine can be larger than distance of two runs of generator
+    :return: printed table of distances and times, AssertionError if engine does not match generator
+    """
+
+    tmp_plan = main.load_generation_plan(cache_path=None)
+    tmp_force = [list(ins_force) for ins_force in force]
+
+    tmp_engine_time = time_call(main.PopulationEngine(tmp_plan, 1).generate, count, tmp_force, repeat=1) / count
+    tmp_npc_time = time_call(main.NonPlayableCharacter(tmp_plan, 1).generate_many, count, tmp_force, repeat=1) / count
+    print(f'{"population_engine": <20}{"engine [s]": >14}{"NPC [s]": >14}')
+    print(f'{"": <20}{tmp_engine_time: >14.8f}{tmp_npc_time: >14.8f}')
+
+    tmp_engine_distances = population_distances(main.PopulationEngine(tmp_plan, 2).generate(count, tmp_force),
+                                                main.NonPlayableCharacter(tmp_plan, 3).generate_many(count, tmp_force))
+    tmp_npc_distances = population_distances(main.NonPlayableCharacter(tmp_plan, 4).generate_many(count, tmp_force),
+                                             main.NonPlayableCharacter(tmp_plan, 5).generate_many(count, tmp_force))
+
+    print(f'{"distances": <20}{"parameters": >14}{"reference": >14}{"counts": >10}{"reference": >14}')
+    for tmp_group, (tmp_parameters, tmp_counts) in tmp_engine_distances.items():
+        tmp_reference_parameters, tmp_reference_counts = tmp_npc_distances.get(tmp_group, (0.0, 0.0))
+        print(f'{tmp_group: <20}{tmp_parameters: >14.4f}{tmp_reference_parameters: >14.4f}{tmp_counts: >10.4f}'
+              f'{tmp_reference_counts: >14.4f}')
+        # two runs of generator differ only by noise, engine may not differ much more than that
+        assert tmp_parameters <= tolerance * tmp_reference_parameters + 0.01, tmp_group
+        assert tmp_counts <= tolerance * tmp_reference_counts + 0.01, tmp_group
+
+
+def benchmark_probability_model(count=50000, force=(), deviations=5, sampling=None):
+    """
+    compares exact probabilities of ProbabilityModel with frequencies of NPC-s of NonPlayableCharacter, run from
+    directory with config.txt and database
+
+    :param count: number of generated NPC-s
+    :param force: forced parameters used for every NPC
+    :param deviations: how many standard deviations frequency can be away from probability
+    :param sampling: sampling mode written in __Sampling__ group of config.txt, None keeps config.txt as it is
+    :return: printed table of times and largest deviations, AssertionError if model does not match generator
+    """
+
+    import collections
+
+    tmp_plan = main.load_generation_plan(cache_path=None)
+    if sampling is not None:
+        with open(main.global_config_path, encoding='utf-8') as tmp_config_f:
+            tmp_config = re.sub(r'__Sampling__.*?/end', '', tmp_config_f.read(), flags=re.DOTALL)
+        tmp_plan = main.GenerationPlan(f'{tmp_config}\n__Sampling__\n{sampling}\n/end\n', tmp_plan.loc_database)
+    tmp_force = [list(ins_force) for ins_force in force]
+    tmp_model = main.ProbabilityModel(tmp_plan, tmp_force)
+    tmp_batch = main.NonPlayableCharacter(tmp_plan, 1).generate_many(count, tmp_force)
+
+    print(f'{"probability_model": <20}{"model [s]": >12}{"parameters": >12}{"deviation": >12}{"multiplicity": >14}'
+          f'{"NPC": >10}')
+    for tmp_group in tmp_model.loc_groups:
+        tmp_start = time.perf_counter()
+        tmp_probabilities = tmp_model.parameter_probabilities(tmp_group)
+        tmp_multiplicity = tmp_model.expected_multiplicity(tmp_group)
+        tmp_time = time.perf_counter() - tmp_start
+
+        tmp_column = tmp_batch.loc_columns.get(tmp_group, [None] * count)
+        tmp_frequencies = collections.Counter(ins_parameter for ins_cell in tmp_column if ins_cell
+                                              for ins_parameter in ins_cell)
+        # largest distance of frequency from probability in standard deviations of binomial count
+        tmp_deviation = max((abs(tmp_frequencies[ins_parameter] - count * ins_probability) /
+                             max(count * ins_probability * (1 - ins_probability), 1.0) ** 0.5
+                             for ins_parameter, ins_probability in tmp_probabilities.items()), default=0.0)
+        tmp_cells = [ins_cell for ins_cell in tmp_column if ins_cell is not None]
+        tmp_npc_multiplicity = sum(map(len, tmp_cells)) / len(tmp_cells) if tmp_cells else 0.0
+
+        print(f'{tmp_group: <20}{tmp_time: >12.4f}{len(tmp_probabilities): >12}{tmp_deviation: >12.2f}'
+              f'{tmp_multiplicity: >14.4f}{tmp_npc_multiplicity: >10.4f}')
+        assert tmp_deviation <= deviations, tmp_group
+        assert set(tmp_frequencies) <= set(tmp_probabilities), tmp_group
+
+
+async def service_client(port, path, count, latencies):
+    """
+    sends requests one after another over one kept alive connection
+
+    :param port: port of GenerationService on local machine
+    :param path: path with query of every request
+    :param count: number of requests
+    :param latencies: list to which latency of every request is added
+    :return: sent requests
+    """
+
+    import asyncio
+
+    tmp_reader, tmp_writer = await asyncio.open_connection('127.0.0.1', port)
+    for _ in range(count):
+        tmp_start = time.perf_counter()
+        tmp_writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('latin-1'))
+        await tmp_writer.drain()
+        tmp_length = 0
+        while True:
+            tmp_line = await tmp_reader.readline()
+            if not tmp_line.strip():
+                break
+            if tmp_line.lower().startswith(b'content-length:'):
+                tmp_length = int(tmp_line.split(b':')[1])
+        await tmp_reader.readexactly(tmp_length)
+        latencies.append(time.perf_counter() - tmp_start)
+    tmp_writer.close()
+
+
+async def service_load(port, clients, requests, batch_clients, batch_size):
+    """
+    :param port: port of GenerationService on local machine
+    :param clients: number of concurrent clients asking for one NPC
+    :param requests: number of requests of every client
+    :param batch_clients: number of concurrent clients asking for large batches at the same time
+    :param batch_size: number of NPC-s in every large batch
+    :return: latencies of single NPC requests and of batch requests
+    """
+
+    import asyncio
+
+    out_latencies = []
+    out_batch_latencies = []
+    await asyncio.gather(*[service_client(port, '/npc', requests, out_latencies) for _ in range(clients)],
+                         *[service_client(port, f'/npc/batch?n={batch_size}', 3, out_batch_latencies)
+                           for _ in range(batch_clients)])
+    return out_latencies, out_batch_latencies
+
+
+def benchmark_service(cases=((1, 0), (16, 0), (64, 0), (16, 2)), requests=200, batch_size=20000, workers=2):
+    """
+    starts GenerationService in its own process and measures latency of /npc under concurrent clients,
+    with or without clients asking for large batches at the same time, run from directory with config.txt and
+    database
+
+    :param cases: pairs of number of clients asking for one NPC and number of clients asking for large batches
+    :param requests: number of requests of every client
+    :param batch_size: number of NPC-s in large batch
+    :param workers: number of worker processes of service
+    :return: printed table of latencies
+    """
+
+    import asyncio
+    import signal
+    import socket
+    import subprocess
+
+    with socket.socket() as tmp_socket:
+        tmp_socket.bind(('127.0.0.1', 0))
+        tmp_port = tmp_socket.getsockname()[1]
+    tmp_service = subprocess.Popen([sys.executable, 'main.py', 'serve', '--port', str(tmp_port), '--workers',
+                                    str(workers)], stderr=subprocess.PIPE)
+    try:
+        tmp_service.stderr.readline()  # service prints its address when it is listening
+
+        print(f'{"service": <20}{"clients": >8}{"batches": >8}{"NPC/s": >10}{"p50 [ms]": >10}{"p99 [ms]": >10}'
+              f'{"batch p50 [ms]": >16}')
+        for tmp_clients, tmp_batch_clients in cases:
+            tmp_start = time.perf_counter()
+            tmp_latencies, tmp_batch_latencies = asyncio.run(service_load(
+                tmp_port, tmp_clients, requests, tmp_batch_clients, batch_size))
+            tmp_time = time.perf_counter() - tmp_start
+
+            tmp_percentiles = main.latency_percentiles(tmp_latencies)
+            tmp_batch_str = f'{main.latency_percentiles(tmp_batch_latencies)["p50_ms"]:.1f}' \
+                if tmp_batch_latencies else '-'
+            print(f'{"": <20}{tmp_clients: >8}{tmp_batch_clients: >8}{len(tmp_latencies) / tmp_time: >10.0f}'
+                  f'{tmp_percentiles["p50_ms"]: >10.2f}{tmp_percentiles["p99_ms"]: >10.2f}{tmp_batch_str: >16}')
+    finally:
+        tmp_service.send_signal(signal.SIGINT)  # service shuts down its worker processes
+        tmp_service.wait()
+
+
+def read_until_prompt(process):
+    """
+    :param process: running console with stdout pipe
+    :return: output of console until it asks for next command (':' at the start of line)
+    """
+
+    out_output = b''
+    while not out_output.endswith(b'\n:'):
+        tmp_chunk = os.read(process.stdout.fileno(), 65536)
+        if not tmp_chunk:
+            raise RuntimeError(f'console exited before prompt: {out_output[-200:]!r}')
+        out_output += tmp_chunk
+    return out_output
+
+
+def benchmark_startup(runs=7):
+    """
+    measures time from start of console to its prompt and to first NPC printed, when it is started as script and
+    as module (module uses bytecode from __pycache__, script is compiled on every start), run from directory with
+    config.txt and database
+
+    :param runs: number of starts of every command, median is printed
+    :return: printed table of times in milliseconds
+    """
+
+    import statistics
+    import subprocess
+
+    # bytecode is written and used only if it is not turned off in environment
+    tmp_environment = dict(os.environ, PYTHONUNBUFFERED='1')
+    tmp_environment.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    tmp_start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=tmp_environment, check=True)
+    subprocess.run([sys.executable, '-m', 'main'], input=b'q\n', stdout=subprocess.DEVNULL, env=tmp_environment,
+                   check=True)  # writes bytecode and database.cache before measuring
+    tmp_interpreter_times = []
+    for _ in range(runs):
+        tmp_start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], env=tmp_environment, check=True)
+        tmp_interpreter_times.append(time.perf_counter() - tmp_start)
+
+    print(f'{"startup": <20}{"command": <20}{"prompt [ms]": >14}{"first NPC [ms]": >16}')
+    print(f'{"": <20}{"python -c pass": <20}{statistics.median(tmp_interpreter_times) * 1000: >14.1f}{"-": >16}')
+    for tmp_name, tmp_arguments in (('python main.py', ['main.py']), ('python -m main', ['-m', 'main'])):
+        tmp_prompt_times = []
+        tmp_npc_times = []
+        for _ in range(runs):
+            tmp_start = time.perf_counter()
+            tmp_console = subprocess.Popen([sys.executable] + tmp_arguments, stdin=subprocess.PIPE,
+                                           stdout=subprocess.PIPE, env=tmp_environment)
+            try:
+                read_until_prompt(tmp_console)
+                tmp_prompt_times.append(time.perf_counter() - tmp_start)
+                tmp_console.stdin.write(b'n\n')
+                tmp_console.stdin.flush()
+                read_until_prompt(tmp_console)
+                tmp_npc_times.append(time.perf_counter() - tmp_start)
+                tmp_console.stdin.write(b'q\n')
+                tmp_console.stdin.flush()
+            finally:
+                tmp_console.stdin.close()
+                tmp_console.wait()
+                tmp_console.stdout.close()
+        print(f'{"": <20}{tmp_name: <20}{statistics.median(tmp_prompt_times) * 1000: >14.1f}'
+              f'{statistics.median(tmp_npc_times) * 1000: >16.1f}')
+
+
+def scaled_parameters(parameters, scale):
+    """
+    :param parameters: parameters with rarity class at the end of them
+    :param scale: how many times every parameter is listed, copies get their number after them
+    :return: list of scaled parameters, rarity classes are kept
+    """
+
+    out_parameters = []
+    for tmp_copy in range(scale):
+        for tmp_parameter in parameters:
+            if not tmp_copy:
+                out_parameters.append(tmp_parameter)
+                continue
+            tmp_clean_parameter, tmp_rarity_class = main.split_rarity_class(tmp_parameter)
+            out_parameters.append(f'{tmp_clean_parameter}{tmp_copy}' + (f'({tmp_rarity_class})' if tmp_rarity_class
+                                                                       else ''))
+    return out_parameters
+
+
+def write_scaled_database(path, scale=1, scaled_groups=('Name',), chain_depth=0, chain_width=4, multiplicity=None):
+    """
+    writes copy of shipped config.txt and database into directory, scaled up for benchmarks
+
+    :param path: directory in which config.txt and database directory are written
+    :param scale: how many times parameters of scaled groups and their conditioned groups are listed
+    :param scaled_groups: groups that are scaled
+    :param chain_depth: number of added groups Level1, Level2, ... which are each conditioned by group before it
+    (Level0 starts chain)
+    :param chain_width: number of parameters of every group of chain
+    :param multiplicity: if given every multiple group has that many parameters
+    :return: paths to written config.txt and database
+    """
+
+    tmp_database = main.CompiledDatabase(main.global_database_path)
+    tmp_database_path = os.path.join(path, 'database')
+    os.makedirs(tmp_database_path, exist_ok=True)
+
+    def write_list(list_path, parameters):
+        with open(list_path, 'w', encoding='utf-8') as tmp_list_f:
+            tmp_list_f.write('\n'.join(parameters))
+
+    for tmp_group in tmp_database.group_names():
+        tmp_scale = scale if tmp_group in scaled_groups else 1
+        write_list(os.path.join(tmp_database_path, f'{tmp_group}.txt'),
+                   scaled_parameters(tmp_database.group(tmp_group), tmp_scale))
+        if tmp_database.subgroup_names(tmp_group):
+            os.makedirs(os.path.join(tmp_database_path, tmp_group), exist_ok=True)
+        for tmp_subgroup in tmp_database.subgroup_names(tmp_group):
+            write_list(os.path.join(tmp_database_path, tmp_group, f'{tmp_subgroup}.txt'),
+                       scaled_parameters(tmp_database.subgroup(tmp_group, tmp_subgroup), tmp_scale))
+
+    # chain of groups, every parameter of group before has its own conditioned group
+    tmp_chain_conditions = []
+    for tmp_level in range(chain_depth + 1):
+        tmp_group = f'Level{tmp_level}'
+        tmp_parameters = [f'L{tmp_level}P{ins_number}' for ins_number in range(chain_width)]
+        write_list(os.path.join(tmp_database_path, f'{tmp_group}.txt'), tmp_parameters)
+        if tmp_level:
+            os.makedirs(os.path.join(tmp_database_path, tmp_group), exist_ok=True)
+            for tmp_number in range(chain_width):
+                write_list(os.path.join(tmp_database_path, tmp_group, f'L{tmp_level - 1}P{tmp_number}{tmp_group}.txt'),
+                           tmp_parameters[tmp_number:] + [f'{ins_parameter}(R)'
+                                                          for ins_parameter in tmp_parameters[:tmp_number]])
+            tmp_chain_conditions.append(f'{tmp_group}_by_Level{tmp_level - 1}')
+
+    with open(main.global_config_path, encoding='utf-8') as tmp_config_f:
+        tmp_config = tmp_config_f.read()
+    if multiplicity is not None:
+        tmp_config = re.sub(r'min\d+max\d+', f'min{multiplicity}max{multiplicity}', tmp_config, flags=re.IGNORECASE)
+    if tmp_chain_conditions:
+        tmp_config = re.sub(r'(__ConditionedGroup__\n(?:.*\n)*?)(/end)',
+                            lambda ins_match: ins_match.group(1) + '\n'.join(tmp_chain_conditions) + '\n' +
+                            ins_match.group(2), tmp_config)
+
+    tmp_config_path = os.path.join(path, 'config.txt')
+    with open(tmp_config_path, 'w', encoding='utf-8') as tmp_config_f:
+        tmp_config_f.write(tmp_config)
+    return tmp_config_path, tmp_database_path
+
+
+def timed(function, *args):
+    """
+    :param function: function to be timed
+    :param args: arguments for function
+    :return: result of function and time of call in seconds
+    """
+
+    tmp_start = time.perf_counter()
+    out_result = function(*args)
+    return out_result, time.perf_counter() - tmp_start
+
+
+def time_per_call(function, count):
+    """
+    :param function: function without arguments
+    :param count: number of calls
+    :return: average time of one call in seconds
+    """
+
+    tmp_start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - tmp_start) / count
+
+
+def benchmark_stages(config_path, database_path, count=2000):
+    """
+    times every stage of loading and generating NPC-s for one config.txt and database
+
+    :param config_path: path to config.txt
+    :param database_path: path to database directory
+    :param count: number of NPC-s timed
+    :return: dictionary of stages and their time in seconds, generation stages are per NPC
+    """
+
+    out_times = {}
+
+    # database directory and directories of conditioned groups
+    tmp_paths = [database_path] + [ins_entry.path for ins_entry in os.scandir(database_path) if ins_entry.is_dir()]
+    tmp_data_list, out_times['load_files'] = timed(lambda: [main.load_files(ins_path) for ins_path in tmp_paths])
+    out_times['extract_list'] = timed(lambda: [main.extract_list(ins_data, ins_group) for ins_data in tmp_data_list
+                                               for ins_group in main.extract_groups(ins_data)[0]])[1]
+    tmp_database, out_times['compile_database'] = timed(main.CompiledDatabase, database_path)
+    with open(config_path, encoding='utf-8') as tmp_config_f:
+        tmp_config = main.CompiledConfig(tmp_config_f.read())
+    out_times['rarity_classes'] = timed(tmp_database.compile_rarity_lists, tmp_config.loc_rarity_classes)[1]
+    # every conditioned group merged once with its group, as when equally specific conditioned groups are merged
+    out_times['merge_rarity_lists'] = timed(lambda: [
+        main.merge_rarity_lists(tmp_database.group(ins_group), tmp_database.subgroup(ins_group, ins_subgroup))
+        for ins_group in tmp_database.group_names() for ins_subgroup in tmp_database.subgroup_names(ins_group)])[1]
+    tmp_plan, out_times['generation_plan'] = timed(main.GenerationPlan, tmp_config, tmp_database)
+
+    # stages of NonPlayableCharacter.generate_record one by one, same order as there
+    tmp_npc = main.NonPlayableCharacter(tmp_plan, 1)
+    tmp_stage_times = dict.fromkeys(('optional_groups', 'multiple_groups', 'select_parameters', 'conditioned_groups'),
+                                    0.0)
+    for _ in range(count):
+        tmp_npc.loc_all_active_groups = dict.fromkeys(tmp_npc.loc_all_groups_list)
+        tmp_npc.loc_npc_record = main.NonPlayableCharacterRecord(tmp_npc.loc_group_index)
+        tmp_start = time.perf_counter()
+        tmp_npc.optional_groups()
+        tmp_optional = time.perf_counter()
+        tmp_npc.multiple_groups()
+        tmp_multiple = time.perf_counter()
+        tmp_npc.conditioned_groups(list_conditioned_groups=True)
+        tmp_npc.select_parameter_for_groups()
+        tmp_select = time.perf_counter()
+        tmp_npc.conditioned_groups(select_conditioned_parameters=True)
+        tmp_end = time.perf_counter()
+        tmp_stage_times['optional_groups'] += tmp_optional - tmp_start
+        tmp_stage_times['multiple_groups'] += tmp_multiple - tmp_optional
+        tmp_stage_times['select_parameters'] += tmp_select - tmp_multiple
+        tmp_stage_times['conditioned_groups'] += tmp_end - tmp_select
+    out_times.update({ins_stage: ins_time / count for ins_stage, ins_time in tmp_stage_times.items()})
+
+    out_times['npc'] = time_per_call(main.NonPlayableCharacter(tmp_plan, 2), count)
+    out_times['npc_no_pool_cache'] = time_per_call(main.NonPlayableCharacter(tmp_plan, 2, 0), count)
+    return out_times
+
+
+def run_suite(scales=(10, 100, 1000), chain_depths=(8,), multiplicities=(50,), count=2000):
+    """
+    times every stage on shipped config.txt and database and on scaled up copies of them, run from directory with
+    config.txt and database
+
+    :param scales: how many times Name and its conditioned groups are scaled
+    :param chain_depths: depths of added chains of conditioned groups
+    :param multiplicities: numbers of parameters of every multiple group
+    :param count: number of NPC-s timed for every database, scaled databases time count / scale of them (at
+    least 50) because every NPC takes longer
+    :return: dictionary with environment and times of every stage for every database
+    """
+
+    import platform
+
+    out_results = {'python': platform.python_version(), 'platform': platform.platform(), 'count': count,
+                   'databases': {}}
+    out_results['databases']['shipped'] = benchmark_stages(main.global_config_path, main.global_database_path, count)
+
+    tmp_cases = [(f'name_x{ins_scale}', {'scale': ins_scale}) for ins_scale in scales] + \
+        [(f'chain_{ins_depth}', {'chain_depth': ins_depth}) for ins_depth in chain_depths] + \
+        [(f'multiple_{ins_multiplicity}', {'multiplicity': ins_multiplicity}) for ins_multiplicity in multiplicities]
+    for tmp_name, tmp_options in tmp_cases:
+        with tempfile.TemporaryDirectory() as tmp_directory:
+            out_results['databases'][tmp_name] = benchmark_stages(
+                *write_scaled_database(tmp_directory, **tmp_options), max(count // tmp_options.get('scale', 1), 50))
+    return out_results
+
+
+def compare_results(results, baseline, threshold=0.2, min_difference=1e-6):
+    """
+    :param results: results of run_suite
+    :param baseline: results of run_suite stored earlier
+    :param threshold: relative slowdown that is reported as regression
+    :param min_difference: slowdown in seconds under which stage is not reported, stages of one NPC take few
+    microseconds and their noise is bigger than threshold
+    :return: list of (database, stage, baseline time, time) of every regression
+    """
+
+    out_regressions = []
+    for tmp_database, tmp_times in results['databases'].items():
+        for tmp_stage, tmp_time in tmp_times.items():
+            tmp_baseline_time = baseline.get('databases', {}).get(tmp_database, {}).get(tmp_stage)
+            if tmp_baseline_time and tmp_time - tmp_baseline_time > max(tmp_baseline_time * threshold, min_difference):
+                out_regressions.append((tmp_database, tmp_stage, tmp_baseline_time, tmp_time))
+    return out_regressions
+
+
+def suite_command(argv):
+    """
+    runs benchmark suite from command line ('python benchmark.py suite --json results.json --baseline base.json')
+
+    :param argv: command line arguments after 'suite'
+    :return: exit code, 1 if any stage regressed against baseline
+    """
+
+    import argparse
+    import json
+
+    tmp_parser = argparse.ArgumentParser(prog='benchmark.py suite', description='times every stage of generation')
+    tmp_parser.add_argument('--json', help='write results to this file, - for standard output')
+    tmp_parser.add_argument('--baseline', help='results of earlier run, stages slower than it are flagged')
+    tmp_parser.add_argument('--threshold', type=float, default=0.2,
+                            help='relative slowdown flagged as regression (default 0.2)')
+    tmp_parser.add_argument('--min-difference', type=float, default=1e-6,
+                            help='slowdown in seconds that is never flagged (default 0.000001)')
+    tmp_parser.add_argument('--scales', type=int, nargs='*', default=[10, 100, 1000],
+                            help='scales of Name group (default 10 100 1000)')
+    tmp_parser.add_argument('--chain-depths', type=int, nargs='*', default=[8], help='depths of condition chains')
+    tmp_parser.add_argument('--multiplicities', type=int, nargs='*', default=[50],
+                            help='numbers of parameters of every multiple group')
+    tmp_parser.add_argument('-n', '--count', type=int, default=2000, help='number of NPC-s timed (default 2000)')
+    tmp_arguments = tmp_parser.parse_args(argv)
+
+    tmp_baseline = None
+    if tmp_arguments.baseline:
+        with open(tmp_arguments.baseline, encoding='utf-8') as tmp_baseline_f:
+            tmp_baseline = json.load(tmp_baseline_f)
+
+    tmp_results = run_suite(tmp_arguments.scales, tmp_arguments.chain_depths, tmp_arguments.multiplicities,
+                            tmp_arguments.count)
+
+    print(f'{"suite": <20}{"stage": <22}{"time [s]": >14}{"baseline [s]": >14}{"ratio": >8}', file=sys.stderr)
+    for tmp_database, tmp_times in tmp_results['databases'].items():
+        for tmp_stage, tmp_time in tmp_times.items():
+            tmp_baseline_time = (tmp_baseline or {}).get('databases', {}).get(tmp_database, {}).get(tmp_stage)
+            tmp_baseline_str = f'{tmp_baseline_time:.8f}' if tmp_baseline_time else '-'
+            tmp_ratio_str = f'{tmp_time / tmp_baseline_time:.2f}' if tmp_baseline_time else '-'
+            print(f'{tmp_database: <20}{tmp_stage: <22}{tmp_time: >14.8f}{tmp_baseline_str: >14}{tmp_ratio_str: >8}',
+                  file=sys.stderr)
+
+    if tmp_arguments.json == '-':
+        json.dump(tmp_results, sys.stdout, indent=2)
+        print()
+    elif tmp_arguments.json:
+        with open(tmp_arguments.json, 'w', encoding='utf-8') as tmp_json_f:
+            json.dump(tmp_results, tmp_json_f, indent=2)
+
+    if tmp_baseline is None:
+        return 0
+    tmp_regressions = compare_results(tmp_results, tmp_baseline, tmp_arguments.threshold,
+                                      tmp_arguments.min_difference)
+    for tmp_database, tmp_stage, tmp_baseline_time, tmp_time in tmp_regressions:
+        print(f'regression: {tmp_database} {tmp_stage} {tmp_baseline_time:.8f} s -> {tmp_time:.8f} s',
+              file=sys.stderr)
+    return 1 if tmp_regressions else 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['suite']:
+        sys.exit(suite_command(sys.argv[2:]))
+    if sys.argv[1:2] == ['startup']:
+        sys.exit(benchmark_startup())
+
+    benchmark_merge_rarity_lists(legacy_limit=int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6)
+    benchmark_select_parameters()
+    benchmark_sampling_modes()
+    benchmark_legacy_parser()
+    benchmark_mapped_database()
+    benchmark_sinks()
+    benchmark_pool_cache()
+    benchmark_constrained_population()
+    benchmark_unique_population()
+    benchmark_population_engine()
+    benchmark_population_engine(force=[['Race', 'Elf', 'Dwarf'], ['Sex', 'Female']])
+    benchmark_probability_model()
+    benchmark_probability_model(sampling='Weighted')
+    benchmark_service()
+    benchmark_startup()
@@ -12,26 +12,44 @@
 # _______________________________________
 """
 
-import random
+import abc
 import itertools
-import re
+import operator
 import os
+import sys
 
 global_config_path = './config.txt'
 global_database_path = './database'
+global_cache_path = './database.cache'
+global_cache_version = 3  # raise when anything stored in cache changes
+global_image_path = None  # path to on-disk database image ('./database.image'), None keeps database in memory
+global_image_magic = b'NPCIMG01'
 
+global_sampling_modes = ('pool', 'weighted')  # modes of __Sampling__ group of config.txt, first is default
+global_pool_cache_size = 1024  # number of choosing pools of conditioned groups kept by every NPC generator
+global_unique_retries = 1000  # number of times duplicate NPC is generated again in unique mode before giving up
+global_worker_npc = None  # NPC generator of worker process used by NonPlayableCharacter.generate_parallel
 
-def load_files(inp_data):
+global_http_reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+global_heading_pattern = r'(__|==)(\w+)\1'
+# every random byte from 0 to 199 is turned into percent from 1 to 100, bytes from 200 to 255 are rejected
+global_percent_table = bytes((ins_byte % 100) + 1 if ins_byte < 200 else 0 for ins_byte in range(256))
+global_percent_rejected = bytes(range(200, 256))
+
+
+def load_files(inp_data, stats=None):
     # load data file
+    # (stats is GenerationStats that counts opened files, None turns counting off)
     # _______________________________________
     if inp_data.endswith('.txt'):  # support for legacy database type
         try:
             with open(inp_data, encoding='utf-8') as data_f:
                 out_data = data_f.read()
+            if stats is not None:
+                stats.add('files_opened')
         except FileNotFoundError:
-            if inp_data == global_config_path or inp_data == global_database_path:
-                raise FileNotFoundError(f"Database file {inp_data} not found.")
-            pass
+            raise FileNotFoundError(f"Database file {inp_data} not found.")
 
     else:  # file is data directory
         out_data = {}
@@ -42,31 +60,36 @@ def load_files(inp_data):
                     tmp_file_path = os.path.join(inp_data, tmp_filename)
                     with open(tmp_file_path, encoding='utf-8') as data_d:
                         out_data[tmp_group_name] = data_d.read()
+                    if stats is not None:
+                        stats.add('files_opened')
         except FileNotFoundError:
-            if inp_data == global_config_path or inp_data == global_database_path:
-                raise FileNotFoundError(f"Database directory {inp_data} not found.")
-            pass
+            raise FileNotFoundError(f"Database directory {inp_data} not found.")
 
     # debug print output
     # print(out_data)
     return out_data
 
 
-def extract_groups(inp_data, delimiter='__'):
+def extract_groups(inp_data, delimiter='__', stats=None):
     """
     extracts list of all groups in database
     (used to search document for all groups and returns them inside of list)
 
     :param delimiter: Set of characters that define group set
     :param inp_data: String of document from which list is extracted
+    :param stats: GenerationStats that counts regex evaluations, None turns counting off
     :return: list of all groups and number of them
     """
 
     # input data is string with delimiters
     # _______________________________________
     if type(inp_data) == str:
+        import re
+
         tmp_pattern = rf'({delimiter}\w+{delimiter})+'
         tmp_database = re.findall(tmp_pattern, inp_data, flags=0)
+        if stats is not None:
+            stats.add('regex_evaluations')
         out_group_list = [ins_str.strip(delimiter) for ins_str in tmp_database]
 
     # input data is dictionary with keys
@@ -74,546 +97,4427 @@ def extract_groups(inp_data, delimiter='__'):
     elif type(inp_data) == dict:
         out_group_list = list(inp_data.keys())
 
-    # _______________________________________
-    else:
-        raise TypeError(f'Type of {inp_data} not possible to compile')
+    # _______________________________________
+    else:
+        raise TypeError(f'Type of {inp_data} not possible to compile')
+
+    out_groups_length = len(out_group_list)
+
+    # debug print output
+    # print(out_group_list, out_groups_length)
+    return out_group_list, out_groups_length
+
+
+def extract_list(inp_data, group_name, delimiter='__', stats=None):
+    """
+    extracts list of elements inside of group and stores it inside of list
+    (used to search document for certain group (Race) and returns all elements inside of it (dwarf, elf...))
+
+    :param delimiter: Set of characters that define group set
+    :param inp_data: String of document from which list is extracted
+    :param group_name: Name of group for witch list is extracted
+    :param stats: GenerationStats that counts regex evaluations, None turns counting off
+    :return: list of all elements in the group and length of that group list
+    """
+
+    # input data is string with delimiters
+    # _______________________________________
+    if type(inp_data) == str:
+        import re
+
+        tmp_pattern = rf'{delimiter}{group_name}{delimiter}(\n.+\s*)*/end'
+        tmp_data = re.search(tmp_pattern, inp_data, flags=0)
+        if stats is not None:
+            stats.add('regex_evaluations')
+        tmp_database_list = list(tmp_data.group(0).split('\n'))
+        out_data_list = tmp_database_list[1:-1]
+
+    # input data is dictionary with keys
+    # _______________________________________
+    elif type(inp_data) == dict:
+        out_data_list = list(inp_data[group_name].split('\n'))
+
+    # _______________________________________
+    else:
+        raise TypeError(f'Type of {inp_data} not possible to compile')
+
+    out_data_list = [ins_element for ins_element in out_data_list if ins_element.strip()]
+    out_list_length = len(out_data_list)
+
+    # debug print output
+    # print(out_data_list, out_list_length)
+    return out_data_list, out_list_length
+
+
+def parse_legacy_database(inp_data, stats=None):
+    """
+    reads legacy database (or config.txt) in one pass, line by line, and collects all groups ('__Group__') and
+    conditioned groups ('==SubGroup==') with parameters listed under them until terminator
+
+    :param inp_data: string of document or any iterable of its lines (opened file)
+    :param stats: GenerationStats that counts regex evaluations, None turns counting off
+    :return: dictionary of groups and dictionary of conditioned groups, both {name: list of parameters}
+    """
+
+    import re
+
+    tmp_heading_pattern = re.compile(global_heading_pattern)
+    out_groups = {}
+    out_subgroups = {}
+    tmp_block = None  # list to which parameters are added, None when outside of group
+
+    if type(inp_data) == str:
+        inp_data = inp_data.split('\n')
+
+    for tmp_line in inp_data:
+        tmp_line = tmp_line.rstrip('\n')
+        tmp_stripped_line = tmp_line.strip()
+
+        if tmp_block is not None:
+            if tmp_stripped_line == '/end':
+                tmp_block = None
+            elif tmp_stripped_line:
+                tmp_block.append(tmp_line)
+
+        elif tmp_stripped_line[:2] in ('__', '=='):
+            tmp_heading = tmp_heading_pattern.fullmatch(tmp_stripped_line)
+            if stats is not None:
+                stats.add('regex_evaluations')
+            if tmp_heading:
+                tmp_blocks = out_groups if tmp_heading.group(1) == '__' else out_subgroups
+                # if heading is repeated only the first group with that name is used
+                tmp_block = tmp_blocks.setdefault(tmp_heading.group(2), []) \
+                    if tmp_heading.group(2) not in tmp_blocks else []
+
+    # debug print output
+    # print(out_groups, out_subgroups)
+    return out_groups, out_subgroups
+
+
+def read_database_file(path, stats=None):
+    """
+    :param path: path to file of database directory
+    :param stats: GenerationStats that counts opened files, None turns counting off
+    :return: tuple of all parameters in file, same as extract_list gives for that file
+    """
+
+    if stats is not None:
+        stats.add('files_opened')
+    with open(path, encoding='utf-8') as data_f:
+        return tuple(ins_line for ins_line in data_f.read().split('\n') if ins_line.strip())
+
+
+def clean_special_groups(group, stats=None):
+    """
+    subtracts unnecessary characters from parameter: such as _by_ , and all other _
+    than group all remaining words into list
+
+    :param group: Parameter from which unnecessary characters are subtracted
+    :param stats: GenerationStats that counts regex evaluations, None turns counting off
+    :return: List with group name and its specialties
+    """
+
+    import re
+
+    tmp_group_string = group.replace('_by_', ' ')
+    tmp_group_string = tmp_group_string.replace('_', ' ')
+    tmp_group_and_specialties = re.findall(r'\w+', tmp_group_string)
+    if stats is not None:
+        stats.add('regex_evaluations')
+
+    # debug print output
+    # print(tmp_group_and_specialties)
+    return tmp_group_and_specialties
+
+
+def merge_rarity_lists(base_list, added_list):
+    """
+    merge two lists, if one parameter is in both lists it takes rarity class form added_list
+    (parameters are keyed by their clean name, so merging takes one pass over each list and keeps order:
+    parameters of base_list first, then new parameters of added_list)
+
+    :param base_list: list to which parameters are added
+    :param added_list: list from which parameters are added
+    :return: list that have parameters from both lists with rarity class prioritized by added_list
+    """
+
+    tmp_merged_parameters = {}
+
+    for tmp_parameter in base_list:
+        tmp_merged_parameters[split_rarity_class(tmp_parameter)[0]] = tmp_parameter
+
+    # if there are multiple of the same parameter replace one in base list with the new one
+    for tmp_parameter in added_list:
+        tmp_merged_parameters[split_rarity_class(tmp_parameter)[0]] = tmp_parameter
+
+    out_new_list = list(tmp_merged_parameters.values())
+    # debug print output
+    # print(out_new_list)
+    return out_new_list
+
+
+def normalize_subgroup_name(name):
+    """
+    removes spaces and underscores so that 'Dwarf (darker-skinned)Name', 'Dwarf_(darker-skinned)Name' and
+    'Male_Catfolk_Name' match parameters written in any of those ways
+
+    :param name: name of subgroup or parameter
+    :return: normalized name
+    """
+
+    return name.replace(' ', '').replace('_', '')
+
+
+def split_rarity_class(parameter):
+    """
+    splits parameter into its clean name and its rarity class
+    (Azarketi(U) -> Azarketi, U, rarity class is one to three word characters in brackets at the end, same as
+    regex '\\(\\w{1,3}\\)$' but without importing re)
+
+    :param parameter: parameter from database
+    :return: clean parameter and rarity class string, rarity class is '' if parameter has none
+    """
+
+    if parameter[-1:] != ')':
+        return parameter, ''
+    tmp_start = parameter.rfind('(', -5, -1)
+    tmp_rarity_class = parameter[tmp_start + 1:-1]
+    if tmp_start < 0 or not tmp_rarity_class or not tmp_rarity_class.replace('_', 'a').isalnum():
+        return parameter, ''
+
+    return parameter.replace(parameter[tmp_start:], ''), tmp_rarity_class
+
+
+def percent_block(size, rng):
+    """
+    draws block of random percents in bulk, each byte is number from 1 to 100 with equal chance
+    (same as calling random.randint(1, 100) for every byte but without python call for each of them)
+
+    :param size: number of percents in block
+    :param rng: random.Random from which random bytes are taken
+    :return: bytes with random percents
+    """
+
+    out_block = b''
+    while len(out_block) < size:
+        # bytes from 200 to 255 are thrown away so that every percent has the same chance
+        tmp_missing = size - len(out_block)
+        out_block += rng.randbytes(tmp_missing + (tmp_missing >> 2) + 8) \
+            .translate(global_percent_table, global_percent_rejected)
+    return out_block[:size]
+
+
+class RandomSource:
+    """
+    source of all random numbers of one NPC generator
+    (wraps random.Random or numpy Generator, random percents are drawn in blocks and handed out from buffer)
+    """
+
+    __slots__ = ('loc_generator', 'loc_numpy', 'loc_block_size', 'loc_percents', 'loc_percent_index')
+
+    def __init__(self, seed=None, block_size=4096):
+        """
+        :param seed: None, int or str seed, random.Random or numpy Generator
+        :param block_size: number of random percents drawn at once
+        """
+
+        import random
+
+        # numpy is not imported, its Generator is recognised by its attributes
+        self.loc_numpy = hasattr(seed, 'bit_generator') and hasattr(seed, 'integers')
+        if self.loc_numpy or isinstance(seed, random.Random):
+            self.loc_generator = seed
+        else:
+            self.loc_generator = random.Random(seed)
+
+        self.loc_block_size = block_size
+        self.loc_percents = b''
+        self.loc_percent_index = 0
+
+    def fill_percents(self, size):
+        """
+        draws new block of random percents, percents that were not used are kept at the beginning of the block
+
+        :param size: minimal number of percents in buffer
+        :return: filled buffer of percents
+        """
+
+        tmp_size = max(size, self.loc_block_size)
+        if self.loc_numpy:
+            tmp_block = self.loc_generator.integers(1, 101, tmp_size, dtype='uint8').tobytes()
+        else:
+            tmp_block = percent_block(tmp_size, self.loc_generator)
+
+        self.loc_percents = self.loc_percents[self.loc_percent_index:] + tmp_block
+        self.loc_percent_index = 0
+
+    def percent(self):
+        """
+        :return: random number from 1 to 100 (same as random.randint(1, 100))
+        """
+
+        if self.loc_percent_index >= len(self.loc_percents):
+            self.fill_percents(1)
+        self.loc_percent_index += 1
+        return self.loc_percents[self.loc_percent_index - 1]
+
+    def percents(self, size):
+        """
+        :param size: number of random percents
+        :return: bytes with random numbers from 1 to 100
+        """
+
+        if self.loc_percent_index + size > len(self.loc_percents):
+            self.fill_percents(size)
+        self.loc_percent_index += size
+        return self.loc_percents[self.loc_percent_index - size:self.loc_percent_index]
+
+    def below(self, number):
+        """
+        :param number: number of possible outcomes
+        :return: random number from 0 to number - 1
+        """
+
+        if self.loc_numpy:
+            return int(self.loc_generator.integers(number))
+        return self.loc_generator.randrange(number)
+
+    def sample(self, population_size, k):
+        """
+        picks k different indexes from population without replacement, each draw costs the same no matter how many
+        indexes were already picked (partial Fisher-Yates shuffle that remembers only swapped indexes)
+
+        :param population_size: number of elements in population
+        :param k: number of indexes, if it is bigger than population whole population is returned in random order
+        :return: list of picked indexes in order in which they were picked
+        """
+
+        return list(itertools.islice(self.shuffled(population_size), k))
+
+    def shuffled(self, population_size):
+        """
+        yields indexes of population in random order one by one, so caller can stop as soon as it has enough of them
+        (partial Fisher-Yates shuffle, population is never listed)
+
+        :param population_size: number of elements in population
+        :return: generator of indexes
+        """
+
+        tmp_swapped = {}
+        for tmp_index in range(population_size):
+            tmp_picked = tmp_index + self.below(population_size - tmp_index)
+            yield tmp_swapped.get(tmp_picked, tmp_picked)
+            tmp_swapped[tmp_picked] = tmp_swapped.get(tmp_index, tmp_index)
+
+    def take_over(self, source):
+        """
+        continues random numbers of other source, its generator and percents that were not used are taken
+
+        :param source: RandomSource whose random numbers are continued
+        :return: this source
+        """
+
+        self.loc_generator = source.loc_generator
+        self.loc_numpy = source.loc_numpy
+        self.loc_block_size = source.loc_block_size
+        self.loc_percents = source.loc_percents
+        self.loc_percent_index = source.loc_percent_index
+        return self
+
+
+class ProfiledRandomSource(RandomSource):
+    """
+    RandomSource that counts every random number it hands out into GenerationStats
+    """
+
+    __slots__ = ('loc_stats',)
+
+    def __init__(self, source, stats):
+        """
+        :param source: RandomSource whose random numbers are continued
+        :param stats: GenerationStats in which random draws are counted
+        """
+
+        super().__init__(source.loc_generator, source.loc_block_size)
+        self.take_over(source)
+        self.loc_stats = stats
+
+    def percent(self):
+        self.loc_stats.add('random_draws')
+        return super().percent()
+
+    def percents(self, size):
+        self.loc_stats.add('random_draws', size)
+        return super().percents(size)
+
+    def below(self, number):
+        self.loc_stats.add('random_draws')
+        return super().below(number)
+
+
+def resolve_rarity_class(rarity_class_str, rarity_classes):
+    """
+    :param rarity_class_str: rarity class of parameter ('U', '50' or '' if parameter has none)
+    :param rarity_classes: dictionary of rarity class names and their percentage from config.txt
+    :return: chance of parameter being in choosing pool, from 0 to 100
+    """
+
+    # search if that rarity class is defined
+    try:
+        tmp_rarity_class_int = rarity_classes[rarity_class_str]
+    except KeyError:
+        # check if rarity class is integer
+        try:
+            tmp_rarity_class_int = int(rarity_class_str)
+        # if not give it 100% chance of occurring
+        except ValueError:
+            tmp_rarity_class_int = 100
+
+    return min(max(tmp_rarity_class_int, 0), 100)
+
+
+def build_alias_table(weights):
+    """
+    builds alias table of weights in whole numbers, so that one random number picks weighted index
+    (Vose's method, every index has column of height equal to sum of weights, part of column that index does not fill
+    is given to one larger index)
+
+    :param weights: whole number weight of every index
+    :return: tuple of threshold of every column, alias of every column, sum of weights and number of weights
+    above 0
+    """
+
+    tmp_size = len(weights)
+    tmp_total = sum(weights)
+    tmp_scaled = [ins_weight * tmp_size for ins_weight in weights]
+    out_thresholds = [tmp_total] * tmp_size
+    out_aliases = list(range(tmp_size))
+
+    tmp_small = [ins_index for ins_index, ins_scaled in enumerate(tmp_scaled) if ins_scaled < tmp_total]
+    tmp_large = [ins_index for ins_index, ins_scaled in enumerate(tmp_scaled) if ins_scaled >= tmp_total]
+    while tmp_small and tmp_large:
+        tmp_small_index = tmp_small.pop()
+        tmp_large_index = tmp_large[-1]
+        out_thresholds[tmp_small_index] = tmp_scaled[tmp_small_index]
+        out_aliases[tmp_small_index] = tmp_large_index
+        tmp_scaled[tmp_large_index] -= tmp_total - tmp_scaled[tmp_small_index]
+        if tmp_scaled[tmp_large_index] < tmp_total:
+            tmp_small.append(tmp_large.pop())
+
+    return tuple(out_thresholds), tuple(out_aliases), tmp_total, tmp_size - list(weights).count(0)
+
+
+class RarityList:
+    """
+    parameters of one group compiled with chance of every parameter being in choosing pool
+    (rarity class of each parameter is resolved once, so drawing choosing pool does not process any string)
+    """
+
+    __slots__ = ('loc_parameters', 'loc_chances', 'loc_all_certain', 'loc_expected_size', 'loc_alias_table')
+
+    def __init__(self, parameters, rarity_classes):
+        """
+        :param parameters: parameters with rarity class at the end of them ('Azarketi(U)')
+        :param rarity_classes: dictionary of rarity class names and their percentage from config.txt
+        """
+
+        tmp_parameters = []
+        tmp_chances = bytearray()
+
+        for tmp_parameter in parameters:
+            tmp_clean_parameter, tmp_rarity_class_str = split_rarity_class(tmp_parameter)
+            tmp_parameters.append(tmp_clean_parameter)
+            tmp_chances.append(resolve_rarity_class(tmp_rarity_class_str, rarity_classes))
+
+        self.loc_parameters = tuple(tmp_parameters)
+        self.set_chances(bytes(tmp_chances))
+
+    def set_chances(self, chances):
+        """
+        :param chances: bytes with chance of every parameter
+        :return: chances with their sum, used to choose how choosing pool is drawn
+        """
+
+        self.loc_chances = chances
+        self.loc_all_certain = chances.count(100) == len(chances)
+        self.loc_expected_size = sum(chances) / 100
+        self.loc_alias_table = None  # built with first weighted selection
+
+    def __len__(self):
+        return len(self.loc_parameters)
+
+    def parameter(self, index):
+        """
+        :param index: index of parameter
+        :return: parameter without rarity class
+        """
+
+        return self.loc_parameters[index]
+
+    def draw(self, rng):
+        """
+        every parameter gets into choosing pool if its chance is bigger or equal to random percent
+
+        :param rng: RandomSource
+        :return: list of parameters in choosing pool
+        """
+
+        if self.loc_all_certain:
+            return list(self.loc_parameters)
+
+        tmp_percents = rng.percents(len(self.loc_chances))
+        return list(itertools.compress(self.loc_parameters, map(operator.ge, self.loc_chances, tmp_percents)))
+
+    def select(self, rng, k):
+        """
+        picks k different parameters from choosing pool, for large list whole choosing pool is drawn only when
+        k is a big part of it, otherwise parameters are visited in random order and each one gets in with its
+        chance until k of them got in (that picks same as drawing choosing pool and sampling from it)
+
+        :param rng: RandomSource
+        :param k: number of parameters, if choosing pool is smaller all of its parameters are returned
+        :return: list of picked parameters in order in which they were picked
+        """
+
+        tmp_size = len(self.loc_chances)
+        if k <= 0:
+            return []
+        if self.loc_all_certain:
+            return [self.parameter(ins_index) for ins_index in rng.sample(tmp_size, k)]
+
+        if k * 32 > self.loc_expected_size:
+            tmp_pool = list(itertools.compress(range(tmp_size),
+                                               map(operator.ge, self.loc_chances, rng.percents(tmp_size))))
+            return [self.parameter(tmp_pool[ins_index]) for ins_index in rng.sample(len(tmp_pool), k)]
+
+        out_parameters = []
+        for tmp_index in rng.shuffled(tmp_size):
+            if self.loc_chances[tmp_index] >= rng.percent():
+                out_parameters.append(self.parameter(tmp_index))
+                if len(out_parameters) == k:
+                    break
+        return out_parameters
+
+    def select_weighted(self, rng, k):
+        """
+        picks k different parameters with chance of every parameter as its weight, parameter with chance 0 is never
+        picked and no choosing pool is drawn, so group is empty only if all of its chances are 0
+        (every pick costs one random number from alias table, parameter that was already picked is drawn again,
+        when k is a big part of parameters every parameter gets random key with its weight and k largest keys are
+        taken instead, which picks the same)
+
+        :param rng: RandomSource
+        :param k: number of parameters, if there are fewer parameters with chance above 0 all of them are returned
+        :return: list of picked parameters in order in which they were picked
+        """
+
+        if self.loc_alias_table is None:
+            self.loc_alias_table = build_alias_table(self.loc_chances)
+        tmp_thresholds, tmp_aliases, tmp_total, tmp_nonzero = self.loc_alias_table
+
+        tmp_size = len(self.loc_chances)
+        k = min(k, tmp_nonzero)
+        if k <= 0:
+            return []
+
+        if k * 2 > tmp_nonzero:
+            import heapq
+            import math
+
+            # key log(u) / weight of every parameter, largest keys come in same order as weighted picks
+            tmp_keys = {ins_index: math.log((rng.below(1 << 53) + 1) / (1 << 53)) / ins_weight
+                        for ins_index, ins_weight in enumerate(self.loc_chances) if ins_weight}
+            return [self.parameter(ins_index) for ins_index in heapq.nlargest(k, tmp_keys, key=tmp_keys.__getitem__)]
+
+        tmp_picked = {}
+        while len(tmp_picked) < k:
+            tmp_index, tmp_height = divmod(rng.below(tmp_size * tmp_total), tmp_total)
+            tmp_picked.setdefault(tmp_index if tmp_height < tmp_thresholds[tmp_index] else tmp_aliases[tmp_index])
+        return [self.parameter(ins_index) for ins_index in tmp_picked]
+
+
+class MappedRarityList(RarityList):
+    """
+    RarityList of group that stays in database image, parameters are read from image only when they are picked
+    """
+
+    __slots__ = ()
+
+    def __init__(self, parameters, chances):
+        """
+        :param parameters: MappedParameters of group
+        :param chances: bytes with chance of every parameter
+        """
+
+        self.loc_parameters = parameters
+        self.set_chances(chances)
+
+    def parameter(self, index):
+        return split_rarity_class(self.loc_parameters[index])[0]
+
+    def draw(self, rng):
+        tmp_size = len(self.loc_chances)
+        if self.loc_all_certain:
+            return [self.parameter(ins_index) for ins_index in range(tmp_size)]
+
+        tmp_percents = rng.percents(tmp_size)
+        return [self.parameter(ins_index) for ins_index in
+                itertools.compress(range(tmp_size), map(operator.ge, self.loc_chances, tmp_percents))]
+
+
+class ConditionedPoolCache:
+    """
+    least recently used choosing pools of conditioned groups, keyed by conditioned group and parameters of its
+    influential groups
+    """
+
+    __slots__ = ('loc_size', 'loc_pools', 'loc_hits', 'loc_misses')
+
+    def __init__(self, size=global_pool_cache_size):
+        """
+        :param size: the largest number of pools kept, 0 turns cache off
+        """
+
+        import collections
+
+        self.loc_size = size
+        self.loc_pools = collections.OrderedDict()  # {(group, influential parameters): RarityList}
+        self.loc_hits = 0
+        self.loc_misses = 0
+
+    def get(self, key):
+        """
+        :param key: conditioned group and tuple of parameters of its influential groups
+        :return: RarityList of pool, None if it is not in cache
+        """
+
+        tmp_pool = self.loc_pools.get(key)
+        if tmp_pool is None:
+            self.loc_misses += 1
+            return None
+        self.loc_pools.move_to_end(key)
+        self.loc_hits += 1
+        return tmp_pool
+
+    def put(self, key, pool):
+        """
+        :param key: conditioned group and tuple of parameters of its influential groups
+        :param pool: RarityList of pool
+        :return: pool kept in cache, the least recently used pool is dropped if cache is full
+        """
+
+        if self.loc_size <= 0:
+            return
+        self.loc_pools[key] = pool
+        if len(self.loc_pools) > self.loc_size:
+            self.loc_pools.popitem(last=False)
+
+    def clear(self):
+        """
+        :return: emptied cache, counters are kept
+        """
+
+        self.loc_pools.clear()
+
+    def stats(self):
+        """
+        :return: dictionary with hits, misses, hit rate and number of cached pools
+        """
+
+        tmp_lookups = self.loc_hits + self.loc_misses
+        return {'hits': self.loc_hits, 'misses': self.loc_misses,
+                'hit_rate': self.loc_hits / tmp_lookups if tmp_lookups else 0.0,
+                'pools': len(self.loc_pools), 'size': self.loc_size}
+
+
+class GenerationStats:
+    """
+    opt-in counters of NPC generation: wall time and calls of every stage and counters of work done inside them
+    """
+
+    __slots__ = ('loc_stages', 'loc_counters')
+
+    def __init__(self):
+        self.loc_stages = {}  # {stage: [calls, seconds]}
+        self.loc_counters = {}  # {counter: number}
+
+    def add(self, counter, number=1):
+        """
+        :param counter: name of counter
+        :param number: number added to counter
+        :return: counter raised by number
+        """
+
+        self.loc_counters[counter] = self.loc_counters.get(counter, 0) + number
+
+    def timed(self, stage, function):
+        """
+        :param stage: name of stage
+        :param function: function of that stage
+        :return: function that does the same and adds its call and wall time to stage
+        """
+
+        import time
+
+        tmp_perf_counter = time.perf_counter
+        tmp_stage = self.loc_stages.setdefault(stage, [0, 0.0])
+
+        def timed_function(*args, **kwargs):
+            tmp_start = tmp_perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                tmp_stage[0] += 1
+                tmp_stage[1] += tmp_perf_counter() - tmp_start
+
+        return timed_function
+
+    def reset(self):
+        """
+        :return: all stages and counters set to zero, timed functions keep adding to their stages
+        """
+
+        for tmp_stage in self.loc_stages.values():
+            tmp_stage[0] = 0
+            tmp_stage[1] = 0.0
+        self.loc_counters.clear()
+
+    def report(self):
+        """
+        :return: dictionary with calls and seconds of every stage and value of every counter
+        """
+
+        return {'stages': {ins_stage: {'calls': ins_calls, 'seconds': ins_seconds}
+                           for ins_stage, (ins_calls, ins_seconds) in self.loc_stages.items()},
+                'counters': dict(self.loc_counters)}
+
+
+def format_generation_stats(report):
+    """
+    :param report: dictionary from NonPlayableCharacter.stats or GenerationStats.report
+    :return: text with table of stages and list of counters, counters of loading plan are prefixed with 'load'
+    """
+
+    out_lines = [f'{"stage": <14}{"calls": >10}{"seconds": >12}{"us/call": >12}']
+    for tmp_stage, tmp_values in report['stages'].items():
+        tmp_per_call = tmp_values['seconds'] / tmp_values['calls'] * 1e6 if tmp_values['calls'] else 0.0
+        out_lines.append(f'{tmp_stage: <14}{tmp_values["calls"]: >10}{tmp_values["seconds"]: >12.4f}'
+                         f'{tmp_per_call: >12.2f}')
+    out_lines.append('')
+    for tmp_counter, tmp_value in sorted(report['counters'].items()):
+        out_lines.append(f'{tmp_counter: <24}{tmp_value}')
+    for tmp_counter, tmp_value in sorted(report.get('load', {}).items()):
+        out_lines.append(f'{"load " + tmp_counter: <24}{tmp_value}')
+    if 'pool_cache' in report:
+        tmp_cache = report['pool_cache']
+        out_lines.append(f'{"pool_cache": <24}{tmp_cache["hits"]} hits, {tmp_cache["misses"]} misses '
+                         f'({tmp_cache["hit_rate"]:.1%}), {tmp_cache["pools"]}/{tmp_cache["size"]} pools')
+    return '\n'.join(out_lines)
+
+
+class ConditionedIndex:
+    """
+    index of all existing conditioned groups of one group, built once from database
+    (tree with one level for every influential group, each level is keyed by parameter of that influential group
+    or by None if conditioned group does not depend on it, so finding conditioned groups of NPC walks only
+    through conditioned groups that exist)
+    """
+
+    __slots__ = ('loc_group', 'loc_influential_groups', 'loc_tree')
+
+    def __init__(self, group, influential_groups, vocabularies, subgroup_names):
+        """
+        :param group: name of conditioned group (Name)
+        :param influential_groups: names of influential groups in order from config.txt (Sex, Race)
+        :param vocabularies: for every influential group set of all its clean parameters
+        :param subgroup_names: names of all conditioned groups of group in database (MaleHumanName, ElfName, ...)
+        """
+
+        self.loc_group = group
+        self.loc_influential_groups = tuple(influential_groups)
+        self.loc_tree = {}
+
+        # normalized parameter -> list of parameters, for every influential group
+        tmp_normalized_vocabularies = []
+        for tmp_vocabulary in vocabularies:
+            tmp_normalized_vocabulary = {}
+            for tmp_parameter in tmp_vocabulary:
+                tmp_normalized_vocabulary.setdefault(normalize_subgroup_name(tmp_parameter), []) \
+                    .append(tmp_parameter)
+            tmp_normalized_vocabularies.append(tmp_normalized_vocabulary)
+
+        tmp_normalized_group = normalize_subgroup_name(group)
+        for tmp_subgroup_name in subgroup_names:
+            tmp_normalized_name = normalize_subgroup_name(tmp_subgroup_name)
+            if not tmp_normalized_name.endswith(tmp_normalized_group):
+                continue
+
+            tmp_prefix = tmp_normalized_name[:len(tmp_normalized_name) - len(tmp_normalized_group)]
+            for tmp_key in self.parse_prefix(tmp_prefix, 0, tmp_normalized_vocabularies):
+                self.add(tmp_key, tmp_subgroup_name)
+
+    def parse_prefix(self, prefix, position, normalized_vocabularies):
+        """
+        splits prefix of subgroup name into parameters of influential groups in their order
+        ('MaleHuman' -> ('Male', 'Human'), 'Elf' -> (None, 'Elf'))
+
+        :param prefix: normalized subgroup name without group name
+        :param position: index of first influential group that can still be used
+        :param normalized_vocabularies: for every influential group normalized parameters and their parameters
+        :return: generator of keys, key has parameter or None for every influential group
+        """
+
+        tmp_remaining_groups = len(self.loc_influential_groups) - position
+        if not prefix:
+            if position:  # at least one influential group is needed
+                yield (None,) * tmp_remaining_groups
+            return
+
+        for tmp_position in range(position, len(self.loc_influential_groups)):
+            for tmp_normalized, tmp_parameters in normalized_vocabularies[tmp_position].items():
+                if tmp_normalized and prefix.startswith(tmp_normalized):
+                    for tmp_rest in self.parse_prefix(prefix[len(tmp_normalized):], tmp_position + 1,
+                                                      normalized_vocabularies):
+                        for tmp_parameter in tmp_parameters:
+                            yield (None,) * (tmp_position - position) + (tmp_parameter,) + tmp_rest
+
+    def add(self, key, subgroup_name):
+        """
+        :param key: parameter or None for every influential group
+        :param subgroup_name: name of conditioned group
+        :return: conditioned group stored in tree, if two conditioned groups have same key the one which name is
+        written exactly as parameters and group joined together is kept, then the one with underscores
+        """
+
+        tmp_exact_name = ''.join(ins_parameter for ins_parameter in key if ins_parameter is not None) + self.loc_group
+        if subgroup_name == tmp_exact_name:
+            tmp_priority = 0
+        elif subgroup_name == tmp_exact_name.replace(' ', '_'):
+            tmp_priority = 1
+        else:
+            tmp_priority = 2
+
+        tmp_node = self.loc_tree
+        for tmp_parameter in key[:-1]:
+            tmp_node = tmp_node.setdefault(tmp_parameter, {})
+
+        tmp_leaf = tmp_node.get(key[-1])
+        if tmp_leaf is None or tmp_priority < tmp_leaf[0]:
+            tmp_node[key[-1]] = (tmp_priority, subgroup_name, sum(ins_parameter is not None for ins_parameter in key))
+
+    def resolve(self, influential_parameters):
+        """
+        finds all conditioned groups that match parameters of NPC
+
+        :param influential_parameters: for every influential group list of parameters of NPC, None if NPC does not
+        have that group
+        :return: list of conditioned group names with their specificity, from the most specific to the least
+        """
+
+        out_subgroups = []
+        if self.loc_tree:
+            self.walk(self.loc_tree, 0, influential_parameters, out_subgroups)
+
+        out_subgroups.sort(key=lambda ins_subgroup: -ins_subgroup[2])
+        return [(ins_subgroup[2], ins_subgroup[1]) for ins_subgroup in out_subgroups]
+
+    def walk(self, node, depth, influential_parameters, out_subgroups):
+        """
+        :param node: node of tree for influential group at depth
+        :param depth: index of influential group
+        :param influential_parameters: for every influential group list of parameters of NPC or None
+        :param out_subgroups: list to which found leaves are added
+        :return: all leaves under node which match parameters of NPC
+        """
+
+        tmp_last = depth == len(self.loc_influential_groups) - 1
+        tmp_parameters = influential_parameters[depth] or ()
+
+        for tmp_parameter in (*tmp_parameters, None):
+            tmp_child = node.get(tmp_parameter)
+            if tmp_child is not None:
+                if tmp_last:
+                    out_subgroups.append(tmp_child)
+                else:
+                    self.walk(tmp_child, depth + 1, influential_parameters, out_subgroups)
+
+
+class CompiledDatabase:
+    """
+    database compiled into memory once at startup
+    (every group and every conditioned group is read and split into tuple of parameters only once,
+    so generating NPC does not touch any file)
+    """
+
+    def __init__(self, inp_data_path=global_database_path, stats=None):
+        """
+        :param inp_data_path: path to database directory, if it is not found legacy '.txt' database is used
+        :param stats: GenerationStats that counts opened files and regex evaluations, None turns counting off
+        """
+
+        self.loc_data_path = inp_data_path
+        self.loc_legacy = False
+        self.loc_groups = {}  # {group: (parameter, parameter_2, ...)}
+        self.loc_subgroups = {}  # {group: {subgroup: (parameter, parameter_2, ...)}}
+
+        if not inp_data_path.endswith('.txt'):
+            try:
+                self.compile_directory(inp_data_path, stats)
+                return
+            except FileNotFoundError:
+                self.loc_data_path = f'{inp_data_path}.txt'
+
+        try:
+            with open(self.loc_data_path, encoding='utf-8') as data_f:
+                if stats is not None:
+                    stats.add('files_opened')
+                self.compile_legacy(data_f, stats)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Database file {self.loc_data_path} not found.")
+
+    def compile_directory(self, inp_data_path, stats=None):
+        """
+        reads database directory, files are groups and directories hold conditioned groups of group with same name
+
+        :param inp_data_path: path to database directory
+        :param stats: GenerationStats that counts opened files and regex evaluations, None turns counting off
+        :return: filled groups and subgroups
+        """
+
+        if not os.path.isdir(inp_data_path):
+            raise FileNotFoundError(f"Database directory {inp_data_path} not found.")
+        tmp_data = load_files(inp_data_path, stats)
+
+        for tmp_group in extract_groups(tmp_data, stats=stats)[0]:
+            self.loc_groups[tmp_group] = tuple(extract_list(tmp_data, tmp_group, stats=stats)[0])
+            self.loc_subgroups[tmp_group] = {}
+
+        for tmp_entry in os.scandir(inp_data_path):
+            if tmp_entry.is_dir():
+                tmp_subgroup_data = load_files(tmp_entry.path, stats)
+                self.loc_subgroups[tmp_entry.name] = {
+                    ins_subgroup: tuple(extract_list(tmp_subgroup_data, ins_subgroup, stats=stats)[0])
+                    for ins_subgroup in extract_groups(tmp_subgroup_data, stats=stats)[0]}
+
+    def compile_legacy(self, inp_data, stats=None):
+        """
+        reads legacy single file database in one pass, conditioned groups ('==SubGroup==') are placed under
+        group which name they end with
+
+        :param inp_data: string of legacy database or opened legacy database file
+        :param stats: GenerationStats that counts regex evaluations, None turns counting off
+        :return: filled groups and subgroups
+        """
+
+        self.loc_legacy = True
+
+        tmp_groups, tmp_subgroups = parse_legacy_database(inp_data, stats)
+        for tmp_group, tmp_parameters in tmp_groups.items():
+            self.loc_groups[tmp_group] = tuple(tmp_parameters)
+            self.loc_subgroups[tmp_group] = {}
+
+        # longest group name first so that 'MaleFirstName' goes to 'FirstName' and not to 'Name'
+        tmp_groups_by_length = sorted(self.loc_groups, key=len, reverse=True)
+        for tmp_subgroup, tmp_parameters in tmp_subgroups.items():
+            for tmp_group in tmp_groups_by_length:
+                if tmp_subgroup.endswith(tmp_group):
+                    self.loc_subgroups[tmp_group][tmp_subgroup] = tuple(tmp_parameters)
+                    break
+
+    def updated(self, changed_paths, stats=None):
+        """
+        reads again only files of database directory that were changed, added or removed
+
+        :param changed_paths: paths of changed files inside of database directory
+        :param stats: GenerationStats that counts opened files, None turns counting off
+        :return: new CompiledDatabase that shares every unchanged group with this one (this one is not changed) and
+        set of names of groups that changed
+        """
+
+        import copy
+
+        out_database = copy.copy(self)
+        out_database.loc_groups = dict(self.loc_groups)
+        out_database.loc_subgroups = dict(self.loc_subgroups)
+        out_changed_groups = set()
+
+        for tmp_path in changed_paths:
+            tmp_parts = os.path.normpath(os.path.relpath(tmp_path, self.loc_data_path)).split(os.sep)
+            if not tmp_parts[-1].endswith('.txt') or len(tmp_parts) > 2:
+                continue
+            tmp_group = tmp_parts[0][:-4] if len(tmp_parts) == 1 else tmp_parts[0]
+            try:
+                tmp_parameters = read_database_file(tmp_path, stats)
+            except FileNotFoundError:
+                tmp_parameters = None  # file was removed
+
+            if len(tmp_parts) == 1:
+                if tmp_parameters is None:
+                    out_database.loc_groups.pop(tmp_group, None)
+                    if not os.path.isdir(os.path.join(self.loc_data_path, tmp_group)):
+                        out_database.loc_subgroups.pop(tmp_group, None)
+                else:
+                    out_database.loc_groups[tmp_group] = tmp_parameters
+                    out_database.loc_subgroups.setdefault(tmp_group, {})
+            else:
+                # conditioned groups of group are copied before first change, old database keeps its own
+                if out_database.loc_subgroups.get(tmp_group) is self.loc_subgroups.get(tmp_group):
+                    out_database.loc_subgroups[tmp_group] = dict(self.loc_subgroups.get(tmp_group, {}))
+                if tmp_parameters is None:
+                    out_database.loc_subgroups[tmp_group].pop(tmp_parts[1][:-4], None)
+                else:
+                    out_database.loc_subgroups[tmp_group][tmp_parts[1][:-4]] = tmp_parameters
+
+            out_changed_groups.add(tmp_group)
+
+        return out_database, out_changed_groups
+
+    def group_names(self):
+        """
+        :return: list of all groups in order in which they are listed in database
+        """
+
+        return list(self.loc_groups)
+
+    def group(self, group_name):
+        """
+        :param group_name: name of group
+        :return: tuple of all parameters in group, raises KeyError if there is no such group
+        """
+
+        return self.loc_groups[group_name]
+
+    def subgroup_names(self, group_name):
+        """
+        :param group_name: name of group
+        :return: list of all conditioned groups of group
+        """
+
+        return list(self.loc_subgroups.get(group_name, {}))
+
+    def subgroup(self, group_name, subgroup_name):
+        """
+        :param group_name: name of group to which conditioned group belongs
+        :param subgroup_name: name of conditioned group
+        :return: tuple of all parameters in conditioned group, raises KeyError if there is no such conditioned group
+        """
+
+        return self.loc_subgroups.get(group_name, {})[subgroup_name]
+
+    def clean_parameters(self, group_name):
+        """
+        :param group_name: name of group
+        :return: set of all parameters without rarity class that group can have, from group and its conditioned groups
+        """
+
+        out_parameters = {split_rarity_class(ins_parameter)[0] for ins_parameter in self.loc_groups.get(group_name, ())}
+        for tmp_parameters in self.loc_subgroups.get(group_name, {}).values():
+            out_parameters.update(split_rarity_class(ins_parameter)[0] for ins_parameter in tmp_parameters)
+        return out_parameters
+
+    def compile_conditioned_index(self, group_name, influential_groups):
+        """
+        :param group_name: name of conditioned group
+        :param influential_groups: names of influential groups in order from config.txt
+        :return: ConditionedIndex of all conditioned groups of group
+        """
+
+        return ConditionedIndex(group_name, influential_groups,
+                                [self.clean_parameters(ins_group) for ins_group in influential_groups],
+                                self.subgroup_names(group_name))
+
+    def compile_rarity_lists(self, rarity_classes):
+        """
+        resolves rarity class of every parameter in every group against rarity classes from config.txt
+
+        :param rarity_classes: dictionary of rarity class names and their percentage
+        :return: dictionary of group names and their RarityList
+        """
+
+        return {ins_group: RarityList(ins_parameters, rarity_classes)
+                for ins_group, ins_parameters in self.loc_groups.items()}
+
+    def compile_subgroup_rarity_list(self, group_name, subgroup_name, rarity_classes):
+        """
+        :param group_name: name of group to which conditioned group belongs
+        :param subgroup_name: name of conditioned group
+        :param rarity_classes: dictionary of rarity class names and their percentage
+        :return: RarityList of conditioned group, parameter that is listed more than once is taken once
+        """
+
+        return RarityList(merge_rarity_lists([], self.subgroup(group_name, subgroup_name)), rarity_classes)
+
+
+def image_list_layout(position, size):
+    """
+    every list in database image is stored as rarity class id of every parameter, table of offsets of parameters
+    in string blob (aligned to 8 bytes) and string blob of parameters encoded in utf-8
+
+    :param position: position of list in image
+    :param size: number of parameters in list
+    :return: positions of offset table and string blob
+    """
+
+    tmp_offsets_position = (position + size + 7) & ~7
+    return tmp_offsets_position, tmp_offsets_position + 8 * (size + 1)
+
+
+def write_image_list(image_f, parameters, rarity_class_ids):
+    """
+    :param image_f: database image opened for writing, positioned at its end
+    :param parameters: parameters with rarity class at the end of them
+    :param rarity_class_ids: dictionary of rarity class strings and their id, new rarity classes are added to it
+    :return: position of list in image and number of its parameters
+    """
+
+    from array import array
+
+    tmp_position = image_f.tell()
+    tmp_offsets_position, tmp_blob_position = image_list_layout(tmp_position, len(parameters))
+
+    tmp_ids = bytearray()
+    tmp_offsets = array('Q', [0])
+    tmp_blob = bytearray()
+    for tmp_parameter in parameters:
+        tmp_rarity_class_str = split_rarity_class(tmp_parameter)[1]
+        tmp_ids.append(rarity_class_ids.setdefault(tmp_rarity_class_str, len(rarity_class_ids)))
+        tmp_blob += tmp_parameter.encode('utf-8')
+        tmp_offsets.append(len(tmp_blob))
+
+    image_f.write(tmp_ids)
+    image_f.write(bytes(tmp_offsets_position - tmp_position - len(tmp_ids)))
+    image_f.write(tmp_offsets.tobytes())
+    image_f.write(tmp_blob)
+    return [tmp_position, len(parameters)]
+
+
+def write_database_image(database, image_path, signature=()):
+    """
+    writes compiled database to on-disk image that MappedDatabase reads without loading it into memory,
+    image is written to temporary file first and replaces old image only when it is complete
+
+    :param database: CompiledDatabase
+    :param image_path: path to database image
+    :param signature: source signature of database, MappedDatabase is stale when it changes
+    :return: written database image
+    """
+
+    import json
+
+    tmp_rarity_class_ids = {'': 0}
+    tmp_directory = {'byteorder': sys.byteorder, 'signature': [list(ins_file) for ins_file in signature],
+                     'data_path': database.loc_data_path, 'legacy': database.loc_legacy,
+                     'groups': [], 'subgroups': {}}
+
+    with open(f'{image_path}.tmp', 'wb') as tmp_image_f:
+        tmp_image_f.write(global_image_magic + bytes(16))  # position and length of directory are written at the end
+
+        for tmp_group in database.group_names():
+            tmp_directory['groups'].append(
+                [tmp_group] + write_image_list(tmp_image_f, database.group(tmp_group), tmp_rarity_class_ids))
+            # conditioned groups are merged like conditioned groups of CompiledDatabase are when they are selected
+            tmp_directory['subgroups'][tmp_group] = [
+                [ins_subgroup] + write_image_list(tmp_image_f, merge_rarity_lists([], database.subgroup(
+                    tmp_group, ins_subgroup)), tmp_rarity_class_ids)
+                for ins_subgroup in database.subgroup_names(tmp_group)]
+
+        if len(tmp_rarity_class_ids) > 256:
+            raise ValueError('database has more than 256 different rarity classes, image can not be written')
+        tmp_directory['rarity_classes'] = list(tmp_rarity_class_ids)
+
+        tmp_directory_bytes = json.dumps(tmp_directory).encode('utf-8')
+        tmp_directory_position = tmp_image_f.tell()
+        tmp_image_f.write(tmp_directory_bytes)
+        tmp_image_f.seek(len(global_image_magic))
+        tmp_image_f.write(tmp_directory_position.to_bytes(8, 'little') +
+                          len(tmp_directory_bytes).to_bytes(8, 'little'))
+
+    os.replace(f'{image_path}.tmp', image_path)
+
+
+class MappedParameters:
+    """
+    parameters of one list in database image, read from memory mapped file one by one when they are needed
+    """
+
+    __slots__ = ('loc_image', 'loc_size', 'loc_rarity_class_ids', 'loc_offsets', 'loc_blob_position')
+
+    def __init__(self, image, position, size):
+        """
+        :param image: memory mapped database image
+        :param position: position of list in image
+        :param size: number of parameters in list
+        """
+
+        tmp_offsets_position, self.loc_blob_position = image_list_layout(position, size)
+        self.loc_image = image
+        self.loc_size = size
+        self.loc_rarity_class_ids = memoryview(image)[position:position + size]
+        self.loc_offsets = memoryview(image)[tmp_offsets_position:self.loc_blob_position].cast('Q')
+
+    def __len__(self):
+        return self.loc_size
+
+    def __getitem__(self, index):
+        """
+        :param index: index of parameter
+        :return: parameter with its rarity class, as it is written in database
+        """
+
+        if index < 0:
+            index += self.loc_size
+        if not 0 <= index < self.loc_size:
+            raise IndexError('parameter index out of range')
+        return str(self.loc_image[self.loc_blob_position + self.loc_offsets[index]:
+                                  self.loc_blob_position + self.loc_offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        return map(self.__getitem__, range(self.loc_size))
+
+    def chances(self, rarity_table):
+        """
+        :param rarity_table: bytes with chance of every rarity class id
+        :return: bytes with chance of every parameter, translated without reading any parameter
+        """
+
+        return self.loc_rarity_class_ids.tobytes().translate(rarity_table)
+
+
+class MappedDatabase(CompiledDatabase):
+    """
+    database image written by write_database_image, mapped into memory instead of being loaded
+    (groups and conditioned groups are read only when they are used and only parameters that are picked are decoded,
+    so resident memory does not grow with size of database)
+    """
+
+    def __init__(self, inp_image_path, stats=None):
+        """
+        :param inp_image_path: path to database image, raises ValueError if file is not database image
+        :param stats: GenerationStats that counts opened files, None turns counting off
+        """
+
+        import json
+        import mmap
+
+        self.loc_image_path = inp_image_path
+        with open(inp_image_path, 'rb') as tmp_image_f:
+            self.loc_image = mmap.mmap(tmp_image_f.fileno(), 0, access=mmap.ACCESS_READ)
+        if stats is not None:
+            stats.add('files_opened')
+
+        tmp_header = self.loc_image[:len(global_image_magic) + 16]
+        if tmp_header[:len(global_image_magic)] != global_image_magic or len(tmp_header) < len(global_image_magic) + 16:
+            raise ValueError(f'{inp_image_path} is not database image')
+        tmp_directory_position = int.from_bytes(tmp_header[-16:-8], 'little')
+        tmp_directory_size = int.from_bytes(tmp_header[-8:], 'little')
+        tmp_directory = json.loads(self.loc_image[tmp_directory_position:tmp_directory_position + tmp_directory_size])
+        if tmp_directory['byteorder'] != sys.byteorder:
+            raise ValueError(f'{inp_image_path} was written on machine with different byte order')
+
+        self.loc_data_path = tmp_directory['data_path']
+        self.loc_legacy = tmp_directory['legacy']
+        self.loc_signature = tuple(tuple(ins_file) for ins_file in tmp_directory['signature'])
+        self.loc_rarity_class_names = tmp_directory['rarity_classes']  # rarity class string of every id
+
+        self.loc_groups = {ins_group: MappedParameters(self.loc_image, ins_position, ins_size)
+                           for ins_group, ins_position, ins_size in tmp_directory['groups']}
+        self.loc_subgroups = {ins_group: {ins_subgroup: MappedParameters(self.loc_image, ins_position, ins_size)
+                                          for ins_subgroup, ins_position, ins_size in ins_subgroups}
+                              for ins_group, ins_subgroups in tmp_directory['subgroups'].items()}
+
+    def __getstate__(self):
+        return {'loc_image_path': self.loc_image_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['loc_image_path'])
+
+    def rarity_table(self, rarity_classes):
+        """
+        :param rarity_classes: dictionary of rarity class names and their percentage
+        :return: bytes with chance of every rarity class id in image
+        """
+
+        return bytes(resolve_rarity_class(ins_rarity_class_str, rarity_classes)
+                     for ins_rarity_class_str in self.loc_rarity_class_names).ljust(256, bytes([100]))
+
+    def compile_rarity_lists(self, rarity_classes):
+        tmp_rarity_table = self.rarity_table(rarity_classes)
+        return {ins_group: MappedRarityList(ins_parameters, ins_parameters.chances(tmp_rarity_table))
+                for ins_group, ins_parameters in self.loc_groups.items()}
+
+    def compile_subgroup_rarity_list(self, group_name, subgroup_name, rarity_classes):
+        tmp_parameters = self.subgroup(group_name, subgroup_name)
+        return MappedRarityList(tmp_parameters, tmp_parameters.chances(self.rarity_table(rarity_classes)))
+
+
+def parse_chance(line, chance_str):
+    """
+    :param line: line of config.txt, used for error message
+    :param chance_str: chance in percentage
+    :return: chance as integer from 0 to 100
+    """
+
+    if not chance_str.isdigit() or int(chance_str) > 100:
+        raise ValueError(f'config.txt: chance in {line} must be number from 0 to 100')
+    return int(chance_str)
+
+
+def order_conditioned_groups(conditions):
+    """
+    orders conditioned groups so that group which is influential for other conditioned group comes first,
+    groups keep order from config.txt where they do not depend on each other
+
+    :param conditions: list of conditioned groups and their influential groups
+    :return: ordered list of conditioned groups and their influential groups
+    """
+
+    tmp_remaining = {ins_group: ins_influential for ins_group, ins_influential in conditions}
+    if len(tmp_remaining) != len(conditions):
+        raise ValueError('config.txt: conditioned group is listed more than once')
+
+    out_conditions = []
+    while tmp_remaining:
+        for tmp_group, tmp_influential_groups in tmp_remaining.items():
+            if not any(ins_group in tmp_remaining for ins_group in tmp_influential_groups):
+                out_conditions.append([tmp_group, tmp_influential_groups])
+                del tmp_remaining[tmp_group]
+                break
+        else:
+            raise ValueError(f'config.txt: circular logic in conditioned groups {", ".join(tmp_remaining)}')
+    return out_conditions
+
+
+class CompiledConfig:
+    """
+    options from config.txt parsed and validated once
+    (sections are found by their name, conditioned groups are ordered so that every influential group is selected
+    before groups it influences, circular logic is rejected)
+    """
+
+    def __init__(self, inp_config, stats=None):
+        """
+        :param inp_config: string of config.txt
+        :param stats: GenerationStats that counts regex evaluations, None turns counting off
+        """
+
+        import re
+
+        tmp_config_groups = parse_legacy_database(inp_config, stats)[0]
+        tmp_sections = {}
+        for tmp_section in ('Rarity', 'OptionalGroup', 'MultipleGroup', 'ConditionedGroup'):
+            try:
+                tmp_lines = tmp_config_groups[tmp_section]
+            except KeyError:
+                raise ValueError(f'config.txt has no __{tmp_section}__ group')
+            tmp_sections[tmp_section] = [ins_line.strip() for ins_line in tmp_lines
+                                         if ins_line.strip() and ins_line.strip() != 'None']
+
+        self.loc_rarity_classes = {}  # {rarity class: chance}
+        for tmp_line in tmp_sections['Rarity']:
+            tmp_rarity_class = clean_special_groups(tmp_line, stats)
+            if stats is not None:
+                stats.add('regex_evaluations')
+            if len(tmp_rarity_class) != 2 or not re.fullmatch(r'\w{1,3}', tmp_rarity_class[0]):
+                raise ValueError(f'config.txt: invalid rarity class {tmp_line}')
+            self.loc_rarity_classes[tmp_rarity_class[0]] = parse_chance(tmp_line, tmp_rarity_class[1])
+
+        self.loc_optional_group_chances = []  # [[group, chance], ... ]
+        for tmp_line in tmp_sections['OptionalGroup']:
+            tmp_optional_group = clean_special_groups(tmp_line, stats)
+            if len(tmp_optional_group) != 2:
+                raise ValueError(f'config.txt: invalid optional group {tmp_line}')
+            self.loc_optional_group_chances.append([tmp_optional_group[0],
+                                                    parse_chance(tmp_line, tmp_optional_group[1])])
+
+        self.loc_multiple_group_ranges = []  # [[group, chance, min, max], ... ]
+        for tmp_line in tmp_sections['MultipleGroup']:
+            tmp_multiple_group = clean_special_groups(tmp_line, stats)
+            if stats is not None:
+                stats.add('regex_evaluations')
+            tmp_range = re.fullmatch(r'min(\d+)max(\d+)', tmp_multiple_group[2].lower()) \
+                if len(tmp_multiple_group) == 3 else None
+            if tmp_range is None or int(tmp_range.group(1)) > int(tmp_range.group(2)):
+                raise ValueError(f'config.txt: invalid multiple group {tmp_line}')
+            self.loc_multiple_group_ranges.append([tmp_multiple_group[0], parse_chance(tmp_line, tmp_multiple_group[1]),
+                                                   int(tmp_range.group(1)), int(tmp_range.group(2))])
+
+        tmp_conditions = []  # [[group, [influential_group, ... ]], ... ] in order from config.txt
+        for tmp_line in tmp_sections['ConditionedGroup']:
+            tmp_group_and_subgroups = clean_special_groups(tmp_line, stats)
+            if len(tmp_group_and_subgroups) < 2 or tmp_group_and_subgroups[0] in tmp_group_and_subgroups[1:]:
+                raise ValueError(f'config.txt: invalid conditioned group {tmp_line}')
+            tmp_conditions.append([tmp_group_and_subgroups[0], tmp_group_and_subgroups[1:]])
+
+        self.loc_conditioned_group_conditions = order_conditioned_groups(tmp_conditions)
+
+        # __Sampling__ group is optional, config.txt without it keeps choosing pools
+        self.loc_sampling = global_sampling_modes[0]
+        tmp_sampling = [ins_line.strip().lower() for ins_line in tmp_config_groups.get('Sampling', ())
+                        if ins_line.strip()]
+        if tmp_sampling:
+            if len(tmp_sampling) != 1 or tmp_sampling[0] not in global_sampling_modes:
+                raise ValueError(f'config.txt: sampling must be one of {", ".join(global_sampling_modes)}')
+            self.loc_sampling = tmp_sampling[0]
+
+
+class GenerationPlan:
+    """
+    config.txt and database compiled together, everything NPC generator needs before it generates first NPC
+    """
+
+    def __init__(self, config, database, stats=None):
+        """
+        :param config: CompiledConfig or string of config.txt
+        :param database: CompiledDatabase
+        :param stats: GenerationStats that counts regex evaluations of config.txt, None turns counting off
+        """
+
+        self.loc_config = config if type(config) == CompiledConfig else CompiledConfig(config, stats)
+        self.loc_database = database
+        # counters of opened files and regex evaluations of loading this plan, filled by load_generation_plan
+        self.loc_load_counters = {}
+
+        # every group from database is compiled with chances of its parameters only once
+        self.loc_rarity_lists = database.compile_rarity_lists(self.loc_config.loc_rarity_classes)
+
+        # existing conditioned groups are indexed once by parameters of influential groups
+        self.loc_conditioned_indexes = {
+            ins_group: database.compile_conditioned_index(ins_group, ins_influential_groups)
+            for ins_group, ins_influential_groups in self.loc_config.loc_conditioned_group_conditions}
+
+        self.loc_warnings = self.check_groups()
+
+    def check_groups(self):
+        """
+        :return: warnings for groups named in config.txt that database does not have, they do not stop generating
+        but are worth a look
+        """
+
+        out_warnings = []
+        tmp_config_groups = [ins_group[0] for ins_group in self.loc_config.loc_optional_group_chances] + \
+                            [ins_group[0] for ins_group in self.loc_config.loc_multiple_group_ranges]
+        for tmp_group, tmp_influential_groups in self.loc_config.loc_conditioned_group_conditions:
+            tmp_config_groups += [tmp_group] + tmp_influential_groups
+        for tmp_group in dict.fromkeys(tmp_config_groups):
+            if tmp_group not in self.loc_database.loc_groups:
+                out_warnings.append(f'group {tmp_group} from config.txt is not in database')
+        return out_warnings
+
+    def updated(self, database, changed_groups):
+        """
+        compiles new plan for database in which only some groups changed, everything compiled for other groups
+        is shared with this plan (this plan is not changed, so NPC-s that use it are not disturbed)
+
+        :param database: CompiledDatabase with changed groups
+        :param changed_groups: names of groups that changed or whose conditioned groups changed
+        :return: new GenerationPlan
+        """
+
+        import copy
+
+        out_plan = copy.copy(self)
+        out_plan.loc_database = database
+
+        out_plan.loc_rarity_lists = dict(self.loc_rarity_lists)
+        for tmp_group in changed_groups:
+            if tmp_group in database.loc_groups:
+                out_plan.loc_rarity_lists[tmp_group] = RarityList(database.group(tmp_group),
+                                                                  self.loc_config.loc_rarity_classes)
+            else:
+                out_plan.loc_rarity_lists.pop(tmp_group, None)
+
+        # index of conditioned group is compiled again if its conditioned groups or its influential groups changed
+        out_plan.loc_conditioned_indexes = dict(self.loc_conditioned_indexes)
+        for tmp_group, tmp_influential_groups in self.loc_config.loc_conditioned_group_conditions:
+            if tmp_group in changed_groups or not changed_groups.isdisjoint(tmp_influential_groups):
+                out_plan.loc_conditioned_indexes[tmp_group] = database.compile_conditioned_index(
+                    tmp_group, tmp_influential_groups)
+
+        out_plan.loc_warnings = out_plan.check_groups()
+        return out_plan
+
+    def __getstate__(self):
+        # plan of mapped database is compiled again from its image instead of pickling parameters it reads from image
+        if isinstance(self.loc_database, MappedDatabase):
+            return {'loc_config': self.loc_config, 'loc_database': self.loc_database}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if 'loc_rarity_lists' in state:
+            self.__dict__.update(state)
+        else:
+            self.__init__(state['loc_config'], state['loc_database'])
+
+
+def source_signature(config_path, database_path):
+    """
+    lists every source file of plan with its size and time of last change, without reading any of them
+
+    :param config_path: path to config.txt, None if only database is signed
+    :param database_path: path to database directory or legacy database file
+    :return: tuple of (path, size, modification time) for every file
+    """
+
+    out_signature = []
+    tmp_paths = [config_path] if config_path else []
+    if os.path.isdir(database_path):
+        for tmp_directory, tmp_subdirectories, tmp_filenames in os.walk(database_path):
+            tmp_subdirectories.sort()
+            tmp_paths += [os.path.join(tmp_directory, ins_filename) for ins_filename in sorted(tmp_filenames)]
+    else:
+        tmp_paths.append(f'{database_path}.txt' if not database_path.endswith('.txt') else database_path)
+
+    for tmp_path in tmp_paths:
+        try:
+            tmp_stat = os.stat(tmp_path)
+            out_signature.append((tmp_path, tmp_stat.st_size, tmp_stat.st_mtime_ns))
+        except FileNotFoundError:
+            out_signature.append((tmp_path, None, None))
+    return tuple(out_signature)
+
+
+def load_mapped_database(database_path=global_database_path, image_path=global_image_path, stats=None):
+    """
+    maps database image, image is written again first if any database file changed since it was written
+
+    :param database_path: path to database directory, if it is not found legacy '.txt' database is used
+    :param image_path: path to database image
+    :param stats: GenerationStats that counts opened files and regex evaluations, None turns counting off
+    :return: MappedDatabase
+    """
+
+    tmp_signature = source_signature(None, database_path)
+    try:
+        out_database = MappedDatabase(image_path, stats)
+        if out_database.loc_signature == tmp_signature:
+            return out_database
+    except (OSError, ValueError, KeyError):
+        pass  # missing, old or broken image is written again
+
+    write_database_image(CompiledDatabase(database_path, stats), image_path, tmp_signature)
+    return MappedDatabase(image_path, stats)
+
+
+def load_generation_plan(config_path=global_config_path, database_path=global_database_path,
+                         cache_path=global_cache_path, image_path=global_image_path):
+    """
+    loads compiled plan from cache if no source file changed since it was saved, otherwise compiles config.txt and
+    database and saves new plan to cache
+
+    :param config_path: path to config.txt
+    :param database_path: path to database directory, if it is not found legacy '.txt' database is used
+    :param cache_path: path to cache file, None turns cache off
+    :param image_path: path to database image, if it is given database is mapped from image and cache is not used
+    :return: GenerationPlan, opened files and regex evaluations of this call are kept in its loc_load_counters
+    """
+
+    import pickle
+
+    tmp_stats = GenerationStats()
+
+    class PlanUnpickler(pickle.Unpickler):
+        """
+        cache can be pickled by this file run as script ('__main__') or by scripts that import it ('main'), classes
+        of both are taken from this module so that plan never mixes classes of two copies of it
+        """
+
+        def find_class(self, module, name):
+            if module in ('main', '__main__') and name in globals():
+                return globals()[name]
+            return super().find_class(module, name)
+
+    if image_path:
+        out_plan = GenerationPlan(load_files(config_path, tmp_stats),
+                                  load_mapped_database(database_path, image_path, tmp_stats), tmp_stats)
+        out_plan.loc_load_counters = tmp_stats.report()['counters']
+        return out_plan
+
+    tmp_signature = source_signature(config_path, database_path)
+
+    if cache_path:
+        try:
+            with open(cache_path, 'rb') as tmp_cache_f:
+                tmp_stats.add('files_opened')
+                tmp_version, tmp_cached_signature, tmp_plan = PlanUnpickler(tmp_cache_f).load()
+            if tmp_version == global_cache_version and tmp_cached_signature == tmp_signature \
+                    and type(tmp_plan) is GenerationPlan:
+                tmp_plan.loc_load_counters = tmp_stats.report()['counters']
+                return tmp_plan
+        except (OSError, EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError):
+            pass  # missing, old or broken cache is compiled again
+
+    out_plan = GenerationPlan(load_files(config_path, tmp_stats), CompiledDatabase(database_path, tmp_stats), tmp_stats)
+
+    if cache_path:
+        try:
+            with open(f'{cache_path}.tmp', 'wb') as tmp_cache_f:
+                pickle.dump((global_cache_version, tmp_signature, out_plan), tmp_cache_f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f'{cache_path}.tmp', cache_path)
+        except OSError:
+            pass  # plan works without cache
+
+    # counters are kept only after plan is saved, so cached plan does not carry counters of compiling it
+    out_plan.loc_load_counters = tmp_stats.report()['counters']
+    return out_plan
+
+
+def database_group_names(database_path=global_database_path):
+    """
+    cheap index of groups, only names of files in database directory are listed and no file is read
+
+    :param database_path: path to database directory
+    :return: list of groups in same order as CompiledDatabase.group_names, None for legacy database
+    """
+
+    try:
+        return [ins_filename[:-4] for ins_filename in os.listdir(database_path) if ins_filename.endswith('.txt')]
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class DatabaseWatcher:
+    """
+    polls config.txt and database for files that were changed, added or removed
+    (only groups of changed files in database directory are compiled again, change of config.txt, legacy database
+    or database image compiles whole plan)
+    """
+
+    def __init__(self, plan, config_path=global_config_path, database_path=global_database_path,
+                 image_path=global_image_path):
+        """
+        :param plan: GenerationPlan that was compiled from current files
+        :param config_path: path to config.txt
+        :param database_path: path to database directory, if it is not found legacy '.txt' database is used
+        :param image_path: path to database image, None if database is in memory
+        """
+
+        self.loc_plan = plan
+        self.loc_config_path = config_path
+        self.loc_database_path = database_path
+        self.loc_image_path = image_path
+        self.loc_signature = self.read_signature()
+        self.loc_thread = None
+        self.loc_stop = None
+
+    def read_signature(self):
+        """
+        :return: dictionary of every source file and its size and time of last change
+        """
+
+        return {ins_path: (ins_size, ins_time) for ins_path, ins_size, ins_time in
+                source_signature(self.loc_config_path, self.loc_database_path)}
+
+    def poll(self):
+        """
+        checks files once and compiles new plan if any of them changed
+
+        :return: new GenerationPlan or None if nothing changed
+        """
+
+        tmp_signature = self.read_signature()
+        tmp_changed_paths = [ins_path for ins_path in tmp_signature.keys() | self.loc_signature.keys()
+                             if tmp_signature.get(ins_path) != self.loc_signature.get(ins_path)]
+        if not tmp_changed_paths:
+            return None
+
+        tmp_database = self.loc_plan.loc_database
+        if self.loc_config_path in tmp_changed_paths or tmp_database.loc_legacy or self.loc_image_path \
+                or not os.path.isdir(self.loc_database_path):
+            tmp_plan = load_generation_plan(self.loc_config_path, self.loc_database_path, None, self.loc_image_path)
+        else:
+            tmp_stats = GenerationStats()
+            tmp_database, tmp_changed_groups = tmp_database.updated(tmp_changed_paths, tmp_stats)
+            tmp_plan = self.loc_plan.updated(tmp_database, tmp_changed_groups)
+            tmp_plan.loc_load_counters = tmp_stats.report()['counters']
+
+        self.loc_signature = tmp_signature
+        self.loc_plan = tmp_plan
+        return tmp_plan
+
+    def start(self, on_reload, interval=1.0):
+        """
+        polls files in background thread until stop is called
+
+        :param on_reload: function called with every new GenerationPlan, from background thread
+        :param interval: seconds between two polls
+        :return: started thread
+        """
+
+        import threading
+
+        self.loc_stop = threading.Event()
+
+        def watch(stop):
+            while not stop.wait(interval):
+                try:
+                    tmp_plan = self.poll()
+                except (OSError, ValueError) as tmp_error:
+                    # file may be saved half way, it is read again on next poll
+                    print(f'\nwarning: database was not reloaded, {tmp_error}')
+                    continue
+                if tmp_plan is not None:
+                    on_reload(tmp_plan)
+
+        self.loc_thread = threading.Thread(target=watch, args=(self.loc_stop,), daemon=True)
+        self.loc_thread.start()
+
+    def stop(self):
+        """
+        :return: stopped background thread
+        """
+
+        if self.loc_thread is not None:
+            self.loc_stop.set()
+            self.loc_thread.join()
+            self.loc_thread = None
+
+
+class NonPlayableCharacterRecord:
+    """
+    groups and parameters of one NPC, every group has its own slot
+    (slot of group is found in group index that is computed once for all NPC-s of generator)
+    """
+
+    __slots__ = ('loc_group_index', 'loc_slots')
+
+    def __init__(self, group_index):
+        """
+        :param group_index: dictionary of group names and their slots in order in which groups are printed out
+        """
+
+        self.loc_group_index = group_index
+        self.loc_slots = [[''] for _ in range(len(group_index))]  # list of parameters, None if NPC has no group
+
+    def get(self, group_name):
+        """
+        :param group_name: name of group
+        :return: list of parameters of group, None if NPC does not have that group
+        """
+
+        try:
+            return self.loc_slots[self.loc_group_index[group_name]]
+        except KeyError:
+            return None
+
+    def set(self, group_name, parameters):
+        """
+        :param group_name: name of group
+        :param parameters: new list of parameters of group
+        :return: parameters stored in slot of group
+        """
+
+        self.loc_slots[self.loc_group_index[group_name]] = parameters
+
+    def remove(self, group_name):
+        """
+        :param group_name: name of group which NPC will not have
+        :return: emptied slot of group
+        """
+
+        try:
+            self.loc_slots[self.loc_group_index[group_name]] = None
+        except KeyError:
+            pass
+
+    def __iter__(self):
+        """
+        :return: groups and parameters in order of group index ([group, parameter, ...])
+        """
+
+        for tmp_group, tmp_slot in self.loc_group_index.items():
+            tmp_parameters = self.loc_slots[tmp_slot]
+            if tmp_parameters is not None:
+                yield [tmp_group, *tmp_parameters]
+
+    def to_list(self):
+        """
+        :return: list of groups and parameters of NPC ([[group, parameter, ...], ... ])
+        """
+
+        return list(self)
+
+    def fingerprint(self):
+        """
+        :return: tuple of (group, sorted parameters) of every group NPC has, same for NPC-s that differ only in order
+        of parameters (tuple itself is kept, so fingerprints are equal only for equal NPC-s and stay same between
+        processes)
+        """
+
+        return tuple((ins_group, tuple(sorted(self.loc_slots[ins_slot])))
+                     for ins_group, ins_slot in self.loc_group_index.items() if self.loc_slots[ins_slot] is not None)
+
+
+class NonPlayableCharacterBatch:
+    """
+    batch of NPC-s stored by columns, one column for every group
+    (cell is tuple of parameters of one NPC or None if NPC does not have that group)
+    """
+
+    __slots__ = ('loc_groups', 'loc_columns', 'loc_length')
+
+    def __init__(self, groups=()):
+        """
+        :param groups: names of groups in order in which they are printed out
+        """
+
+        self.loc_groups = list(groups)
+        self.loc_columns = {ins_group: [] for ins_group in self.loc_groups}
+        self.loc_length = 0
+
+    def append(self, npc_data):
+        """
+        :param npc_data: NonPlayableCharacterRecord or list of groups and parameters of NPC
+        ([[group, parameter, ...], ... ])
+        :return: NPC stored in columns
+        """
+
+        if type(npc_data) == NonPlayableCharacterRecord:
+            self.append_record(npc_data)
+            return
+
+        for tmp_group in npc_data:
+            try:
+                self.loc_columns[tmp_group[0]].append(tuple(tmp_group[1:]))
+            except KeyError:  # group that was not in batch before (forced group)
+                self.loc_groups.append(tmp_group[0])
+                self.loc_columns[tmp_group[0]] = [None] * self.loc_length + [tuple(tmp_group[1:])]
+
+        self.loc_length += 1
+        # groups which NPC does not have (optional groups)
+        for tmp_column in self.loc_columns.values():
+            if len(tmp_column) < self.loc_length:
+                tmp_column.append(None)
+
+    def append_record(self, record):
+        """
+        stores NPC without building lists of it, columns are taken directly from slots of record
+
+        :param record: NonPlayableCharacterRecord
+        :return: NPC stored in columns
+        """
+
+        for tmp_group, tmp_slot in record.loc_group_index.items():
+            tmp_parameters = record.loc_slots[tmp_slot]
+            try:
+                tmp_column = self.loc_columns[tmp_group]
+            except KeyError:  # group that was not in batch before (forced group)
+                self.loc_groups.append(tmp_group)
+                tmp_column = self.loc_columns[tmp_group] = [None] * self.loc_length
+            tmp_column.append(None if tmp_parameters is None else tuple(tmp_parameters))
+
+        self.loc_length += 1
+        # groups which generator of record does not know
+        if len(self.loc_columns) > len(record.loc_group_index):
+            for tmp_column in self.loc_columns.values():
+                if len(tmp_column) < self.loc_length:
+                    tmp_column.append(None)
+
+    def extend(self, batch):
+        """
+        :param batch: NonPlayableCharacterBatch which NPC-s are added at the end of this batch
+        :return: NPC-s of batch stored in columns
+        """
+
+        for tmp_group in batch.loc_groups:
+            if tmp_group not in self.loc_columns:
+                self.loc_groups.append(tmp_group)
+                self.loc_columns[tmp_group] = [None] * self.loc_length
+
+        for tmp_group in self.loc_groups:
+            try:
+                self.loc_columns[tmp_group].extend(batch.loc_columns[tmp_group])
+            except KeyError:
+                self.loc_columns[tmp_group].extend([None] * len(batch))
+
+        self.loc_length += len(batch)
+
+    def column(self, group_name):
+        """
+        :param group_name: name of group
+        :return: list of parameter tuples of every NPC for that group
+        """
+
+        return self.loc_columns[group_name]
+
+    def __len__(self):
+        return self.loc_length
+
+    def __getitem__(self, index):
+        """
+        :param index: index of NPC in batch
+        :return: NPC in same form as NonPlayableCharacter.__call__ returns it
+        """
+
+        if index < 0:
+            index += self.loc_length
+        if not 0 <= index < self.loc_length:
+            raise IndexError('NPC index out of range')
+
+        return [[ins_group, *self.loc_columns[ins_group][index]] for ins_group in self.loc_groups
+                if self.loc_columns[ins_group][index] is not None]
+
+    def __iter__(self):
+        for tmp_index in range(self.loc_length):
+            yield self[tmp_index]
+
+
+def apportion(weights, n, rng=None):
+    """
+    splits n into whole numbers proportional to weights by largest remainder method
+    (every part gets whole part of its quota, parts with largest remainders get one more, ties go to earlier part)
+
+    :param weights: list of non negative weights, counts or ratios
+    :param n: number that is split
+    :param rng: RandomSource, if given parts that get one more are drawn with probability of their remainder
+    (systematic sampling), so every part gets its quota in expectation even when n is small
+    :return: list of whole numbers that sum to n, raises ValueError if weights are negative or all zero
+    """
+
+    tmp_total = sum(weights)
+    if tmp_total <= 0 or any(ins_weight < 0 for ins_weight in weights):
+        raise ValueError(f'weights {weights} must be non negative and not all zero')
+
+    tmp_quotas = [ins_weight * n / tmp_total for ins_weight in weights]
+    out_counts = [int(ins_quota) for ins_quota in tmp_quotas]
+    tmp_left = n - sum(out_counts)
+    if rng is not None and tmp_left:
+        # points at equal steps of one from random start, every remainder is shorter than one step
+        tmp_point = rng.below(2 ** 32) / 2 ** 32
+        tmp_cumulative = 0.0
+        for tmp_index, tmp_quota in enumerate(tmp_quotas):
+            tmp_cumulative += tmp_quota - out_counts[tmp_index]
+            while tmp_left and tmp_point < tmp_cumulative:
+                out_counts[tmp_index] += 1
+                tmp_left -= 1
+                tmp_point += 1
+        if tmp_left:
+            # rounding error of floats can leave last point past the end, it goes to the largest remainder
+            out_counts[max(range(len(weights)), key=lambda ins_index: tmp_quotas[ins_index] % 1)] += tmp_left
+        return out_counts
+
+    tmp_by_remainder = sorted(range(len(weights)), key=lambda ins_index: out_counts[ins_index] - tmp_quotas[ins_index])
+    for tmp_index in tmp_by_remainder[:tmp_left]:
+        out_counts[tmp_index] += 1
+    return out_counts
+
+
+def constrained_strata(n, targets, rng=None):
+    """
+    splits population into strata, one for every combination of target parameters of all target groups
+    (counts of every group are split exactly by apportion, then parameters of every group are listed in random order
+    and paired with parameters of first group, so every group has its exact target mix and groups are independent
+    of each other in expectation)
+
+    :param n: number of NPC-s, None takes sum of weights, weights must then be counts with same sum for every group
+    :param targets: {group: {parameter: count or ratio}}, parameter None means NPC does not have optional group
+    :param rng: RandomSource that pairs parameters of groups, None uses new unseeded one
+    :return: list of (forced parameters, {group: present}, number of NPC-s) of every non empty stratum
+    """
+
+    import collections
+
+    tmp_groups = list(targets.items())
+    if not tmp_groups or not all(ins_parameters for _, ins_parameters in tmp_groups):
+        raise ValueError('every target group needs at least one parameter')
+    for tmp_group, tmp_parameters in tmp_groups:
+        if sum(tmp_parameters.values()) <= 0 or any(ins_weight < 0 for ins_weight in tmp_parameters.values()):
+            raise ValueError(f'weights of target group {tmp_group} must be non negative and not all zero')
+
+    if n is None:
+        tmp_totals = {sum(ins_parameters.values()) for _, ins_parameters in tmp_groups}
+        if len(tmp_totals) != 1 or any(type(ins_weight) != int for _, ins_parameters in tmp_groups
+                                       for ins_weight in ins_parameters.values()):
+            raise ValueError('without n targets must be counts with the same sum for every group')
+        n = tmp_totals.pop()
+    if len(tmp_groups) > 1 and rng is None:
+        rng = RandomSource()
+
+    # parameter of every NPC for every group, groups after first one in random order
+    tmp_columns = []
+    for tmp_group, tmp_parameters in tmp_groups:
+        tmp_column = [ins_parameter for ins_parameter, ins_count
+                      in zip(tmp_parameters, apportion(list(tmp_parameters.values()), n)) for _ in range(ins_count)]
+        if tmp_columns:
+            tmp_column = [tmp_column[ins_index] for ins_index in rng.shuffled(n)]
+        tmp_columns.append(tmp_column)
+
+    out_strata = []
+    for tmp_cell, tmp_count in collections.Counter(zip(*tmp_columns)).items():
+        tmp_force = [[ins_group, ins_parameter] for (ins_group, _), ins_parameter in zip(tmp_groups, tmp_cell)
+                     if ins_parameter is not None]
+        tmp_presence = {ins_group: ins_parameter is not None
+                        for (ins_group, _), ins_parameter in zip(tmp_groups, tmp_cell)}
+        out_strata.append((tmp_force, tmp_presence, tmp_count))
+    return out_strata
+
+
+class NonPlayableCharacter:
+
+    def __init__(self, plan=None, seed=None, pool_cache_size=global_pool_cache_size):
+        """
+        :param plan: GenerationPlan of config.txt and database, default is Plan
+        :param seed: None, int or str seed, random.Random or numpy Generator used for every random draw
+        :param pool_cache_size: number of choosing pools of conditioned groups kept in cache, 0 turns cache off
+        """
+
+        # defining local variables
+        self.loc_random = RandomSource(seed)  # source of all random numbers of this generator
+        self.loc_pool_cache = ConditionedPoolCache(pool_cache_size)
+        self.loc_stats = None  # GenerationStats, None if statistics are not counted (see enable_stats)
+        self.loc_presence = {}  # {optional group: True or False}, pins presence of group (see iter_constrained)
+        self.loc_capacities = {}  # {(force, presence, limit): number of different NPC-s}, see capacity
+        self.use_plan(Plan if plan is None else plan)
+
+    def use_plan(self, plan):
+        """
+        takes everything generator needs from plan
+
+        :param plan: GenerationPlan of config.txt and database
+        :return: generator that generates NPC-s from plan
+        """
+
+        self.loc_plan = plan
+        self.loc_next_plan = plan  # plan that is taken before next NPC, see set_plan
+        self.loc_database = self.loc_plan.loc_database
+        self.loc_all_groups_list = self.loc_database.group_names()
+        self.loc_group_index = {ins_group: ins_slot for ins_slot, ins_group in enumerate(self.loc_all_groups_list)}
+
+        # options from config.txt, parsed only once by CompiledConfig
+        # _______________________________________
+        self.loc_optional_group_chances = self.loc_plan.loc_config.loc_optional_group_chances
+        self.loc_multiple_group_ranges = self.loc_plan.loc_config.loc_multiple_group_ranges
+        self.loc_conditioned_group_conditions = self.loc_plan.loc_config.loc_conditioned_group_conditions
+        self.loc_conditioned_indexes = self.loc_plan.loc_conditioned_indexes
+        self.loc_weighted = self.loc_plan.loc_config.loc_sampling == 'weighted'
+
+        self.loc_all_rarity_classes = {}
+        self.loc_rarity_lists = {}
+        self.rarity_classes(list_rarity_classes=True)
+
+        self.loc_pool_cache.clear()  # pools of old plan are not valid for new one
+        self.loc_capacities.clear()
+
+    def set_plan(self, plan):
+        """
+        swaps plan of generator, safe to call from other thread while NPC is generated
+        (new plan is taken only when next NPC starts, so NPC that is being generated is finished with old plan)
+
+        :param plan: GenerationPlan of config.txt and database
+        :return: plan that will be used from next NPC on
+        """
+
+        self.loc_next_plan = plan
+
+    def enable_stats(self, stats=None):
+        """
+        starts counting time and calls of every stage of generation, random draws and probes of conditioned groups
+        (opened files and regex evaluations are counted while plan is loaded, stats reports them from plan)
+        (stages are replaced by timed ones only on this generator, so generator without statistics runs
+        unchanged code)
+
+        :param stats: GenerationStats to count into, new one if None
+        :return: GenerationStats that is counted into
+        """
+
+        self.disable_stats()
+        self.loc_stats = GenerationStats() if stats is None else stats
+
+        # timed stages are instance attributes, they hide methods of class until disable_stats removes them
+        for tmp_stage, tmp_method in (('npc', 'generate_record'), ('optional', 'optional_groups'),
+                                      ('multiple', 'multiple_groups'), ('conditioned', 'conditioned_groups'),
+                                      ('select', 'select_parameter_for_groups')):
+            setattr(self, tmp_method, self.loc_stats.timed(tmp_stage, getattr(self, tmp_method)))
+        self.loc_random = ProfiledRandomSource(self.loc_random, self.loc_stats)
+
+        return self.loc_stats
+
+    def disable_stats(self):
+        """
+        :return: statistics are not counted any more, random numbers continue where they stopped
+        """
+
+        if self.loc_stats is None:
+            return
+        self.loc_stats = None
+
+        for tmp_method in ('generate_record', 'optional_groups', 'multiple_groups', 'conditioned_groups',
+                           'select_parameter_for_groups'):
+            self.__dict__.pop(tmp_method, None)
+        self.loc_random = RandomSource(self.loc_random.loc_generator).take_over(self.loc_random)
+
+    def stats(self):
+        """
+        :return: dictionary with stages and counters of GenerationStats, counters of loading current plan and pool
+        cache statistics, None if statistics are not counted
+        (conditioned stage includes select stage of conditioned groups and npc stage includes all other stages)
+        """
+
+        if self.loc_stats is None:
+            return None
+        out_report = self.loc_stats.report()
+        out_report['load'] = dict(self.loc_plan.loc_load_counters)
+        out_report['pool_cache'] = self.loc_pool_cache.stats()
+        return out_report
+
+    # functions used for options inside of config.txt file
+    # _______________________________________
+    def rarity_classes(self, list_rarity_classes=False, get_rarity_corrected_list=False, group=None):
+        """
+        learns rarity classes from config.txt with percentage given for them
+        modifies given group or list in accordance to parameter rarity class for each parameter
+
+        :param list_rarity_classes: if True learns rarity classes from plan
+        :param get_rarity_corrected_list: if True modifies parameter list
+        :param group: name of group or list for witch parameters are modified
+        :return: list of parameters modified in accordance to their rarity class with
+        """
+
+        if list_rarity_classes:
+            # all rarity classes with their percentage of occurring and all groups compiled with chances of their
+            # parameters are taken from plan
+            self.loc_all_rarity_classes = self.loc_plan.loc_config.loc_rarity_classes
+            self.loc_rarity_lists = self.loc_plan.loc_rarity_lists
+
+        if get_rarity_corrected_list:
+
+            # check if input was database group or regular list
+            if type(group) == str:
+                try:
+                    tmp_rarity_list = self.loc_rarity_lists[group]
+                except KeyError:
+                    return []
+            else:
+                tmp_rarity_list = RarityList(group, self.loc_all_rarity_classes)
+
+            # for every parameter in group check its rarity class and base on its chance to occur in active list,
+            # form active lis of parameters
+            tmp_all_active_parameters = tmp_rarity_list.draw(self.loc_random)
+
+            return tmp_all_active_parameters
+
+    def optional_groups(self):
+        """
+        check for optional groups and subtract unlucky ones from total parameter list
+
+        :return: list of groups from witch are excluded unlucky groups
+        """
+
+        # input {group: [''], group_2: [''], group_3: [''], ... }
+        # output {group: [''], group_3: [''], ... }
+
+        for tmp_optional_group in self.loc_optional_group_chances:
+            # input ['Fear', 80]
+
+            tmp_optional_group_chance = self.loc_random.percent()
+            tmp_present = self.loc_presence.get(tmp_optional_group[0])
+            if tmp_present is None:
+                tmp_present = tmp_optional_group[1] > tmp_optional_group_chance
+
+            # remove group from loc_npc_record if tmp_optional_group_chance
+            # is less then chance specified in config.txt
+            if not tmp_present:
+                self.loc_npc_record.remove(tmp_optional_group[0])
+                self.loc_all_active_groups.pop(tmp_optional_group[0], None)
+
+    def multiple_groups(self):
+        """
+        check for groups that have multiple parameters than adds parameters in accordance to config file
+
+        :return: added empty parameters to groups that deserve them
+        """
+
+        # input {group: [''], group_2: [''], group_3: [''], ... }
+        # output {group: ['', ''], group_2: ['', '', ''], group_3: [''], ... }
+
+        for tmp_multiple_group in self.loc_multiple_group_ranges:
+            # input ['Race', 20, 1, 2]
+
+            # count how many times will that parameter appear
+            tmp_parameter_counter = tmp_multiple_group[2]
+
+            tmp_optional_group_chance = self.loc_random.percent()
+            tmp_counter = 0
+            while (tmp_counter < (tmp_multiple_group[3] - tmp_multiple_group[2])) \
+                    and (tmp_multiple_group[1] >= tmp_optional_group_chance):
+                tmp_parameter_counter += 1
+                tmp_counter += 1
+                tmp_optional_group_chance = self.loc_random.percent()
+
+            # if group is in group set than exchange its amount of parameters with new set
+            if self.loc_npc_record.get(tmp_multiple_group[0]) is not None:
+                self.loc_npc_record.set(tmp_multiple_group[0], [''] * tmp_parameter_counter)
+
+    def conditioned_groups(self, list_conditioned_groups=False, select_conditioned_parameters=False):
+        """
+        checks for conditioned groups and removes tam from normal set of groups then after
+        all unconditioned groups are selected, checks if any of possible conditioned groups exists
+        if so adds them to choosing pool
+
+        :param list_conditioned_groups: if True removes conditioned group from normal set of groups
+        :param select_conditioned_parameters: if True selects parameters from any existing conditioned group
+        :return: list of all groups that are not conditioned and selects parameters for conditioned groups
+        """
+
+        for tmp_active_group, tmp_active_subgroups in self.loc_conditioned_group_conditions:
+            # input ['Name', ['Sex', 'Race']]
+
+            if list_conditioned_groups:
+                self.loc_all_active_groups.pop(tmp_active_group, None)
+
+            if select_conditioned_parameters:
+
+                # parameters of influential groups, None if NPC does not have that group
+                tmp_subgroup_parameters_list = [self.loc_npc_record.get(ins_subgroup)
+                                                for ins_subgroup in tmp_active_subgroups]
+
+                # NPC-s with same parameters of influential groups have same choosing pool, it is compiled once
+                tmp_pool_key = (tmp_active_group, tuple(None if ins_parameters is None else tuple(ins_parameters)
+                                                        for ins_parameters in tmp_subgroup_parameters_list))
+                tmp_rarity_list = self.loc_pool_cache.get(tmp_pool_key)
+                if tmp_rarity_list is None:
+                    tmp_rarity_list = self.conditioned_pool(tmp_active_group, tmp_subgroup_parameters_list)
+                    self.loc_pool_cache.put(tmp_pool_key, tmp_rarity_list)
+
+                # print(tmp_rarity_list)
+                self.select_parameter_for_groups([tmp_active_group], tmp_rarity_list)
+
+    def conditioned_subgroups(self, group, influential_parameters):
+        """
+        :param group: name of conditioned group
+        :param influential_parameters: list of parameters of every influential group, None if NPC does not have it
+        :return: tuple of the most specific non empty conditioned groups for parameters of influential groups
+        """
+
+        out_subgroups = []
+        tmp_specificy = None
+        tmp_probes = 0
+
+        # conditioned groups from the most specific to the least, all equally specific ones are merged
+        for tmp_subgroup_specificy, tmp_subgroup in self.loc_conditioned_indexes[group].resolve(influential_parameters):
+            if tmp_specificy != tmp_subgroup_specificy:
+                if out_subgroups:
+                    break
+                tmp_specificy = tmp_subgroup_specificy
+
+            tmp_probes += 1
+            if len(self.loc_database.subgroup(group, tmp_subgroup)):
+                out_subgroups.append(tmp_subgroup)
+
+        if self.loc_stats is not None:
+            self.loc_stats.add('subgroup_probes', tmp_probes)
+            self.loc_stats.add('subgroup_misses', tmp_probes - len(out_subgroups))  # empty conditioned groups
+            if not out_subgroups:
+                self.loc_stats.add('subgroup_fallbacks')  # whole group is used
+        return tuple(out_subgroups)
+
+    def conditioned_pool(self, group, influential_parameters, subgroups=None):
+        """
+        finds the most specific conditioned groups for parameters of influential groups and compiles their
+        choosing pool
+
+        :param group: name of conditioned group
+        :param influential_parameters: list of parameters of every influential group, None if NPC does not have it
+        :param subgroups: conditioned groups if they were already found with conditioned_subgroups
+        :return: RarityList of merged conditioned groups, RarityList of group if no conditioned group was found
+        """
+
+        tmp_subgroups = self.conditioned_subgroups(group, influential_parameters) if subgroups is None else subgroups
+
+        # single conditioned group is used as it is, only more of them have to be merged
+        if len(tmp_subgroups) == 1:
+            return self.loc_database.compile_subgroup_rarity_list(group, tmp_subgroups[0], self.loc_all_rarity_classes)
+
+        if tmp_subgroups:
+            tmp_all_active_parameters = []
+            for tmp_subgroup in tmp_subgroups:
+                tmp_all_active_parameters = merge_rarity_lists(tmp_all_active_parameters,
+                                                               self.loc_database.subgroup(group, tmp_subgroup))
+            return RarityList(tmp_all_active_parameters, self.loc_all_rarity_classes)
+
+        # if no subgroup was found
+        # _______________________________________
+        return self.loc_rarity_lists.get(group, RarityList((), {}))
+
+    # _______________________________________
+
+    def select_parameter_for_groups(self, active_groups=None, active_parameters=None):
+        """
+        used to select parameter for group
+
+        :param active_groups: either single group name or list of groups
+        :param active_parameters: either reads from database, list of parameters or RarityList
+        :return: list of groups with selected parameter
+        """
+
+        # default active_groups are ones which characteristics are not change with other functions
+        if active_groups is None:
+            active_groups = self.loc_all_active_groups
+
+        for tmp_group in active_groups:
+
+            tmp_group_parameters = self.loc_npc_record.get(tmp_group)
+            if tmp_group_parameters is None:  # group was removed as optional group
+                continue
+
+            # default active_parameters are ones for active_group
+            if active_parameters is None or isinstance(active_parameters, RarityList):
+                tmp_rarity_list = active_parameters
+            else:
+                tmp_rarity_list = RarityList(active_parameters, self.loc_all_rarity_classes)
+            if tmp_rarity_list is None:
+                tmp_rarity_list = self.loc_rarity_lists.get(tmp_group, RarityList((), {}))
+
+            # every empty string is place for one parameter, no single parameter will occur more than once,
+            # if there are more places than parameters all parameters are taken
+            tmp_empty_indexes = [ins_index for ins_index, ins_parameter in enumerate(tmp_group_parameters)
+                                 if ins_parameter == '']
+            if self.loc_weighted:
+                tmp_selected_parameters = tmp_rarity_list.select_weighted(self.loc_random, len(tmp_empty_indexes))
+            else:
+                tmp_selected_parameters = tmp_rarity_list.select(self.loc_random, len(tmp_empty_indexes))
+
+            for tmp_empty_index, tmp_parameter in zip(tmp_empty_indexes, tmp_selected_parameters):
+                tmp_group_parameters[tmp_empty_index] = tmp_parameter
+
+            if len(tmp_selected_parameters) < len(tmp_empty_indexes):
+                self.loc_npc_record.set(tmp_group, [ins_parameter for ins_parameter in tmp_group_parameters
+                                                    if ins_parameter != ''])
+
+    def __call__(self, force=[]):
+        """
+        generates new NPC
+
+        :param force: list of forced groups and parameters ([[group, parameter, ...], ... ])
+        :return: list of groups and parameters of NPC ([[group, parameter, ...], ... ])
+        """
+
+        return self.generate_record(force).to_list()
+
+    def generate_record(self, force=()):
+        """
+        generates new NPC as NonPlayableCharacterRecord
+
+        :param force: list of forced groups and parameters ([[group, parameter, ...], ... ])
+        :return: NonPlayableCharacterRecord of NPC
+        """
+
+        # plan that was swapped by set_plan is taken between two NPC-s
+        tmp_next_plan = self.loc_next_plan
+        if tmp_next_plan is not self.loc_plan:
+            self.use_plan(tmp_next_plan)
+
+        # check force and manipulate local groups
+        if force:
+            for tmp_force in force:
+                tmp_force_group = tmp_force[0]
+                # add forced group to all groups if not in
+                if tmp_force_group not in self.loc_group_index:
+                    self.loc_all_groups_list.append(tmp_force_group)
+                    self.loc_group_index = {ins_group: ins_slot
+                                            for ins_slot, ins_group in enumerate(self.loc_all_groups_list)}
+
+        # resetting non playable character specific lists every time it is called
+        self.loc_all_active_groups = dict.fromkeys(self.loc_all_groups_list)  # groups witch selection of parameters
+        # is not conditioned by document config.txt
+        self.loc_npc_record = NonPlayableCharacterRecord(self.loc_group_index)  # all groups and their parameters
+        # {group: [''], group_2: [''], group_3: [''], ... }
+
+        self.optional_groups()
+        self.multiple_groups()
+        self.conditioned_groups(list_conditioned_groups=True)
+
+        # Insert forced parameters
+        if force:
+            for tmp_force2 in force:
+                tmp_force_group2 = [tmp_force2[0]]
+                tmp_force_parameter2 = tmp_force2[1:]
+                self.select_parameter_for_groups(active_groups=tmp_force_group2, active_parameters=tmp_force_parameter2)
+
+        self.select_parameter_for_groups()
+
+        self.conditioned_groups(select_conditioned_parameters=True)
+
+        return self.loc_npc_record
+
+    def capacity(self, force=None, presence=None, limit=100000):
+        """
+        counts how many different NPC-s config and database can make, every group can have any set of parameters
+        that have chance above 0 in its choosing pool and that fits into its multiple range
+        (groups are visited in same order as NPC is generated and every outcome of influential groups is followed,
+        so conditioned group counts only parameters of conditioned groups that outcome resolves to and whole group
+        only for outcomes that resolve to none; result is upper bound because rarity classes can make some sets of
+        parameters impossible)
+
+        :param force: forced parameters used for every NPC, same as for __call__
+        :param presence: {optional group: True or False} pinned presence of optional groups, same as loc_presence
+        :param limit: the largest number of followed outcomes of influential groups, if it is exceeded conditioned
+        groups count parameters of whole group and of all its conditioned groups for every outcome
+        :return: upper bound of number of different NPC-s, counted once for every force and presence of plan
+        """
+
+        import math
+
+        tmp_key = (tuple(tuple(ins_force) for ins_force in force or ()), tuple(sorted((presence or {}).items())), limit)
+        if tmp_key in self.loc_capacities:
+            return self.loc_capacities[tmp_key]
+
+        tmp_presence = presence or {}
+        tmp_forced = {}
+        for tmp_force in force or []:
+            tmp_forced.setdefault(tmp_force[0], tmp_force[1:])  # only first force of group is used
+        tmp_ranges = {ins_group: (ins_min, ins_max)
+                      for ins_group, _, ins_min, ins_max in self.loc_multiple_group_ranges}
+        tmp_optional_groups = {ins_group for ins_group, _ in self.loc_optional_group_chances}
+        tmp_conditions = {ins_group: ins_influential_groups for ins_group, ins_influential_groups
+                          in self.loc_conditioned_group_conditions if ins_group not in tmp_forced}
+
+        # conditioned groups after all other groups, in order in which they are selected
+        tmp_order = [ins_group for ins_group in dict.fromkeys(self.loc_all_groups_list + list(tmp_forced))
+                     if ins_group not in tmp_conditions] + list(tmp_conditions)
+        tmp_order = [ins_group for ins_group in tmp_order if tmp_presence.get(ins_group) is not False]
+        tmp_reachable = {}  # {(group, conditioned groups): (parameters, min, max, NPC can miss group)}
+        tmp_subgroup_chances = {}  # {(group, conditioned group): {parameter: chance}}
+
+        def rarity_chances(rarity_list):
+            """
+            :param rarity_list: RarityList
+            :return: dictionary of parameters and their chances, parameter listed more than once takes its largest
+            chance
+            """
+
+            out_chances = {}
+            for tmp_index, tmp_chance in enumerate(rarity_list.loc_chances):
+                tmp_parameter = rarity_list.parameter(tmp_index)
+                out_chances[tmp_parameter] = max(out_chances.get(tmp_parameter, 0), tmp_chance)
+            return out_chances
+
+        def subgroup_chances(group, subgroup):
+            """
+            :param group: name of group
+            :param subgroup: name of conditioned group
+            :return: dictionary of parameters of conditioned group and their chances, compiled once
+            """
+
+            try:
+                return tmp_subgroup_chances[(group, subgroup)]
+            except KeyError:
+                out_chances = tmp_subgroup_chances[(group, subgroup)] = rarity_chances(
+                    self.loc_database.compile_subgroup_rarity_list(group, subgroup, self.loc_all_rarity_classes))
+                return out_chances
+
+        def reachable(group, outcomes, follow):
+            """
+            :param group: name of group
+            :param outcomes: {influential group: tuple of its parameters or None}
+            :param follow: if False conditioned group takes parameters of whole group and all its conditioned groups
+            :return: parameters with chance above 0, smallest and largest number of them NPC can have and True if NPC
+            can miss group
+            """
+
+            if group in tmp_conditions and follow:
+                tmp_key = (group, self.conditioned_subgroups(group, [
+                    None if outcomes.get(ins_group) is None else list(outcomes[ins_group])
+                    for ins_group in tmp_conditions[group]]))
+            else:
+                tmp_key = (group, None)
+            if tmp_key in tmp_reachable:
+                return tmp_reachable[tmp_key]
+
+            if group in tmp_forced:
+                tmp_chances = [rarity_chances(RarityList(tmp_forced[group], self.loc_all_rarity_classes))]
+            elif tmp_key[1]:
+                # same parameters as merged choosing pool of conditioned_pool, later conditioned group decides chance
+                tmp_merged_chances = {}
+                for tmp_subgroup in tmp_key[1]:
+                    tmp_merged_chances.update(subgroup_chances(group, tmp_subgroup))
+                tmp_chances = [tmp_merged_chances]
+            else:
+                tmp_chances = [rarity_chances(self.loc_rarity_lists.get(group, RarityList((), {})))]
+                if group in tmp_conditions and tmp_key[1] is None:
+                    tmp_chances += [subgroup_chances(group, ins_subgroup)
+                                    for ins_subgroup in self.loc_database.subgroup_names(group)]
+
+            tmp_parameters = sorted({ins_parameter for ins_chances in tmp_chances
+                                     for ins_parameter, ins_chance in ins_chances.items() if ins_chance})
+            # group gets fewer parameters than its range only if some parameter can be left out of choosing pool
+            tmp_certain = self.loc_weighted or all(ins_chance in (0, 100) for ins_chances in tmp_chances
+                                                   for ins_chance in ins_chances.values())
+            tmp_min, tmp_max = tmp_ranges.get(group, (1, 1))
+            tmp_max = min(tmp_max, len(tmp_parameters))
+            tmp_min = min(tmp_min, tmp_max) if tmp_certain else 0
+            out_reachable = tmp_reachable[tmp_key] = (tmp_parameters, tmp_min, tmp_max, group in tmp_optional_groups
+                                                      and tmp_presence.get(group) is not True)
+            return out_reachable
+
+        def count(follow):
+            """
+            :param follow: if True outcomes of influential groups are followed
+            :return: number of different NPC-s, None if followed outcomes would exceed limit
+            """
+
+            tmp_tracked = []  # influential groups that have their outcome in every state
+            tmp_states = {(): 1}  # {outcomes of tracked groups: number of different NPC-s with them}
+            for tmp_position, tmp_group in enumerate(tmp_order):
+                tmp_later_influential = set().union(*(tmp_conditions.get(ins_group, ())
+                                                      for ins_group in tmp_order[tmp_position + 1:])) if follow else ()
+                tmp_new_states = {}
+                for tmp_state, tmp_count in tmp_states.items():
+                    tmp_parameters, tmp_min, tmp_max, tmp_absent = reachable(
+                        tmp_group, dict(zip(tmp_tracked, tmp_state)), follow)
+                    tmp_outcomes = sum(math.comb(len(tmp_parameters), ins_size)
+                                       for ins_size in range(tmp_min, tmp_max + 1)) + tmp_absent
+                    if tmp_group not in tmp_later_influential:
+                        tmp_new_states[tmp_state] = tmp_new_states.get(tmp_state, 0) + tmp_count * tmp_outcomes
+                        continue
+
+                    if len(tmp_new_states) + tmp_outcomes > limit:
+                        return None
+                    for tmp_outcome in itertools.chain([None] * tmp_absent, *(
+                            itertools.combinations(tmp_parameters, ins_size)
+                            for ins_size in range(tmp_min, tmp_max + 1))):
+                        tmp_new_state = tmp_state + (tmp_outcome,)
+                        tmp_new_states[tmp_new_state] = tmp_new_states.get(tmp_new_state, 0) + tmp_count
+                if tmp_group in tmp_later_influential:
+                    tmp_tracked.append(tmp_group)
+
+                # outcomes of groups that no later group needs are summed out
+                tmp_keep = [ins_index for ins_index, ins_group in enumerate(tmp_tracked)
+                            if ins_group in tmp_later_influential]
+                tmp_states = {}
+                for tmp_state, tmp_count in tmp_new_states.items():
+                    tmp_state = tuple(tmp_state[ins_index] for ins_index in tmp_keep)
+                    tmp_states[tmp_state] = tmp_states.get(tmp_state, 0) + tmp_count
+                tmp_tracked = [tmp_tracked[ins_index] for ins_index in tmp_keep]
+            return sum(tmp_states.values())
+
+        out_capacity = count(True)
+        if out_capacity is None:
+            out_capacity = count(False)
+        if len(self.loc_capacities) >= global_pool_cache_size:
+            self.loc_capacities.clear()  # many different forces, e.g. strata of long run, do not grow memory
+        self.loc_capacities[tmp_key] = out_capacity
+        return out_capacity
+
+    def unique_record(self, force, fingerprints, retries=global_unique_retries):
+        """
+        generates NPC that is not in fingerprints yet, only NPC that is duplicate is generated again
+
+        :param force: forced parameters, same as for __call__
+        :param fingerprints: set of fingerprints of NPC-s generated so far, fingerprint of new NPC is added to it
+        :param retries: number of times duplicate NPC is generated again before ValueError is raised
+        :return: NonPlayableCharacterRecord of unique NPC
+        """
+
+        for _ in range(retries + 1):
+            tmp_record = self.generate_record(force)
+            tmp_fingerprint = tmp_record.fingerprint()
+            if tmp_fingerprint not in fingerprints:
+                fingerprints.add(tmp_fingerprint)
+                return tmp_record
+            if self.loc_stats is not None:
+                self.loc_stats.add('unique_retries')
+
+        raise ValueError(f'no unique NPC found in {retries} retries after {len(fingerprints)} unique NPC-s')
+
+    def seeded_random(self, seed):
+        """
+        :param seed: None, int or str seed
+        :return: new RandomSource seeded with seed (counted into statistics if they are counted), None if seed is None
+        """
+
+        if seed is None:
+            return None
+        out_random = RandomSource(seed)
+        if self.loc_stats is not None:
+            out_random = ProfiledRandomSource(out_random, self.loc_stats)
+        return out_random
+
+    def iter_records(self, strata, random_source=None, unique=False):
+        """
+        generates NPC-s of strata that iter_many and iter_constrained already checked
+
+        :param strata: list of (forced parameters, {group: present}, number of NPC-s) of every stratum
+        :param random_source: RandomSource used while NPC-s are generated, None keeps random source of generator
+        :param unique: if True no two NPC-s are the same
+        :return: generator of NonPlayableCharacterRecord of every NPC, more strata are shuffled among each other
+        """
+
+        tmp_fingerprints = set()
+        tmp_previous_random = self.loc_random
+        if random_source is not None:
+            self.loc_random = random_source
+
+        try:
+            if len(strata) == 1:
+                tmp_order = itertools.repeat(0, strata[0][2])
+            else:
+                # stratum of every NPC, in random order so that any part of population has the same mix
+                tmp_strata_order = [ins_stratum for ins_stratum, (_, _, ins_count) in enumerate(strata)
+                                    for _ in range(ins_count)]
+                tmp_order = (tmp_strata_order[ins_index]
+                             for ins_index in self.loc_random.shuffled(len(tmp_strata_order)))
+            for tmp_stratum in tmp_order:
+                tmp_force, self.loc_presence, _ = strata[tmp_stratum]
+                if unique:
+                    yield self.unique_record(tmp_force, tmp_fingerprints)
+                else:
+                    yield self.generate_record(tmp_force)
+        finally:
+            self.loc_presence = {}
+            self.loc_random = tmp_previous_random
+
+    def iter_many(self, n, force=None, seed=None, unique=False):
+        """
+        streams NPC-s one by one without holding whole batch in memory
+
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC, same as for __call__
+        :param seed: if given NPC-s are generated from separate RandomSource seeded with it, so they can be generated
+        again without changing random numbers of this generator
+        :param unique: if True no two NPC-s are the same, raises ValueError at once if config can not make n different
+        NPC-s
+        :return: generator of NonPlayableCharacterRecord of every NPC
+        """
+
+        tmp_force = force if force else []
+        if unique:
+            tmp_capacity = self.capacity(tmp_force)
+            if n > tmp_capacity:
+                raise ValueError(f'{n} unique NPC-s requested, config can make at most {tmp_capacity}')
+        return self.iter_records([(tmp_force, {}, n)], self.seeded_random(seed), unique)
+
+    def generate_many(self, n, force=None, seed=None, unique=False):
+        """
+        generates batch of NPC-s in one pass
+
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC, same as for __call__
+        :param seed: if given NPC-s are generated from separate RandomSource seeded with it, so they can be generated
+        again without changing random numbers of this generator
+        :param unique: if True no two NPC-s are the same, same as for iter_many
+        :return: NonPlayableCharacterBatch with all NPC-s
+        """
+
+        out_batch = NonPlayableCharacterBatch(self.loc_all_groups_list)
+        for tmp_npc in self.iter_many(n, force, seed, unique):
+            out_batch.append(tmp_npc)
+        return out_batch
+
+    def iter_constrained(self, n, targets, force=None, seed=None, unique=False):
+        """
+        streams population with exact mix of target parameters, population is split into strata by constrained_strata
+        and every NPC of stratum is generated with its target parameters forced, so rarity classes and conditioned
+        groups still decide all other groups (no NPC is generated and thrown away)
+
+        :param n: number of NPC-s, None takes sum of target counts
+        :param targets: {group: {parameter: count or ratio}}, parameter None means NPC does not have optional group,
+        forced parameter of optional group makes group present
+        :param force: forced parameters used for every NPC, same as for __call__, can not force target group
+        :param seed: if given NPC-s are generated from separate RandomSource seeded with it, same as for iter_many
+        :param unique: if True no two NPC-s are the same, raises ValueError at once if config can not make enough
+        different NPC-s for some stratum
+        :return: generator of NonPlayableCharacterRecord of every NPC, strata are shuffled among each other
+        (stratum with target parameter of conditioned group is split again by ProbabilityModel.target_conditions
+        over parameters of its influential groups, which are forced too, so targets={'Race': {'Catfolk': 10}} gives
+        Catfolk only to residents of nationalities that have Catfolk, in proportion to how often they have them)
+        """
+
+        tmp_force = force if force else []
+        for tmp_group, tmp_parameters in targets.items():
+            if any(ins_force[0] == tmp_group for ins_force in tmp_force):
+                raise ValueError(f'group {tmp_group} can not be both forced and target')
+            tmp_optional = any(ins_group == tmp_group for ins_group, _ in self.loc_optional_group_chances)
+            if None in tmp_parameters and not tmp_optional:
+                raise ValueError(f'group {tmp_group} is not optional, every NPC has it')
+
+        # strata are drawn from same random source as NPC-s, so seed gives same population
+        tmp_random = self.seeded_random(seed)
+        tmp_strata_random = self.loc_random if tmp_random is None else tmp_random
+        tmp_conditioned_groups = {ins_group for ins_group, _ in self.loc_conditioned_group_conditions}
+        tmp_model = None
+        tmp_strata = []
+        for tmp_target_force, tmp_presence, tmp_count in constrained_strata(n, targets, tmp_strata_random):
+            if not any(ins_force[0] in tmp_conditioned_groups for ins_force in tmp_target_force):
+                tmp_strata.append((tmp_target_force + tmp_force, tmp_presence, tmp_count))
+                continue
+            if tmp_model is None:
+                tmp_model = ProbabilityModel(self.loc_plan, tmp_force)
+            tmp_conditions = tmp_model.target_conditions({ins_group: ins_parameter
+                                                          for ins_group, ins_parameter in tmp_target_force})
+            if not tmp_conditions:
+                raise ValueError(f'targets {tmp_target_force} have chance 0 with every parameter of their '
+                                 f'influential groups')
+            for tmp_condition, tmp_condition_count in zip(tmp_conditions, apportion(
+                    list(tmp_conditions.values()), tmp_count, tmp_strata_random)):
+                if tmp_condition_count:
+                    tmp_strata.append((tmp_target_force + [[ins_group, ins_parameter] for ins_group, ins_parameter
+                                                           in tmp_condition if ins_parameter is not None] + tmp_force,
+                                       {**tmp_presence, **{ins_group: ins_parameter is not None
+                                                           for ins_group, ins_parameter in tmp_condition}},
+                                       tmp_condition_count))
+        if unique:
+            for tmp_stratum_force, tmp_presence, tmp_count in tmp_strata:
+                tmp_capacity = self.capacity(tmp_stratum_force, tmp_presence)
+                if tmp_count > tmp_capacity:
+                    raise ValueError(f'{tmp_count} unique NPC-s requested with {tmp_stratum_force}, config can make '
+                                     f'at most {tmp_capacity}')
+        return self.iter_records(tmp_strata, tmp_random, unique)
+
+    def generate_constrained(self, n, targets, force=None, seed=None, unique=False):
+        """
+        generates population with exact mix of target parameters in one pass
+
+        :param n: number of NPC-s, None takes sum of target counts
+        :param targets: {group: {parameter: count or ratio}}, same as for iter_constrained
+        :param force: forced parameters used for every NPC, same as for __call__, can not force target group
+        :param seed: if given NPC-s are generated from separate RandomSource seeded with it, same as for iter_many
+        :param unique: if True no two NPC-s are the same, same as for iter_constrained
+        :return: NonPlayableCharacterBatch with all NPC-s
+        """
+
+        out_batch = NonPlayableCharacterBatch(self.loc_all_groups_list)
+        for tmp_npc in self.iter_constrained(n, targets, force, seed, unique):
+            out_batch.append(tmp_npc)
+        return out_batch
+
+    def generate_parallel(self, n, force=None, seed=None, workers=None):
+        """
+        generates batch of NPC-s split into shards across worker processes
+        (each shard has its own seed derived from seed and shard number, so same seed, n and workers
+        always give same batch; workers inherit compiled database by fork instead of getting it pickled)
+
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC, same as for __call__
+        :param seed: seed from which seed of every shard is derived, if None it is drawn from this generator
+        :param workers: number of worker processes, default is number of CPU-s
+        :return: NonPlayableCharacterBatch with all NPC-s in order of shards
+        """
+
+        import concurrent.futures
+        import multiprocessing
+
+        global global_worker_npc
+
+        tmp_workers = max(min(workers or os.cpu_count() or 1, n), 1)
+        if seed is None:
+            seed = self.loc_random.below(2 ** 63)
+
+        # first n % workers shards get one NPC more
+        tmp_shard_sizes = [n // tmp_workers + (ins_shard < n % tmp_workers) for ins_shard in range(tmp_workers)]
+        tmp_shard_seeds = [f'{seed}/{ins_shard}' for ins_shard in range(tmp_workers)]
+
+        out_batch = NonPlayableCharacterBatch(self.loc_all_groups_list)
+
+        if tmp_workers == 1:
+            out_batch.extend(self.generate_many(n, force, tmp_shard_seeds[0]))
+            return out_batch
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # workers get this NPC generator together with compiled database from memory of this process
+            tmp_context = multiprocessing.get_context('fork')
+            tmp_initializer, tmp_initargs = None, ()
+            global_worker_npc = self
+        else:
+            # database is pickled once per worker and not once per shard
+            tmp_context = multiprocessing.get_context('spawn')
+            tmp_initializer, tmp_initargs = init_generation_worker, (self.loc_plan,)
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(tmp_workers, mp_context=tmp_context,
+                                                        initializer=tmp_initializer,
+                                                        initargs=tmp_initargs) as tmp_executor:
+                tmp_futures = [tmp_executor.submit(generate_shard, ins_size, force, ins_seed)
+                               for ins_size, ins_seed in zip(tmp_shard_sizes, tmp_shard_seeds)]
+                for tmp_future in tmp_futures:
+                    out_batch.extend(tmp_future.result())
+        finally:
+            global_worker_npc = None
+
+        return out_batch
+
+
+def init_generation_worker(plan):
+    """
+    prepares NPC generator inside of worker process when workers can not be forked
+
+    :param plan: GenerationPlan
+    :return: NPC generator of worker process
+    """
+
+    global global_worker_npc
+    global_worker_npc = NonPlayableCharacter(plan)
+
+
+def generate_shard(n, force, seed):
+    """
+    generates one shard of NonPlayableCharacter.generate_parallel inside of worker process
+
+    :param n: number of NPC-s in shard
+    :param force: forced parameters used for every NPC
+    :param seed: seed of shard
+    :return: NonPlayableCharacterBatch of shard
+    """
+
+    return global_worker_npc.generate_many(n, force, seed)
+
+
+class ClassedPool:
+    """
+    choosing pool of one group with its parameters sorted by chance, for PopulationEngine
+    (parameters with same chance form one class, number of parameters of class that get into choosing pool of NPC is
+    binomial, so whole choosing pool of every NPC is described by few numbers instead of one per parameter)
+    """
+
+    __slots__ = ('loc_rarity_list', 'loc_class_chances', 'loc_class_sizes', 'loc_class_starts', 'loc_codes')
+
+    def __init__(self, numpy, rarity_list, vocabulary):
+        """
+        :param numpy: numpy module
+        :param rarity_list: RarityList of choosing pool
+        :param vocabulary: dictionary of parameters of group and their codes, new parameters are added to it
+        """
+
+        tmp_chances = numpy.frombuffer(rarity_list.loc_chances, dtype=numpy.uint8)
+        tmp_order = numpy.argsort(tmp_chances, kind='stable')
+        tmp_class_chances, tmp_class_starts, tmp_class_sizes = numpy.unique(tmp_chances[tmp_order], return_index=True,
+                                                                            return_counts=True)
+
+        self.loc_rarity_list = rarity_list  # kept so that id of rarity list is not reused while pool is cached
+        self.loc_class_chances = tmp_class_chances / 100
+        self.loc_class_sizes = tmp_class_sizes
+        self.loc_class_starts = tmp_class_starts
+        # code of every parameter in vocabulary of group, in order of classes
+        self.loc_codes = numpy.array([vocabulary.setdefault(rarity_list.parameter(ins_index), len(vocabulary))
+                                      for ins_index in tmp_order.tolist()], dtype=numpy.int64)
+
+    def select(self, numpy, generator, slots, weighted=False):
+        """
+        picks parameters for many NPC-s at once, same as RarityList.select for every NPC
+        (size of choosing pool of every class is drawn first, then every slot picks class by number of parameters
+        that are still left in it and parameter of that class that was not picked yet)
+
+        :param numpy: numpy module
+        :param generator: numpy Generator
+        :param slots: array with number of parameters of every NPC
+        :param weighted: if True picks same as RarityList.select_weighted, every class keeps all of its parameters
+        and is picked by their number times their chance
+        :return: array of codes with one row for every NPC, -1 where NPC got no parameter
+        """
+
+        tmp_count = len(slots)
+        tmp_max_slots = int(slots.max()) if tmp_count else 0
+        out_codes = numpy.full((tmp_count, tmp_max_slots), -1, dtype=numpy.int64)
+        if not tmp_max_slots or not len(self.loc_codes):
+            return out_codes
+
+        if weighted:
+            tmp_left = numpy.tile(numpy.where(self.loc_class_chances > 0, self.loc_class_sizes, 0), (tmp_count, 1))
+            tmp_class_weights = self.loc_class_chances
+        else:
+            tmp_left = generator.binomial(self.loc_class_sizes, self.loc_class_chances,
+                                          (tmp_count, len(self.loc_class_sizes)))
+            tmp_class_weights = 1
+        tmp_slots = numpy.minimum(slots, tmp_left.sum(axis=1))
+        tmp_picked = numpy.full((tmp_count, tmp_max_slots), -1, dtype=numpy.int64)
+
+        for tmp_slot in range(tmp_max_slots):
+            tmp_rows = numpy.flatnonzero(tmp_slots > tmp_slot)
+            if not len(tmp_rows):
+                break
+
+            tmp_cumulative = numpy.cumsum(tmp_left[tmp_rows] * tmp_class_weights, axis=1)
+            tmp_draws = generator.random(len(tmp_rows)) * tmp_cumulative[:, -1]
+            tmp_classes = (tmp_cumulative <= tmp_draws[:, None]).sum(axis=1)
+            tmp_left[tmp_rows, tmp_classes] -= 1
+
+            # parameter of class that this NPC did not get yet, collisions are drawn again
+            tmp_draw_rows = numpy.arange(len(tmp_rows))
+            while len(tmp_draw_rows):
+                tmp_draw_classes = tmp_classes[tmp_draw_rows]
+                tmp_picked[tmp_rows[tmp_draw_rows], tmp_slot] = self.loc_class_starts[tmp_draw_classes] + \
+                    generator.integers(0, self.loc_class_sizes[tmp_draw_classes])
+                tmp_draw_rows = tmp_draw_rows[(tmp_picked[tmp_rows[tmp_draw_rows], :tmp_slot] ==
+                                               tmp_picked[tmp_rows[tmp_draw_rows], tmp_slot, None]).any(axis=1)]
+
+            out_codes[tmp_rows, tmp_slot] = self.loc_codes[tmp_picked[tmp_rows, tmp_slot]]
+
+        return out_codes
+
+
+class PopulationEngine:
+    """
+    generates whole population of NPC-s at once with numpy, groups are arrays of parameter codes with one row for
+    every NPC and parameters are decoded to strings only when batch is made
+    (optional groups, multiple groups, rarity of parameters and conditioned groups give same distributions as
+    NonPlayableCharacter, but random numbers are drawn differently, so same seed does not give same NPC-s)
+    """
+
+    def __init__(self, plan=None, seed=None, chunk_size=65536):
+        """
+        :param plan: GenerationPlan of config.txt and database, default is Plan
+        :param seed: None, int or str seed or numpy Generator, raises ImportError if numpy is not installed
+        :param chunk_size: number of NPC-s generated at once, bounds memory of arrays
+        """
+
+        import numpy
+        import random
+
+        self.loc_numpy = numpy
+        if hasattr(seed, 'bit_generator'):
+            self.loc_generator = seed
+        else:
+            self.loc_generator = numpy.random.default_rng(
+                seed if seed is None or type(seed) == int else random.Random(seed).getrandbits(128))
+        self.loc_chunk_size = chunk_size
+
+        # NPC generator gives compiled rarity lists and finds conditioned groups
+        self.loc_npc = NonPlayableCharacter(plan, 0)
+        self.loc_vocabularies = {}  # {group: {parameter: code}}
+        self.loc_pools = {}  # {(group, id of RarityList): ClassedPool}
+        self.loc_conditioned_pools = {}  # {(group, conditioned groups): RarityList}
+
+    def classed_pool(self, group, rarity_list):
+        """
+        :param group: name of group
+        :param rarity_list: RarityList of choosing pool of group
+        :return: ClassedPool of rarity list, compiled once
+        """
+
+        tmp_key = (group, id(rarity_list))
+        try:
+            return self.loc_pools[tmp_key]
+        except KeyError:
+            out_pool = self.loc_pools[tmp_key] = ClassedPool(self.loc_numpy, rarity_list,
+                                                             self.loc_vocabularies.setdefault(group, {}))
+            return out_pool
+
+    def generate_chunk(self, n, force):
+        """
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC, same as for NonPlayableCharacter.__call__
+        :return: list of groups, dictionary of arrays showing which NPC-s have group and dictionary of arrays of
+        parameter codes
+        """
+
+        numpy = self.loc_numpy
+        tmp_generator = self.loc_generator
+        tmp_npc = self.loc_npc
+
+        tmp_groups = list(tmp_npc.loc_all_groups_list)
+        for tmp_force in force:
+            if tmp_force[0] not in tmp_groups:
+                tmp_groups.append(tmp_force[0])
+
+        tmp_present = {ins_group: numpy.ones(n, dtype=bool) for ins_group in tmp_groups}
+        tmp_slots = {ins_group: numpy.ones(n, dtype=numpy.int64) for ins_group in tmp_groups}
+        tmp_codes = {}
+
+        # optional group is removed if its chance is smaller or equal to random percent
+        for tmp_group, tmp_chance in tmp_npc.loc_optional_group_chances:
+            tmp_percents = tmp_generator.integers(1, 101, n)
+            if tmp_group in tmp_present:
+                tmp_present[tmp_group] &= tmp_percents < tmp_chance
+
+        # multiple group gets one more parameter for every random percent in a row that is under its chance
+        for tmp_group, tmp_chance, tmp_min, tmp_max in tmp_npc.loc_multiple_group_ranges:
+            tmp_successes = tmp_generator.integers(1, 101, (n, tmp_max - tmp_min)) <= tmp_chance
+            if tmp_group in tmp_slots:
+                tmp_slots[tmp_group] = tmp_min + numpy.cumprod(tmp_successes, axis=1).sum(axis=1)
+
+        def select(group, rarity_list, rows):
+            tmp_group_codes = tmp_codes.setdefault(group, numpy.full((n, 0), -1, dtype=numpy.int64))
+            tmp_selected = self.classed_pool(group, rarity_list).select(numpy, tmp_generator, tmp_slots[group][rows],
+                                                                        tmp_npc.loc_weighted)
+            if tmp_selected.shape[1] > tmp_group_codes.shape[1]:
+                tmp_group_codes = tmp_codes[group] = numpy.pad(
+                    tmp_group_codes, ((0, 0), (0, tmp_selected.shape[1] - tmp_group_codes.shape[1])),
+                    constant_values=-1)
+            tmp_group_codes[rows, :tmp_selected.shape[1]] = tmp_selected
+
+        # forced groups, only first force of group is used like in NonPlayableCharacter
+        for tmp_force in force:
+            if tmp_force[0] not in tmp_codes:
+                select(tmp_force[0], RarityList(tmp_force[1:], tmp_npc.loc_all_rarity_classes),
+                       numpy.flatnonzero(tmp_present[tmp_force[0]]))
+
+        tmp_conditioned_groups = {ins_group for ins_group, _ in tmp_npc.loc_conditioned_group_conditions}
+        for tmp_group in tmp_groups:
+            if tmp_group not in tmp_conditioned_groups and tmp_group not in tmp_codes:
+                select(tmp_group, tmp_npc.loc_rarity_lists.get(tmp_group, RarityList((), {})),
+                       numpy.flatnonzero(tmp_present[tmp_group]))
+
+        # NPC-s with same parameters of influential groups share choosing pool, it is found once for all of them
+        for tmp_group, tmp_influential_groups in tmp_npc.loc_conditioned_group_conditions:
+            if tmp_group in tmp_codes or tmp_group not in tmp_present:
+                continue
+            tmp_key_columns = [numpy.ones((n, 1), dtype=numpy.int64)]
+            for tmp_influential_group in tmp_influential_groups:
+                if tmp_influential_group in tmp_codes:
+                    tmp_key_columns.append(numpy.where(tmp_present[tmp_influential_group][:, None],
+                                                       tmp_codes[tmp_influential_group], -2))
+                    tmp_key_columns.append(tmp_present[tmp_influential_group][:, None].astype(numpy.int64))
+            tmp_keys, tmp_key_index = numpy.unique(numpy.hstack(tmp_key_columns), axis=0, return_inverse=True)
+            tmp_key_index = tmp_key_index.reshape(-1)
+
+            # keys that resolve to same conditioned groups share one choosing pool and one selection
+            tmp_decoders = [list(self.loc_vocabularies.get(ins_group, {})) for ins_group in tmp_influential_groups]
+            tmp_pool_numbers = {}  # {conditioned groups: number of pool}
+            tmp_key_pools = numpy.zeros(len(tmp_keys), dtype=numpy.int64)
+            tmp_first_rows = numpy.full(len(tmp_keys), -1, dtype=numpy.int64)
+            tmp_first_rows[tmp_key_index[::-1]] = numpy.arange(n)[::-1]
+            for tmp_key_number, tmp_row in enumerate(tmp_first_rows.tolist()):
+                tmp_influential_parameters = []
+                for tmp_influential_group, tmp_decoder in zip(tmp_influential_groups, tmp_decoders):
+                    if tmp_influential_group not in tmp_present or not tmp_present[tmp_influential_group][tmp_row]:
+                        tmp_influential_parameters.append(None)
+                    elif tmp_influential_group not in tmp_codes:
+                        tmp_influential_parameters.append([''])  # group that is not selected yet
+                    else:
+                        tmp_influential_parameters.append([tmp_decoder[ins_code] for ins_code in
+                                                           tmp_codes[tmp_influential_group][tmp_row].tolist()
+                                                           if ins_code >= 0])
+                tmp_key_pools[tmp_key_number] = tmp_pool_numbers.setdefault(
+                    tmp_npc.conditioned_subgroups(tmp_group, tmp_influential_parameters), len(tmp_pool_numbers))
+
+            # rows of NPC-s sorted by their pool, so that every pool takes one slice of them
+            tmp_group_rows = numpy.flatnonzero(tmp_present[tmp_group])
+            tmp_row_pools = tmp_key_pools[tmp_key_index[tmp_group_rows]]
+            tmp_order = numpy.argsort(tmp_row_pools, kind='stable')
+            tmp_bounds = numpy.searchsorted(tmp_row_pools[tmp_order], numpy.arange(len(tmp_pool_numbers) + 1))
+            for tmp_subgroups, tmp_pool_number in tmp_pool_numbers.items():
+                tmp_rows = tmp_group_rows[tmp_order[tmp_bounds[tmp_pool_number]:tmp_bounds[tmp_pool_number + 1]]]
+                if not len(tmp_rows):
+                    continue
+                tmp_pool_key = (tmp_group, tmp_subgroups)
+                tmp_rarity_list = self.loc_conditioned_pools.get(tmp_pool_key)
+                if tmp_rarity_list is None:
+                    tmp_rarity_list = self.loc_conditioned_pools[tmp_pool_key] = tmp_npc.conditioned_pool(
+                        tmp_group, None, tmp_subgroups)
+                select(tmp_group, tmp_rarity_list, tmp_rows)
+
+        return tmp_groups, tmp_present, tmp_codes
+
+    def generate(self, n, force=None):
+        """
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC, same as for NonPlayableCharacter.__call__
+        :return: NonPlayableCharacterBatch of NPC-s
+        """
+
+        numpy = self.loc_numpy
+        out_batch = NonPlayableCharacterBatch(self.loc_npc.loc_all_groups_list)
+        tmp_done = 0
+        while tmp_done < n:
+            tmp_size = min(self.loc_chunk_size, n - tmp_done)
+            tmp_groups, tmp_present, tmp_codes = self.generate_chunk(tmp_size, force or [])
+
+            # parameters are decoded to strings only here
+            tmp_chunk = NonPlayableCharacterBatch(tmp_groups)
+            for tmp_group in tmp_groups:
+                tmp_vocabulary = list(self.loc_vocabularies.get(tmp_group, {}))
+                tmp_group_codes = tmp_codes.get(tmp_group, numpy.full((tmp_size, 0), -1))
+                if tmp_group_codes.shape[1] == 1:
+                    # groups with one parameter are decoded by indexing, code -1 takes empty tuple at the end
+                    tmp_cells = numpy.empty(len(tmp_vocabulary) + 1, dtype=object)
+                    tmp_cells[:] = [(ins_parameter,) for ins_parameter in tmp_vocabulary] + [()]
+                    tmp_chunk.loc_columns[tmp_group] = numpy.where(
+                        tmp_present[tmp_group], tmp_cells[tmp_group_codes[:, 0]], None).tolist()
+                else:
+                    tmp_chunk.loc_columns[tmp_group] = [
+                        tuple(tmp_vocabulary[ins_code] for ins_code in ins_row if ins_code >= 0) if ins_present
+                        else None for ins_row, ins_present in zip(tmp_group_codes.tolist(),
+                                                                   tmp_present[tmp_group].tolist())]
+            tmp_chunk.loc_length = tmp_size
+
+            out_batch.extend(tmp_chunk)
+            tmp_done += tmp_size
+        return out_batch
+
+
+def generate_population(n, force=None, seed=None, plan=None):
+    """
+    generates population with PopulationEngine, or with NonPlayableCharacter if numpy is not installed
+
+    :param n: number of NPC-s
+    :param force: forced parameters used for every NPC, same as for NonPlayableCharacter.__call__
+    :param seed: None, int or str seed
+    :param plan: GenerationPlan of config.txt and database, default is Plan
+    :return: NonPlayableCharacterBatch of NPC-s
+    """
+
+    try:
+        tmp_engine = PopulationEngine(plan, seed)
+    except ImportError:
+        return NonPlayableCharacter(plan, seed).generate_many(n, force)
+    return tmp_engine.generate(n, force)
+
+
+def binomial_distribution(n, p):
+    """
+    :param n: number of parameters
+    :param p: chance of every parameter, from 0 to 1
+    :return: list with probability of every number of parameters from 0 to n
+    """
+
+    import math
+
+    if p <= 0:
+        return [1.0] + [0.0] * n
+    if p >= 1:
+        return [0.0] * n + [1.0]
+    return [math.comb(n, ins_k) * p ** ins_k * (1 - p) ** (n - ins_k) for ins_k in range(n + 1)]
+
+
+def convolve_distributions(distribution, other_distribution):
+    """
+    :param distribution: list with probability of every number from 0
+    :param other_distribution: list with probability of every number from 0
+    :return: distribution of sum of two independent numbers
+    """
+
+    out_distribution = [0.0] * (len(distribution) + len(other_distribution) - 1)
+    for tmp_number, tmp_probability in enumerate(distribution):
+        if tmp_probability:
+            for tmp_other_number, tmp_other_probability in enumerate(other_distribution):
+                out_distribution[tmp_number + tmp_other_number] += tmp_probability * tmp_other_probability
+    return out_distribution
+
+
+def weighted_compositions(classes, k, picked=None):
+    """
+    :param classes: dictionary of chances and number of parameters with that chance
+    :param k: number of weighted picks without replacement, picks stop when only parameters with chance 0 are left
+    :param picked: number of picked parameters of every class, if given only picks of one set of parameters with
+    that many parameters of every class are followed
+    :return: dictionary of number of picked parameters of every class (in order of classes) and its probability
+    (every pick takes class by number of its parameters that are left times their chance)
+    """
+
+    tmp_chances = list(classes)
+    tmp_counts = list(classes.values())
+    tmp_limits = tmp_counts if picked is None else picked
+
+    out_compositions = {(0,) * len(tmp_chances): 1.0}
+    for _ in range(k):
+        tmp_next = {}
+        for tmp_composition, tmp_probability in out_compositions.items():
+            tmp_remaining = sum((ins_count - ins_picked) * ins_chance for ins_chance, ins_count, ins_picked
+                                in zip(tmp_chances, tmp_counts, tmp_composition))
+            if not tmp_remaining:
+                tmp_next[tmp_composition] = tmp_next.get(tmp_composition, 0.0) + tmp_probability
+                continue
+            for tmp_class, tmp_chance in enumerate(tmp_chances):
+                tmp_left = tmp_limits[tmp_class] - tmp_composition[tmp_class]
+                if tmp_left > 0 and tmp_chance:
+                    tmp_new = tmp_composition[:tmp_class] + (tmp_composition[tmp_class] + 1,) + \
+                        tmp_composition[tmp_class + 1:]
+                    tmp_next[tmp_new] = tmp_next.get(tmp_new, 0.0) + \
+                        tmp_probability * tmp_left * tmp_chance / tmp_remaining
+        out_compositions = tmp_next
+    return out_compositions
+
+
+def remove_bernoulli(distribution, p):
+    """
+    :param distribution: list with probability of every size of choosing pool
+    :param p: chance of one parameter of choosing pool, from 0 to 1
+    :return: distribution of size of choosing pool without that parameter
+    (recursion runs from the side on which it is numerically stable)
+    """
+
+    tmp_size = len(distribution) - 1
+    if p >= 1:
+        return distribution[1:]
+    out_distribution = [0.0] * tmp_size
+    if p <= 0.5:
+        tmp_previous = 0.0
+        for tmp_number in range(tmp_size):
+            tmp_previous = out_distribution[tmp_number] = max((distribution[tmp_number] - p * tmp_previous) / (1 - p),
+                                                              0.0)
+    else:
+        tmp_next = 0.0
+        for tmp_number in range(tmp_size - 1, -1, -1):
+            tmp_next = out_distribution[tmp_number] = max((distribution[tmp_number + 1] - (1 - p) * tmp_next) / p, 0.0)
+    return out_distribution
+
+
+class ProbabilityModel:
+    """
+    exact distributions of NPC-s of one plan, computed from config and database without generating any NPC
+    (choosing pool takes every parameter with its chance and NPC gets uniform sample of it, so number of parameters
+    in choosing pool is sum of one binomial distribution for every chance of parameters, and probability of every
+    parameter follows from it)
+    """
+
+    def __init__(self, plan=None, force=None, limit=100000):
+        """
+        :param plan: GenerationPlan of config.txt and database, default is Plan
+        :param force: forced parameters used for every NPC, same as for NonPlayableCharacter.__call__
+        :param limit: the largest number of outcomes of one group or of joint outcomes of groups, ValueError is
+        raised if it would be exceeded
+        """
+
+        self.loc_npc = NonPlayableCharacter(plan, 0)
+        self.loc_force = {}  # {group: RarityList}, only first force of group is used like in NonPlayableCharacter
+        for tmp_force in force or []:
+            if tmp_force[0] not in self.loc_force:
+                self.loc_force[tmp_force[0]] = RarityList(tmp_force[1:], self.loc_npc.loc_all_rarity_classes)
+        self.loc_limit = limit
+        self.loc_weighted = self.loc_npc.loc_weighted
+
+        self.loc_groups = list(self.loc_npc.loc_all_groups_list)
+        self.loc_groups.extend(ins_group for ins_group in self.loc_force if ins_group not in self.loc_groups)
+        self.loc_influential_groups = {ins_group: tuple(ins_influential_groups) for ins_group, ins_influential_groups
+                                       in self.loc_npc.loc_conditioned_group_conditions
+                                       if ins_group not in self.loc_force}
+        self.loc_conditioned_pools = {}  # {(group, conditioned groups): RarityList}
+        self.loc_pool_distributions = {}  # {id of RarityList: (RarityList, classes, size distribution)}
+        self.loc_selection_probabilities = {}  # {(id of RarityList, slot distribution): probabilities}
+        self.loc_chance_probabilities = {}  # {(chances and their counts, slot distribution): probabilities}
+        self.loc_subset_distributions = {}  # {(id of RarityList, k): distribution}
+        self.loc_joint_distributions = {}  # {groups: distribution}
+        self.loc_parameter_probabilities = {}  # {group: probabilities}, force is same for whole model
+
+    def presence(self, group):
+        """
+        :param group: name of group
+        :return: probability that NPC has group (optional group is kept if random percent is under its chance)
+        """
+
+        if group not in self.loc_groups:
+            return 0.0
+        out_probability = 1.0
+        for tmp_group, tmp_chance in self.loc_npc.loc_optional_group_chances:
+            if tmp_group == group:
+                out_probability *= min(max(tmp_chance - 1, 0), 100) / 100
+        return out_probability
+
+    def slot_distribution(self, group):
+        """
+        :param group: name of group
+        :return: dictionary of number of places for parameters and its probability, for NPC that has group
+        """
+
+        out_distribution = {1: 1.0}
+        for tmp_group, tmp_chance, tmp_min, tmp_max in self.loc_npc.loc_multiple_group_ranges:
+            if tmp_group == group:
+                # one more place for every random percent in a row that is under chance, up to max
+                tmp_p = min(max(tmp_chance, 0), 100) / 100
+                tmp_extra = max(tmp_max - tmp_min, 0)
+                out_distribution = {tmp_min + ins_extra: tmp_p ** ins_extra * (1 - tmp_p)
+                                    for ins_extra in range(tmp_extra)}
+                out_distribution[tmp_min + tmp_extra] = tmp_p ** tmp_extra
+        return out_distribution
+
+    def pool(self, group, influential_outcomes=None):
+        """
+        :param group: name of group
+        :param influential_outcomes: dictionary of influential groups and their outcomes (tuple of parameters or
+        None), needed only for conditioned group
+        :return: RarityList of choosing pool of group
+        """
+
+        if group in self.loc_force:
+            return self.loc_force[group]
+        if group in self.loc_influential_groups:
+            influential_outcomes = influential_outcomes or {}
+            tmp_influential_parameters = [None if influential_outcomes.get(ins_group) is None
+                                          else list(influential_outcomes[ins_group])
+                                          for ins_group in self.loc_influential_groups[group]]
+            # outcomes that resolve to same conditioned groups share one choosing pool
+            tmp_pool_key = (group, self.loc_npc.conditioned_subgroups(group, tmp_influential_parameters))
+            try:
+                return self.loc_conditioned_pools[tmp_pool_key]
+            except KeyError:
+                out_pool = self.loc_conditioned_pools[tmp_pool_key] = self.loc_npc.conditioned_pool(
+                    group, None, tmp_pool_key[1])
+                return out_pool
+        return self.loc_npc.loc_rarity_lists.get(group, RarityList((), {}))
+
+    def pool_distribution(self, rarity_list):
+        """
+        :param rarity_list: RarityList of choosing pool
+        :return: dictionary of chances and number of parameters with that chance, and list with probability of every
+        size of choosing pool
+        """
+
+        import collections
+
+        try:
+            return self.loc_pool_distributions[id(rarity_list)][1:]
+        except KeyError:
+            pass
+
+        tmp_classes = dict(collections.Counter(rarity_list.loc_chances))
+        if self.loc_weighted:
+            # weighted sampling has no choosing pool, every parameter with chance above 0 can be picked
+            tmp_nonzero = len(rarity_list.loc_chances) - tmp_classes.get(0, 0)
+            tmp_size_distribution = [0.0] * tmp_nonzero + [1.0]
+        else:
+            tmp_size_distribution = [1.0]
+            for tmp_chance, tmp_count in tmp_classes.items():
+                tmp_size_distribution = convolve_distributions(tmp_size_distribution,
+                                                               binomial_distribution(tmp_count, tmp_chance / 100))
+        # rarity list is kept so that its id is not reused while distribution is stored
+        self.loc_pool_distributions[id(rarity_list)] = (rarity_list, tmp_classes, tmp_size_distribution)
+        return tmp_classes, tmp_size_distribution
+
+    def chance_probabilities(self, classes, size_distribution, slot_distribution):
+        """
+        :param classes: dictionary of chances and number of parameters with that chance, from pool_distribution
+        :param size_distribution: list with probability of every size of choosing pool, from pool_distribution
+        :param slot_distribution: dictionary of number of places for parameters and its probability
+        :return: dictionary of chances and probability that NPC gets parameter with that chance
+        """
+
+        if self.loc_weighted:
+            out_probabilities = dict.fromkeys(classes, 0.0)
+            for tmp_k, tmp_k_probability in slot_distribution.items():
+                for tmp_composition, tmp_probability in weighted_compositions(classes, tmp_k).items():
+                    for (tmp_chance, tmp_count), tmp_picked in zip(classes.items(), tmp_composition):
+                        out_probabilities[tmp_chance] += tmp_k_probability * tmp_probability * tmp_picked / tmp_count
+            return out_probabilities
+
+        out_probabilities = {}
+        for tmp_chance in classes:
+            if not tmp_chance:
+                out_probabilities[tmp_chance] = 0.0
+                continue
+            # size of choosing pool without parameter itself
+            tmp_others = remove_bernoulli(size_distribution, tmp_chance / 100)
+            out_probabilities[tmp_chance] = tmp_chance / 100 * sum(
+                ins_k_probability * ins_probability * min(1.0, ins_k / (ins_size + 1))
+                for ins_k, ins_k_probability in slot_distribution.items()
+                for ins_size, ins_probability in enumerate(tmp_others))
+        return out_probabilities
+
+    def selection_probabilities(self, rarity_list, slot_distribution):
+        """
+        :param rarity_list: RarityList of choosing pool
+        :param slot_distribution: dictionary of number of places for parameters and its probability
+        :return: dictionary of parameters and probability that NPC gets them
+        (parameter gets into choosing pool with its chance, then it is one of k picked from it with probability
+        k / size of choosing pool, if choosing pool is smaller than k it is always picked, with weighted sampling
+        parameter is picked with expected number of picks of its class divided by size of class)
+        """
+
+        tmp_key = (id(rarity_list), tuple(slot_distribution.items()))
+        try:
+            return self.loc_selection_probabilities[tmp_key]
+        except KeyError:
+            pass
+        tmp_classes, tmp_size_distribution = self.pool_distribution(rarity_list)
+
+        # probability of parameter of every chance, pools with same counts of chances share them
+        tmp_chances_key = (tuple(sorted(tmp_classes.items())), tmp_key[1])
+        tmp_chance_probabilities = self.loc_chance_probabilities.get(tmp_chances_key)
+        if tmp_chance_probabilities is None:
+            tmp_chance_probabilities = self.loc_chance_probabilities[tmp_chances_key] = self.chance_probabilities(
+                tmp_classes, tmp_size_distribution, slot_distribution)
+
+        out_probabilities = {}
+        for tmp_index, tmp_chance in enumerate(rarity_list.loc_chances):
+            tmp_parameter = rarity_list.parameter(tmp_index)
+            # parameter that is listed more than once can be picked more than once, value is expected count
+            out_probabilities[tmp_parameter] = out_probabilities.get(tmp_parameter, 0.0) + \
+                tmp_chance_probabilities[tmp_chance]
+        self.loc_selection_probabilities[tmp_key] = out_probabilities
+        return out_probabilities
+
+    def count_distribution(self, group, influential_outcomes=None):
+        """
+        :param group: name of group
+        :param influential_outcomes: dictionary of influential groups and their outcomes, needed only for
+        conditioned group
+        :return: dictionary of number of parameters of NPC and its probability, None is probability that NPC does
+        not have group
+        """
+
+        _, tmp_size_distribution = self.pool_distribution(self.pool(group, influential_outcomes))
+        tmp_presence = self.presence(group)
+
+        out_distribution = {None: 1 - tmp_presence}
+        for tmp_k, tmp_k_probability in self.slot_distribution(group).items():
+            for tmp_size, tmp_probability in enumerate(tmp_size_distribution):
+                tmp_count = min(tmp_k, tmp_size)
+                out_distribution[tmp_count] = out_distribution.get(tmp_count, 0.0) + \
+                    tmp_presence * tmp_k_probability * tmp_probability
+        return out_distribution
+
+    def subset_distribution(self, rarity_list, k):
+        """
+        :param rarity_list: RarityList of choosing pool
+        :param k: number of places for parameters
+        :return: dictionary of sorted tuples of picked parameters and their probability
+        (set of k parameters is picked if all of them are in choosing pool and sample of k from it is exactly them,
+        smaller set only if it is the whole choosing pool, with weighted sampling set is picked with probability
+        of all orders in which its parameters can be picked)
+        """
+
+        import math
+
+        tmp_classes, _ = self.pool_distribution(rarity_list)
+        tmp_key = (id(rarity_list), k)
+        if tmp_key in self.loc_subset_distributions:
+            return self.loc_subset_distributions[tmp_key]
+        tmp_indexes = [ins_index for ins_index, ins_chance in enumerate(rarity_list.loc_chances) if ins_chance]
+        tmp_certain = [ins_index for ins_index in tmp_indexes if rarity_list.loc_chances[ins_index] == 100]
+        tmp_uncertain = [ins_index for ins_index in tmp_indexes if rarity_list.loc_chances[ins_index] < 100]
+
+        tmp_outcomes = sum(math.comb(len(tmp_indexes), ins_size) for ins_size in range(min(k, len(tmp_indexes)) + 1))
+        if tmp_outcomes > self.loc_limit:
+            raise ValueError(f'{tmp_outcomes} outcomes of {k} parameters from {len(tmp_indexes)} exceed limit')
+
+        tmp_factors = {}  # {(size, chances of picked parameters): probability of rest of choosing pool}
+
+        def rest_factor(size, chances):
+            try:
+                return tmp_factors[(size, chances)]
+            except KeyError:
+                pass
+            if self.loc_weighted:
+                # every order of picks of set, only set of all possible picks can be picked
+                tmp_picked = tuple(chances.count(ins_chance) for ins_chance in tmp_classes)
+                tmp_factor = weighted_compositions(tmp_classes, size, tmp_picked).get(tmp_picked, 0.0) \
+                    if size == min(k, len(tmp_indexes)) else 0.0
+                tmp_factors[(size, chances)] = tmp_factor
+                return tmp_factor
+            tmp_rest = [1.0]
+            for tmp_chance, tmp_count in tmp_classes.items():
+                tmp_rest = convolve_distributions(
+                    tmp_rest, binomial_distribution(tmp_count - chances.count(tmp_chance), tmp_chance / 100))
+            if size == k:
+                # rest of choosing pool can have any size, sample of k has to be exactly picked parameters
+                tmp_factor = sum(ins_probability / math.comb(k + ins_rest, k)
+                                 for ins_rest, ins_probability in enumerate(tmp_rest))
+            else:
+                tmp_factor = tmp_rest[0]
+            tmp_factors[(size, chances)] = tmp_factor
+            return tmp_factor
+
+        out_distribution = {}
+        for tmp_size in range(min(k, len(tmp_indexes)) + 1):
+            # set smaller than k has to include every certain parameter
+            tmp_candidates = tmp_indexes if tmp_size == k or self.loc_weighted else tmp_uncertain
+            tmp_fixed = [] if tmp_size == k or self.loc_weighted else tmp_certain
+            if len(tmp_fixed) > tmp_size:
+                continue
+            for tmp_subset in itertools.combinations(tmp_candidates, tmp_size - len(tmp_fixed)):
+                tmp_subset = tmp_fixed + list(tmp_subset)
+                tmp_chances = tuple(sorted(rarity_list.loc_chances[ins_index] for ins_index in tmp_subset))
+                tmp_probability = rest_factor(tmp_size, tmp_chances)
+                if not self.loc_weighted:
+                    tmp_probability *= math.prod(ins_chance / 100 for ins_chance in tmp_chances)
+                if tmp_probability:
+                    tmp_outcome = tuple(sorted(rarity_list.parameter(ins_index) for ins_index in tmp_subset))
+                    out_distribution[tmp_outcome] = out_distribution.get(tmp_outcome, 0.0) + tmp_probability
+        self.loc_subset_distributions[tmp_key] = out_distribution
+        return out_distribution
+
+    def outcome_distribution(self, group, influential_outcomes=None):
+        """
+        :param group: name of group
+        :param influential_outcomes: dictionary of influential groups and their outcomes, needed only for
+        conditioned group
+        :return: dictionary of outcomes of group and their probability, outcome is sorted tuple of parameters or
+        None if NPC does not have group
+        """
+
+        tmp_presence = self.presence(group)
+        tmp_pool = self.pool(group, influential_outcomes)
+
+        out_distribution = {None: 1 - tmp_presence} if tmp_presence < 1 else {}
+        for tmp_k, tmp_k_probability in self.slot_distribution(group).items():
+            for tmp_outcome, tmp_probability in self.subset_distribution(tmp_pool, tmp_k).items():
+                out_distribution[tmp_outcome] = out_distribution.get(tmp_outcome, 0.0) + \
+                    tmp_presence * tmp_k_probability * tmp_probability
+        return out_distribution
+
+    def joint_distribution(self, groups):
+        """
+        :param groups: names of groups
+        :return: dictionary of tuples with outcome of every group and their probability
+        (influential groups of conditioned groups are followed in same order as NonPlayableCharacter selects
+        them, and are summed out when no group needs them any more)
+        """
+
+        tmp_key = tuple(groups)
+        if tmp_key in self.loc_joint_distributions:
+            return dict(self.loc_joint_distributions[tmp_key])
+
+        # groups that are needed, influential groups of conditioned groups too
+        tmp_needed = set()
+        tmp_stack = list(groups)
+        while tmp_stack:
+            tmp_group = tmp_stack.pop()
+            if tmp_group not in tmp_needed:
+                tmp_needed.add(tmp_group)
+                tmp_stack.extend(self.loc_influential_groups.get(tmp_group, ()))
+
+        tmp_conditioned = [ins_group for ins_group, _ in self.loc_npc.loc_conditioned_group_conditions
+                           if ins_group in tmp_needed and ins_group in self.loc_influential_groups]
+        tmp_order = [ins_group for ins_group in tmp_needed if ins_group not in self.loc_influential_groups]
+        tmp_order.sort(key=lambda ins_group: self.loc_groups.index(ins_group) if ins_group in self.loc_groups
+                       else len(self.loc_groups))
+        tmp_order += tmp_conditioned
+
+        tmp_tracked = []
+        tmp_states = {(): 1.0}
+        for tmp_position, tmp_group in enumerate(tmp_order):
+            tmp_new_states = {}
+            tmp_independent = None if tmp_group in self.loc_influential_groups else self.outcome_distribution(tmp_group)
+            for tmp_state, tmp_probability in tmp_states.items():
+                tmp_outcomes = self.outcome_distribution(tmp_group, dict(zip(tmp_tracked, tmp_state))) \
+                    if tmp_independent is None else tmp_independent
+                for tmp_outcome, tmp_outcome_probability in tmp_outcomes.items():
+                    tmp_new_state = tmp_state + (tmp_outcome,)
+                    tmp_new_states[tmp_new_state] = tmp_new_states.get(tmp_new_state, 0.0) + \
+                        tmp_probability * tmp_outcome_probability
+            tmp_tracked.append(tmp_group)
+
+            # groups that are not asked for and are not influential for any group left are summed out
+            tmp_still_needed = set(groups).union(*(self.loc_influential_groups.get(ins_group, ())
+                                                   for ins_group in tmp_order[tmp_position + 1:]))
+            tmp_keep = [ins_index for ins_index, ins_group in enumerate(tmp_tracked) if ins_group in tmp_still_needed]
+            tmp_states = {}
+            for tmp_state, tmp_probability in tmp_new_states.items():
+                tmp_state = tuple(tmp_state[ins_index] for ins_index in tmp_keep)
+                tmp_states[tmp_state] = tmp_states.get(tmp_state, 0.0) + tmp_probability
+            tmp_tracked = [tmp_tracked[ins_index] for ins_index in tmp_keep]
+            if len(tmp_states) > self.loc_limit:
+                raise ValueError(f'{len(tmp_states)} joint outcomes of {", ".join(tmp_tracked)} exceed limit')
+
+        tmp_positions = [tmp_tracked.index(ins_group) for ins_group in groups]
+        out_distribution = {}
+        for tmp_state, tmp_probability in tmp_states.items():
+            tmp_state = tuple(tmp_state[ins_position] for ins_position in tmp_positions)
+            out_distribution[tmp_state] = out_distribution.get(tmp_state, 0.0) + tmp_probability
+        self.loc_joint_distributions[tmp_key] = out_distribution
+        return dict(out_distribution)
+
+    def conditioned_distributions(self, group):
+        """
+        :param group: name of conditioned group
+        :return: dictionary of outcomes of influential groups and pair of their probability and dictionary of
+        parameters of group and probability that NPC gets them with those outcomes
+        """
+
+        tmp_influential_groups = self.loc_influential_groups.get(group, ())
+        tmp_presence = self.presence(group)
+        tmp_slot_distribution = self.slot_distribution(group)
+
+        out_distributions = {}
+        for tmp_state, tmp_probability in self.joint_distribution(tmp_influential_groups).items():
+            tmp_pool = self.pool(group, dict(zip(tmp_influential_groups, tmp_state)))
+            out_distributions[tmp_state] = (tmp_probability, {
+                ins_parameter: tmp_presence * ins_probability for ins_parameter, ins_probability in
+                self.selection_probabilities(tmp_pool, tmp_slot_distribution).items()})
+        return out_distributions
+
+    def target_conditions(self, targets):
+        """
+        :param targets: {group: parameter} of target parameters that are forced together
+        :return: dictionary of tuples with (group, parameter) of every influential group of conditioned targets and
+        probability of those parameters together with targets, parameter None means NPC does not have optional group
+        (influential groups are followed up to groups without conditions and are selected in same order as
+        NonPlayableCharacter selects them, outcomes with more than one parameter are left out because forcing them
+        does not give them back, so every outcome can be forced and gives every conditioned target chance above 0)
+        """
+
+        tmp_targets = {ins_group: (ins_parameter,) for ins_group, ins_parameter in targets.items()}
+        tmp_conditioned_targets = [ins_group for ins_group, _ in self.loc_npc.loc_conditioned_group_conditions
+                                   if ins_group in tmp_targets and ins_group in self.loc_influential_groups]
+
+        # influential groups that are not targets, influential groups of them too
+        tmp_needed = set()
+        tmp_stack = [ins_group for ins_target in tmp_conditioned_targets
+                     for ins_group in self.loc_influential_groups[ins_target]]
+        while tmp_stack:
+            tmp_group = tmp_stack.pop()
+            if tmp_group not in tmp_needed and tmp_group not in tmp_targets:
+                tmp_needed.add(tmp_group)
+                tmp_stack.extend(self.loc_influential_groups.get(tmp_group, ()))
+
+        tmp_order = [ins_group for ins_group in tmp_needed if ins_group not in self.loc_influential_groups]
+        tmp_order.sort(key=lambda ins_group: self.loc_groups.index(ins_group) if ins_group in self.loc_groups
+                       else len(self.loc_groups))
+        tmp_order += [ins_group for ins_group, _ in self.loc_npc.loc_conditioned_group_conditions
+                      if ins_group in tmp_needed and ins_group in self.loc_influential_groups]
+
+        tmp_states = {(): 1.0}
+        for tmp_position, tmp_group in enumerate(tmp_order):
+            tmp_new_states = {}
+            for tmp_state, tmp_probability in tmp_states.items():
+                tmp_outcomes = self.outcome_distribution(tmp_group, {**dict(zip(tmp_order, tmp_state)), **tmp_targets})
+                for tmp_outcome, tmp_outcome_probability in tmp_outcomes.items():
+                    # forced group keeps all its outcomes, they are summed out at the end
+                    if tmp_outcome_probability and (tmp_outcome is None or len(tmp_outcome) == 1
+                                                    or tmp_group in self.loc_force):
+                        tmp_new_states[tmp_state + (tmp_outcome,)] = tmp_probability * tmp_outcome_probability
+            tmp_states = tmp_new_states
+            if len(tmp_states) > self.loc_limit:
+                raise ValueError(f'{len(tmp_states)} joint outcomes of {", ".join(tmp_order[:tmp_position + 1])} '
+                                 f'exceed limit')
+
+        out_conditions = {}
+        for tmp_state, tmp_probability in tmp_states.items():
+            tmp_outcomes = {**dict(zip(tmp_order, tmp_state)), **tmp_targets}
+            for tmp_target in tmp_conditioned_targets:
+                tmp_probability *= self.selection_probabilities(self.pool(tmp_target, tmp_outcomes),
+                                                                self.slot_distribution(tmp_target)).get(
+                    targets[tmp_target], 0.0)
+            if tmp_probability:
+                tmp_condition = tuple((ins_group, None if ins_outcome is None else ins_outcome[0])
+                                      for ins_group, ins_outcome in zip(tmp_order, tmp_state)
+                                      if ins_group not in self.loc_force)
+                out_conditions[tmp_condition] = out_conditions.get(tmp_condition, 0.0) + tmp_probability
+        return out_conditions
+
+    def parameter_probabilities(self, group):
+        """
+        :param group: name of group
+        :return: dictionary of parameters of group and probability that NPC gets them (computed once for every
+        group, force is same for whole model)
+        """
+
+        if group in self.loc_parameter_probabilities:
+            return dict(self.loc_parameter_probabilities[group])
+
+        if group not in self.loc_influential_groups:
+            tmp_probabilities = self.selection_probabilities(self.pool(group), self.slot_distribution(group))
+            out_probabilities = {ins_parameter: self.presence(group) * ins_probability
+                                 for ins_parameter, ins_probability in tmp_probabilities.items()}
+        else:
+            out_probabilities = {}
+            for tmp_probability, tmp_parameters in self.conditioned_distributions(group).values():
+                for tmp_parameter, tmp_parameter_probability in tmp_parameters.items():
+                    out_probabilities[tmp_parameter] = out_probabilities.get(tmp_parameter, 0.0) + \
+                        tmp_probability * tmp_parameter_probability
+        self.loc_parameter_probabilities[group] = out_probabilities
+        return dict(out_probabilities)
+
+    def expected_multiplicity(self, group):
+        """
+        :param group: name of group
+        :return: expected number of parameters of NPC that has group
+        """
+
+        tmp_presence = self.presence(group)
+        if not tmp_presence:
+            return 0.0
+
+        if group not in self.loc_influential_groups:
+            tmp_states = {(): 1.0}
+        else:
+            tmp_states = self.joint_distribution(self.loc_influential_groups[group])
+        return sum(tmp_probability * ins_count * ins_probability / tmp_presence
+                   for tmp_state, tmp_probability in tmp_states.items()
+                   for ins_count, ins_probability in self.count_distribution(
+                       group, dict(zip(self.loc_influential_groups.get(group, ()), tmp_state))).items()
+                   if ins_count is not None)
+
+
+def format_non_playable_character(npc_data):
+    """
+    formats character scheat, the way it is printed and saved to save.txt
+
+    :param npc_data: list of groups ad parameters of nps or NonPlayableCharacterRecord
+    :return: string of character scheat
+    """
+
+    npc_data = list(npc_data)
+    tmp_max_group_length = max(len(ins_group[0]) for ins_group in npc_data) if npc_data else 10
+    tmp_string = '\n'
+
+    for tmp_group in npc_data:
+        tmp_formatted_params = ', '.join(tmp_group[1:])
+        tmp_string += f'{tmp_group[0]: <{tmp_max_group_length}}\t: {tmp_formatted_params} \n'
+
+    tmp_string += r'-' * 120 + '\n'
+    return tmp_string
+
+
+def print_non_playable_character(npc_data, print1=False, save=False):
+    """
+    prints out or saves character scheat
+
+    :param print1: if True print character scheat
+    :param save: if True save character scheat to save.txt
+    :param npc_data: list of groups ad parameters of nps
+    :return: printed or saved character scheat
+    """
+
+    try:
+        tmp_string = format_non_playable_character(npc_data)
+
+        if print1:
+            print(tmp_string)
+
+        if save:
+            with open('./save.txt', 'a', encoding='utf-8') as Save:
+                Save.write(tmp_string)
+    except TypeError:
+        print('no NPC detected')
+
+
+class NonPlayableCharacterSink(abc.ABC):
+    """
+    writes NPC-s into one file that stays open until sink is closed
+    (formatted NPC-s are collected and written in chunks, file is compressed with gzip if its name ends with '.gz',
+    new file gets its name only when sink is closed and sink left by exception is discarded)
+    """
 
-    out_groups_length = len(out_group_list)
+    def __init__(self, path, append=False, compress=None, chunk_size=1000):
+        """
+        :param path: path to output file, '-' writes to standard output
+        :param append: if True NPC-s are added at the end of existing file
+        :param compress: if True file is compressed with gzip, None decides by '.gz' at the end of path
+        :param chunk_size: number of NPC-s collected before they are written to file
+        """
 
-    # debug print output
-    # print(out_group_list, out_groups_length)
-    return out_group_list, out_groups_length
+        self.loc_path = path
+        self.loc_chunk_size = chunk_size
+        self.loc_chunk = []
+        self.loc_count = 0  # number of NPC-s written to sink
+
+        self.loc_append = append and os.path.exists(path) and os.path.getsize(path) > 0  # file already has NPC-s
+        # new file is written next to path and renamed when sink is closed, appended file is cut back to its size if
+        # sink is discarded, so sink that fails half way never leaves half of file at path
+        self.loc_write_path = path
+        self.loc_append_size = None
+        if path != '-' and append and os.path.exists(path):
+            self.loc_append_size = os.path.getsize(path)
+        elif path != '-':
+            self.loc_write_path = f'{path}.tmp'
+        tmp_mode = 'wt' if self.loc_append_size is None else 'at'
+
+        if path == '-':  # standard output, it is flushed but never closed
+            self.loc_file = sys.stdout
+        elif path.endswith('.gz') if compress is None else compress:
+            import gzip
+            self.loc_file = gzip.open(self.loc_write_path, tmp_mode, compresslevel=6, encoding='utf-8', newline='')
+        else:
+            self.loc_file = open(self.loc_write_path, tmp_mode, encoding='utf-8', newline='', buffering=1 << 20)
 
+    @abc.abstractmethod
+    def format(self, npc_data):
+        """
+        :param npc_data: list of groups and parameters of NPC or NonPlayableCharacterRecord
+        :return: string written to file for NPC
+        """
 
-def extract_list(inp_data, group_name, delimiter='__'):
-    """
-    extracts list of elements inside of group and stores it inside of list
-    (used to search document for certain group (Race) and returns all elements inside of it (dwarf, elf...))
+    def write(self, npc_data):
+        """
+        :param npc_data: list of groups and parameters of NPC or NonPlayableCharacterRecord
+        :return: NPC added to chunk, chunk is written when it is full
+        """
 
-    :param delimiter: Set of characters that define group set
-    :param inp_data: String of document from which list is extracted
-    :param group_name: Name of group for witch list is extracted
-    :return: list of all elements in the group and length of that group list
-    """
+        self.loc_chunk.append(self.format(npc_data))
+        self.loc_count += 1
+        if len(self.loc_chunk) >= self.loc_chunk_size:
+            self.flush()
 
-    # input data is string with delimiters
-    # _______________________________________
-    if type(inp_data) == str:
-        tmp_pattern = rf'{delimiter}{group_name}{delimiter}(\n.+\s*)*/end'
-        tmp_data = re.search(tmp_pattern, inp_data, flags=0)
-        tmp_database_list = list(tmp_data.group(0).split('\n'))
-        out_data_list = tmp_database_list[1:-1]
+    def write_many(self, npc_data_iterable):
+        """
+        :param npc_data_iterable: any iterable of NPC-s (NonPlayableCharacter.iter_many, NonPlayableCharacterBatch)
+        :return: number of NPC-s written
+        """
 
-    # input data is dictionary with keys
-    # _______________________________________
-    elif type(inp_data) == dict:
-        out_data_list = list(inp_data[group_name].split('\n'))
+        tmp_count = self.loc_count
+        for tmp_npc_data in npc_data_iterable:
+            self.write(tmp_npc_data)
+        return self.loc_count - tmp_count
 
-    # _______________________________________
-    else:
-        raise TypeError(f'Type of {inp_data} not possible to compile')
+    def flush(self):
+        """
+        :return: collected NPC-s written to file
+        """
 
-    out_data_list = [ins_element for ins_element in out_data_list if ins_element.strip()]
-    out_list_length = len(out_data_list)
+        if self.loc_chunk:
+            self.loc_file.write(''.join(self.loc_chunk))
+            self.loc_chunk = []
 
-    # debug print output
-    # print(out_data_list, out_list_length)
-    return out_data_list, out_list_length
+    def close(self):
+        """
+        :return: remaining NPC-s written and file closed
+        """
 
+        if not self.loc_file.closed:
+            self.flush()
+            if self.loc_file is sys.stdout:
+                self.loc_file.flush()
+            else:
+                self.loc_file.close()
+                if self.loc_write_path != self.loc_path:
+                    os.replace(self.loc_write_path, self.loc_path)
 
-def clean_special_groups(group):
-    """
-    subtracts unnecessary characters from parameter: such as _by_ , and all other _
-    than group all remaining words into list
+    def discard(self):
+        """
+        :return: NPC-s that were not written yet are dropped and file at path is left as it was before sink was opened
+        (NPC-s that were already written to standard output stay there)
+        """
 
-    :param group: Parameter from which unnecessary characters are subtracted
-    :return: List with group name and its specialties
-    """
+        self.loc_chunk = []
+        if self.loc_file is sys.stdout or self.loc_file.closed:
+            return
+        self.loc_file.close()
+        if self.loc_append_size is None:
+            os.remove(self.loc_write_path)
+        else:
+            os.truncate(self.loc_write_path, self.loc_append_size)
 
-    tmp_group_string = group.replace('_by_', ' ')
-    tmp_group_string = tmp_group_string.replace('_', ' ')
-    tmp_group_and_specialties = re.findall(r'\w+', tmp_group_string)
+    def __enter__(self):
+        return self
 
-    # debug print output
-    # print(tmp_group_and_specialties)
-    return tmp_group_and_specialties
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
 
 
-def generate_all_combinations_of_sublists(subgroup_parameters_list, group_name):
+class TextSink(NonPlayableCharacterSink):
     """
-    generates all possible combinations of subgroup name for given set of conditional parameters
+    character scheats, same as ones saved to save.txt
+    """
+
+    def format(self, npc_data):
+        return format_non_playable_character(npc_data)
 
-    :param group_name: name of group for which are made subgroup names
-    :param subgroup_parameters_list: list of conditional parameters for given group
-    :return: list of all possible subgroup names
+
+class JsonLinesSink(NonPlayableCharacterSink):
+    """
+    one json object per line, keys are groups and values are lists of their parameters
     """
 
-    out_subgroup_list = []
-    out_subgroup_specificy_rating_list = []
+    def __init__(self, path, append=False, compress=None, chunk_size=1000):
+        import json
 
-    # selects amount of parameters that will build subgroup
-    for tmp_num_of_groups in range(len(subgroup_parameters_list)):
-        # builds index list form list so that sublist can be called by its index
-        tmp_group_indexes_list = list(range(len(subgroup_parameters_list)))
+        super().__init__(path, append, compress, chunk_size)
+        self.loc_encoder = json.JSONEncoder(ensure_ascii=False)
 
-        # runs for every combination of groups dependent on for loop above
-        for tmp_comb_of_groups in itertools.combinations(tmp_group_indexes_list, (tmp_num_of_groups + 1)):
+    def format(self, npc_data):
+        return self.loc_encoder.encode({ins_group[0]: ins_group[1:] for ins_group in npc_data}) + '\n'
 
-            # list in which all combination of parameters for subgroup are listed
-            tmp_subgroup_parameters_list_copy = []
 
-            # selects all groups from current combination
-            for tmp_group_index in tmp_comb_of_groups:
-                tmp_subgroup_parameters_list_copy.append(subgroup_parameters_list[tmp_group_index])
+class CsvSink(NonPlayableCharacterSink):
+    """
+    one row per NPC and one column per group, group with more parameters has them joined with ', ',
+    columns are taken from batch or first NPC if they are not given (first NPC may miss optional groups, so
+    groups of database should be given when NPC-s come one by one)
+    """
 
-            # generates list with all parameters from current combination
-            for tmp_subgroup_block in itertools.product(*tmp_subgroup_parameters_list_copy):
+    def __init__(self, path, append=False, compress=None, chunk_size=1000, groups=None):
+        """
+        :param groups: list of column groups, groups that NPC does not have are left empty and ones that are not
+        in list are not written
+        """
 
-                tmp_list = []
-                for tmp_parameter_index in range(len(tmp_subgroup_block)):
-                    tmp_list.append(tmp_subgroup_block[tmp_parameter_index])
-                out_subgroup_list.append(tmp_list)
-                out_subgroup_specificy_rating_list.append(len(tmp_list))
+        import csv
+        import io
 
-    for tmp_subgroup_index in range(len(out_subgroup_list)):
-        out_subgroup_list[tmp_subgroup_index] = ''.join(out_subgroup_list[tmp_subgroup_index]) + group_name
+        super().__init__(path, append, compress, chunk_size)
+        self.loc_groups = groups
+        self.loc_row_buffer = io.StringIO()
+        self.loc_csv_writer = csv.writer(self.loc_row_buffer)
 
-    # debug print output
-    # print(out_subgroup_list, out_subgroup_specificy_rating_list)
-    return out_subgroup_list, out_subgroup_specificy_rating_list
+    def write_many(self, npc_data_iterable):
+        if self.loc_groups is None and isinstance(npc_data_iterable, NonPlayableCharacterBatch):
+            self.loc_groups = list(npc_data_iterable.loc_groups)
+        return super().write_many(npc_data_iterable)
 
+    def format(self, npc_data):
+        tmp_parameters = {ins_group[0]: ', '.join(ins_group[1:]) for ins_group in npc_data}
+        if self.loc_groups is None:
+            self.loc_groups = list(tmp_parameters)
 
-def merge_rarity_lists(base_list, added_list):
-    """
-    merge two lists, if one parameter is in both lists it takes rarity class form added_list
+        # header is written before first row of new file
+        if self.loc_count == 0 and not self.loc_append:
+            self.loc_csv_writer.writerow(self.loc_groups)
+        self.loc_csv_writer.writerow([tmp_parameters.get(ins_group, '') for ins_group in self.loc_groups])
 
-    :param base_list: list to which parameters are added
-    :param added_list: list from which parameters are added
-    :return: list that have parameters from both lists with rarity class prioritized by added_list
-    """
+        out_rows = self.loc_row_buffer.getvalue()
+        self.loc_row_buffer.seek(0)
+        self.loc_row_buffer.truncate()
+        return out_rows
 
-    tmp_active_list = base_list + added_list
 
-    for tmp_counter_base_list in range(len(base_list)):
-        for tmp_counter_added_list in range(len(added_list)):
+global_sink_formats = {'text': TextSink, 'jsonl': JsonLinesSink, 'csv': CsvSink}
 
-            # find rarity class of all parameters
-            tmp_pattern = re.compile(r'(\(\w{1,3}\))$')
-            tmp_base_list_rarity = re.findall(tmp_pattern, base_list[tmp_counter_base_list])
-            tmp_added_list_rarity = re.findall(tmp_pattern, added_list[tmp_counter_added_list])
 
-            # remove rarity class from parameter string
-            try:
-                tmp_base_list_element = base_list[tmp_counter_base_list].replace(tmp_base_list_rarity[0], '')
-            except IndexError:
-                tmp_base_list_element = base_list[tmp_counter_base_list]
-            try:
-                tmp_added_list_element = added_list[tmp_counter_added_list].replace(tmp_added_list_rarity[0], '')
-            except IndexError:
-                tmp_added_list_element = added_list[tmp_counter_added_list]
+def open_sink(path, output_format=None, append=False, compress=None, chunk_size=1000, groups=None):
+    """
+    :param path: path to output file
+    :param output_format: 'text', 'jsonl' or 'csv', None decides by extension of path ('.txt', '.jsonl', '.csv',
+    each of them can end with '.gz')
+    :param append: if True NPC-s are added at the end of existing file
+    :param compress: if True file is compressed with gzip, None decides by '.gz' at the end of path
+    :param chunk_size: number of NPC-s collected before they are written to file
+    :param groups: columns of csv file, usually groups of database
+    :return: NonPlayableCharacterSink
+    """
 
-            # if there are multiple of the same parameter replace one in base list with the new one
-            if tmp_base_list_element == tmp_added_list_element:
-                tmp_active_list[tmp_counter_base_list] = added_list[tmp_counter_added_list]
+    if output_format is None:
+        tmp_extension = os.path.splitext(path[:-3] if path.endswith('.gz') else path)[1].lstrip('.')
+        output_format = {'txt': 'text', 'json': 'jsonl', 'ndjson': 'jsonl'}.get(tmp_extension, tmp_extension)
+    try:
+        tmp_sink = global_sink_formats[output_format]
+    except KeyError:
+        raise ValueError(f'unknown output format {output_format}, try one of {", ".join(global_sink_formats)}')
+    if tmp_sink is CsvSink:
+        return CsvSink(path, append, compress, chunk_size, groups)
+    return tmp_sink(path, append, compress, chunk_size)
 
-    # remove duplicates from the list
-    out_new_list = list(dict.fromkeys(set(tmp_active_list)))
-    # debug print output
-    # print(out_new_list)
-    return out_new_list
 
+def npc_to_json_object(npc_data):
+    """
+    :param npc_data: list of groups and parameters of NPC or NonPlayableCharacterRecord
+    :return: dictionary of groups and lists of their parameters, same as one line of JsonLinesSink
+    """
 
-class NonPlayableCharacter:
+    return {ins_group[0]: ins_group[1:] for ins_group in npc_data}
 
-    def __init__(self):
-        # defining local variables
-        self.loc_all_groups_list = extract_groups(Database)[0]
-        self.loc_special_groups = extract_groups(Config)
 
-        # variables used for options inside of config.txt file
-        # _______________________________________
-        self.loc_rarity_classes = extract_list(Config, self.loc_special_groups[0][0])
-        self.loc_optional_groups = extract_list(Config, self.loc_special_groups[0][1])
-        self.loc_multiple_groups = extract_list(Config, self.loc_special_groups[0][2])
-        self.loc_conditioned_groups = extract_list(Config, self.loc_special_groups[0][3])
+def generate_json_shard(n, force, seed):
+    """
+    generates one shard of batch for GenerationService inside of worker process, NPC-s are encoded to json there
+    so that large batch is not encoded by event loop
 
-        self.loc_all_rarity_classes = []
+    :param n: number of NPC-s in shard
+    :param force: forced parameters used for every NPC
+    :param seed: seed of shard
+    :return: json objects of NPC-s separated with ','
+    """
 
-    # functions used for options inside of config.txt file
-    # _______________________________________
-    def rarity_classes(self, list_rarity_classes=False, get_rarity_corrected_list=False, group=None):
-        """
-        reads config.txt and connects rarity class defined in it with percentage given for it
-        modifies given group or list in accordance to parameter rarity class for each parameter
+    import json
 
-        :param list_rarity_classes: if True reads config.txt and learns rarity classes
-        :param get_rarity_corrected_list: if True modifies parameter list
-        :param group: name of group or list for witch parameters are modified
-        :return: list of parameters modified in accordance to their rarity class with
-        """
+    return ','.join(json.dumps(npc_to_json_object(ins_npc_data), ensure_ascii=False)
+                    for ins_npc_data in global_worker_npc.iter_many(n, force, seed))
 
-        if list_rarity_classes:
-            # all rarity classes are sorted in list with their percentage of occurring
 
-            for tmp_rarity in self.loc_rarity_classes[0]:
-                try:
-                    self.loc_all_rarity_classes.append([clean_special_groups(tmp_rarity)[0],
-                                                        int(clean_special_groups(tmp_rarity)[1])])
-                except ValueError:
-                    pass
+def latency_percentiles(latencies):
+    """
+    :param latencies: latencies in seconds
+    :return: dictionary with number of latencies and their p50, p99 and max in milliseconds
+    """
 
-        if get_rarity_corrected_list:
+    tmp_sorted = sorted(latencies)
+    if not tmp_sorted:
+        return {'count': 0}
+    return {'count': len(tmp_sorted),
+            'p50_ms': round(tmp_sorted[(len(tmp_sorted) - 1) // 2] * 1000, 3),
+            'p99_ms': round(tmp_sorted[min(len(tmp_sorted) * 99 // 100, len(tmp_sorted) - 1)] * 1000, 3),
+            'max_ms': round(tmp_sorted[-1] * 1000, 3)}
 
-            tmp_all_active_parameters = []
 
-            # check if input was database group or regular list
-            if type(group) == str:
-                try:
-                    tmp_all_parameters_from_group = extract_list(Database, group)[0]
-                except AttributeError:
-                    tmp_all_parameters_from_group = []
-                except KeyError:
-                    tmp_all_parameters_from_group = []
-            else:
-                tmp_all_parameters_from_group = group
+def parse_service_options(query, body):
+    """
+    reads options of request to GenerationService, from query or from json body
 
-            # for every parameter in group check its rarity class and base on its chance to occur in active list,
-            # form active lis of parameters
-            for tmp_parameter in tmp_all_parameters_from_group:
+    :param query: dictionary of query parameters and lists of their values
+    :param body: json body of request or None
+    :return: forced parameters, seed and n of request, raises ValueError if they are not valid
+    """
 
-                tmp_str_to_remove = ''
-                tmp_pattern = re.compile(r'(\(\w{1,3}\))$')
-                # extract rarity class  from parameter
-                try:
-                    tmp_rarity_class_str = re.findall(tmp_pattern, tmp_parameter)[0]
-                    tmp_str_to_remove = tmp_rarity_class_str
-                    tmp_rarity_class_str = tmp_rarity_class_str.replace('(', '')
-                    tmp_rarity_class_str = tmp_rarity_class_str.replace(')', '')
-                except IndexError:
-                    tmp_rarity_class_str = ''
-
-                # search if that rarity class is defined
-                try:
-                    tmp_rarity_class_index = [ins_rarity[0] for ins_rarity in self.loc_all_rarity_classes] \
-                        .index(tmp_rarity_class_str)
-                    tmp_rarity_class_int = self.loc_all_rarity_classes[tmp_rarity_class_index][1]
-                except ValueError:
-                    # check if rarity class is integer
-                    try:
-                        tmp_rarity_class_int = int(tmp_rarity_class_str)
-                    # if not give it 100% chance of occurring
-                    except ValueError:
-                        tmp_rarity_class_int = 100
+    tmp_force = [ins_force.split('=') for ins_force in query.get('force', [])]
+    tmp_seed = query.get('seed', [None])[-1]
+    tmp_n = query.get('n', ['1'])[-1]
+
+    if body:
+        if not isinstance(body, dict):
+            raise ValueError('body must be json object')
+        tmp_body_force = body.get('force', [])
+        if isinstance(tmp_body_force, dict):
+            tmp_body_force = [[ins_group] + (ins_parameters if isinstance(ins_parameters, list)
+                                             else [ins_parameters])
+                              for ins_group, ins_parameters in tmp_body_force.items()]
+        if not isinstance(tmp_body_force, list):
+            raise ValueError('force must be list or json object')
+        tmp_force += tmp_body_force
+        tmp_seed = body.get('seed', tmp_seed)
+        tmp_n = body.get('n', tmp_n)
+
+    for tmp_forced_group in tmp_force:
+        if not isinstance(tmp_forced_group, list) or len(tmp_forced_group) < 2 or not tmp_forced_group[0] \
+                or not all(isinstance(ins_part, str) for ins_part in tmp_forced_group):
+            raise ValueError(f'force {tmp_forced_group} must be GROUP=PARAMETER')
+    if isinstance(tmp_seed, str) and tmp_seed.lstrip('-').isdigit():
+        tmp_seed = int(tmp_seed)
+    elif tmp_seed is not None and type(tmp_seed) not in (int, str):
+        raise ValueError('seed must be number or string')
+    try:
+        tmp_n = int(tmp_n)
+    except (TypeError, ValueError):
+        raise ValueError('n must be number')
+    return tmp_force, tmp_seed, tmp_n
 
-                if tmp_rarity_class_int >= random.randint(1, 100):
-                    tmp_all_active_parameters.append(tmp_parameter.replace(tmp_str_to_remove, ''))
 
-            return tmp_all_active_parameters
+class GenerationService:
+    """
+    local http service that keeps compiled plan in memory and generates NPC-s as json
+    (single NPC-s are generated on event loop, batches are generated by one thread with its own NPC generator and
+    large batches are split into shards for worker processes, so event loop keeps answering other requests)
+
+    GET /npc?force=Race=Elf&seed=7            one NPC
+    GET /npc/batch?n=100&force=Race=Elf       list of NPC-s, force, n and seed can also be in json body of POST
+    GET /groups                               list of groups
+    GET /groups/{group}                       parameters and conditioned groups of group
+    GET /groups/{group}/{subgroup}            parameters of conditioned group
+    GET /stats                                p50 and p99 latency of every route
+    """
 
-    def optional_groups(self):
+    def __init__(self, plan, workers=None, offload_size=1000, batch_limit=1000000):
         """
-        check for optional groups and subtract unlucky ones from total parameter list
-
-        :return: list of groups from witch are excluded unlucky groups
+        :param plan: GenerationPlan
+        :param workers: number of worker processes for large batches, default is number of CPU-s
+        :param offload_size: batches with more NPC-s are generated by worker processes, smaller ones by batch thread
+        :param batch_limit: the largest batch that is generated
         """
 
-        # input [[group, ''], [group_2, ''], [group_3, ''], ... ]
-        # output [[group, ''], [group_3, ''], ... ]
+        import collections
 
-        for tmp_parameter in self.loc_optional_groups[0]:
-            # input Fear_by_80
+        self.loc_plan = plan
+        self.loc_npc = NonPlayableCharacter(plan)
+        self.loc_batch_npc = NonPlayableCharacter(plan)  # used only by batch thread, one batch at a time
+        self.loc_batch_thread = None  # started with first batch
+        self.loc_workers = max(workers or os.cpu_count() or 1, 1)
+        self.loc_offload_size = offload_size
+        self.loc_batch_limit = batch_limit
+        self.loc_executor = None  # worker processes are started with first large batch
+        self.loc_latencies = collections.defaultdict(lambda: collections.deque(maxlen=10000))  # {route: latencies}
 
-            tmp_optional_group = clean_special_groups(tmp_parameter)
-            # ['Fear', '80']
-            tmp_optional_group_chance = random.randint(1, 100)
+    def executor(self):
+        """
+        :return: pool of worker processes, each of them has NPC generator of plan
+        """
 
-            # remove group from loc_groups_and_parameters_list if tmp_optional_group_chance
-            # is less then chance specified in config.txt
-            if int(tmp_optional_group[1]) <= tmp_optional_group_chance:
-                try:
-                    self.loc_groups_and_parameters_list.remove([tmp_optional_group[0], ''])
-                except ValueError:
-                    pass
-                try:
-                    self.loc_all_active_groups.remove(tmp_optional_group[0])
-                except ValueError:
-                    pass
+        if self.loc_executor is None:
+            import concurrent.futures
+            import multiprocessing
 
-    def multiple_groups(self):
-        """
-        check for groups that have multiple parameters than adds parameters in accordance to config file
+            tmp_context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods()
+                                                      else 'spawn')
+            self.loc_executor = concurrent.futures.ProcessPoolExecutor(
+                self.loc_workers, mp_context=tmp_context, initializer=init_generation_worker,
+                initargs=(self.loc_plan,))
+        return self.loc_executor
 
-        :return: added empty parameters to groups that deserve them
+    def batch_thread(self):
+        """
+        :return: executor with one thread that generates batches with loc_batch_npc
         """
 
-        # input [[group, ''], [group_2, ''], [group_3, ''], ... ]
-        # output [[group, '', ''], [group_2, '', '', ''], [group_3, ''], ... ]
+        if self.loc_batch_thread is None:
+            import concurrent.futures
 
-        for tmp_parameter in self.loc_multiple_groups[0]:
-            # input Race_by_20_min1max2
+            self.loc_batch_thread = concurrent.futures.ThreadPoolExecutor(1)
+        return self.loc_batch_thread
 
-            tmp_multiple_group = clean_special_groups(tmp_parameter)
-            # ['Race', '20', 'min1max2']
-            # get range in which can be amount of parameters in group
-            tmp_multiple_parameter_range = [int(n) for n in re.findall(r'\d+', tmp_multiple_group[2])]
+    def close(self):
+        """
+        :return: worker processes and batch thread shut down
+        """
 
-            # count how many times will that parameter appear
-            tmp_parameter_counter = tmp_multiple_parameter_range[0]
+        if self.loc_executor is not None:
+            self.loc_executor.shutdown(cancel_futures=True)
+            self.loc_executor = None
+        if self.loc_batch_thread is not None:
+            self.loc_batch_thread.shutdown(cancel_futures=True)
+            self.loc_batch_thread = None
 
-            tmp_optional_group_chance = random.randint(1, 100)
-            tmp_counter = 0
-            while (tmp_counter < (tmp_multiple_parameter_range[1] - tmp_multiple_parameter_range[0])) \
-                    and (int(tmp_multiple_group[1]) >= tmp_optional_group_chance):
-                tmp_parameter_counter += 1
-                tmp_counter += 1
-                tmp_optional_group_chance = random.randint(1, 100)
+    def batch_json(self, n, force, seed):
+        """
+        runs in batch thread
 
-            # this is new list that will be substituted in place of old group parameter list
-            tmp_multiple_parameter = [tmp_multiple_group[0]] + [''] * tmp_parameter_counter
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC
+        :param seed: seed of batch or None
+        :return: json list of NPC-s
+        """
 
-            # if group is in group set than exchange its amount of parameters with new set
-            try:
-                tmp_groups_and_parameters_list = [ins_group[0] for ins_group in self.loc_groups_and_parameters_list]
-                tmp_index = tmp_groups_and_parameters_list.index(tmp_multiple_group[0])
+        import json
 
-                self.loc_groups_and_parameters_list[tmp_index] = tmp_multiple_parameter
-            except ValueError:
-                pass
+        return json.dumps([npc_to_json_object(ins_npc_data)
+                           for ins_npc_data in self.loc_batch_npc.iter_many(n, force, seed)], ensure_ascii=False)
 
-    def conditioned_groups(self, list_conditioned_groups=False, select_conditioned_parameters=False):
+    async def generate_batch(self, n, force, seed):
         """
-        checks for conditioned groups and removes tam from normal set of groups then after
-        all unconditioned groups are selected, checks if any of possible conditioned groups exists
-        if so adds them to choosing pool
-
-        :param list_conditioned_groups: if True removes conditioned group from normal set of groups
-        :param select_conditioned_parameters: if True selects parameters from any existing conditioned group
-        :return: list of all groups that are not conditioned and selects parameters for conditioned groups
+        :param n: number of NPC-s
+        :param force: forced parameters used for every NPC
+        :param seed: seed of batch, None draws it
+        :return: json list of NPC-s
         """
 
-        for tmp_group in self.loc_conditioned_groups[0]:
-            # input Name_by_Sex_Race
-            tmp_group_and_subgroups = clean_special_groups(tmp_group)
-            # ['Name', 'Sex', 'Race']
-            tmp_active_group = tmp_group_and_subgroups[0]
-            tmp_active_subgroups = tmp_group_and_subgroups[1:]
+        import asyncio
 
-            if list_conditioned_groups:
-                try:
-                    self.loc_all_active_groups.remove(tmp_active_group)
-                except ValueError:
-                    pass
+        tmp_loop = asyncio.get_running_loop()
+        if n <= self.loc_offload_size:
+            # batch thread has its own generator, so single NPC-s on event loop do not share random source with it
+            return await tmp_loop.run_in_executor(self.batch_thread(), self.batch_json, n, force, seed)
 
-            if select_conditioned_parameters:
+        # shards have seeds derived from seed of batch, like in NonPlayableCharacter.generate_parallel
+        if seed is None:
+            seed = self.loc_npc.loc_random.below(2 ** 63)
+        tmp_shards = max(min(self.loc_workers, n // self.loc_offload_size), 1)
+        tmp_shard_sizes = [n // tmp_shards + (ins_shard < n % tmp_shards) for ins_shard in range(tmp_shards)]
+        tmp_parts = await asyncio.gather(*(
+            tmp_loop.run_in_executor(self.executor(), generate_json_shard, ins_size, force, f'{seed}/{ins_shard}')
+            for ins_shard, ins_size in enumerate(tmp_shard_sizes)))
+        return '[' + ','.join(ins_part for ins_part in tmp_parts if ins_part) + ']'
+
+    async def handle_request(self, method, path, query, body):
+        """
+        :param method: http method
+        :param path: path of request without query
+        :param query: dictionary of query parameters and lists of their values
+        :param body: json body of request or None
+        :return: route for latency statistics, http status and json response
+        """
 
-                # standard parameters for conditioned group
-                # tmp_all_active_parameters = extract_list(Database, tmp_active_group)[0]
-                tmp_all_active_parameters = []
-                tmp_subgroup_parameters_list = []
+        import json
+        import urllib.parse
 
-                for tmp_subgroup in tmp_active_subgroups:
+        tmp_parts = [urllib.parse.unquote(ins_part) for ins_part in path.strip('/').split('/')]
+        tmp_database = self.loc_plan.loc_database
 
-                    try:
-                        tmp_subgroup_index = [ins_subgroup[0] for ins_subgroup in self.loc_groups_and_parameters_list] \
-                            .index(tmp_subgroup)
-                        tmp_subgroup_parameters_list.append(self.loc_groups_and_parameters_list[tmp_subgroup_index][1:])
-                    except ValueError:
-                        pass
-
-                tmp_database = None
-
-                # Database is string
-                # _______________________________________
-                if type(Database) == str:
-                    tmp_database = Database
-
-                # Database is directory
-                # _______________________________________
-                elif type(Database) == dict:
-                    tmp_database_path = f'{global_database_path}/{tmp_active_group}'
-                    try:
-                        tmp_database = load_files(tmp_database_path)
-                    except UnboundLocalError:
-                        print(f'Directory {tmp_database_path} not found')
-                        pass
+        if method not in ('GET', 'POST'):
+            return 'other', 405, json.dumps({'error': f'method {method} is not allowed'})
 
-                # _______________________________________
+        if tmp_parts in (['npc'], ['npc', 'batch']):
+            tmp_route = '/' + '/'.join(tmp_parts)
+            try:
+                tmp_force, tmp_seed, tmp_n = parse_service_options(query, body)
+                # generator is shared by all requests, group that is not in database would stay in its groups
+                tmp_unknown_groups = {ins_force[0] for ins_force in tmp_force} - set(tmp_database.group_names())
+                if tmp_unknown_groups:
+                    raise ValueError(f'group {", ".join(sorted(tmp_unknown_groups))} not in database')
+                if tmp_route == '/npc':
+                    tmp_previous_random = self.loc_npc.loc_random
+                    if tmp_seed is not None:
+                        self.loc_npc.loc_random = RandomSource(tmp_seed)
+                    try:
+                        tmp_npc_record = self.loc_npc.generate_record(tmp_force)
+                    finally:
+                        self.loc_npc.loc_random = tmp_previous_random
+                    return tmp_route, 200, json.dumps(npc_to_json_object(tmp_npc_record), ensure_ascii=False)
+                if not 0 <= tmp_n <= self.loc_batch_limit:
+                    raise ValueError(f'n must be from 0 to {self.loc_batch_limit}')
+                return tmp_route, 200, await self.generate_batch(tmp_n, tmp_force, tmp_seed)
+            except ValueError as tmp_error:
+                return tmp_route, 400, json.dumps({'error': str(tmp_error)})
+
+        if tmp_parts[0] == 'groups' and len(tmp_parts) <= 3:
+            # same lists as list command of console
+            tmp_route = ('/groups', '/groups/{group}', '/groups/{group}/{subgroup}')[len(tmp_parts) - 1]
+            try:
+                if len(tmp_parts) == 1:
+                    tmp_response = tmp_database.group_names()
+                elif len(tmp_parts) == 2:
+                    tmp_response = {'parameters': list(tmp_database.group(tmp_parts[1])),
+                                    'subgroups': tmp_database.subgroup_names(tmp_parts[1])}
                 else:
-                    raise TypeError(f'Type of {Database} not possible to compile')
-
-                tmp_subgroup_with_specificy_list = []
-                tmp_subgroup_with_specificy_list += (generate_all_combinations_of_sublists
-                                                     (tmp_subgroup_parameters_list, tmp_active_group))
-
-                for tmp_specificy in range(max(tmp_subgroup_with_specificy_list[1]), -1, -1):
-
-                    if not tmp_all_active_parameters:
-                        # if subgroups exist
-                        # _______________________________________
-                        if tmp_specificy >= 1:
-                            tmp_subgroup_list = [tmp_subgroup_with_specificy_list[0][ins_subgroup]
-                                                 for ins_subgroup in [ins_specificy for ins_specificy, ins_element
-                                                                      in enumerate(tmp_subgroup_with_specificy_list[1])
-                                                                      if ins_element == tmp_specificy]]
-
-                            for tmp_subgroup2 in tmp_subgroup_list:
-
-                                try:  # try to grab data for subgroup
-                                    tmp_subgroup_parameters = extract_list(tmp_database, tmp_subgroup2, '==')[0]
-                                    tmp_all_active_parameters = \
-                                        merge_rarity_lists(tmp_all_active_parameters, tmp_subgroup_parameters)
-                                except AttributeError:
-                                    # there is no subgroup with that name (legacy for '.txt' database)
-                                    pass
-                                except KeyError:  # there is no subgroup with that name in database directory
-                                    # print(f'File {tmp_subgroup2} not found in{tmp_database}')
-                                    try:  # check if name of subgroup is writen with underscore instead of space
-                                        tmp_subgroup_parameters = \
-                                            extract_list(tmp_database, tmp_subgroup2.replace(' ', r'_'), '==')[0]
-                                        tmp_all_active_parameters = \
-                                            merge_rarity_lists(tmp_all_active_parameters, tmp_subgroup_parameters)
-                                    except KeyError:  # there is no data for subgroup (database as directory)
-                                        # print(f'File {tmp_subgroup2} not found in{tmp_database_path}')
-                                        pass
-
-                        # id no subgroup was found
-                        # _______________________________________
-                        elif tmp_specificy <= 0:
-                            tmp_all_active_parameters = extract_list(Database, tmp_active_group)[0]
-
-                tmp_all_active_parameters = [ins_parameter for ins_parameter in tmp_all_active_parameters
-                                             if ins_parameter.strip()]
-
-                # print(tmp_all_active_parameters)
-                self.select_parameter_for_groups([tmp_active_group], tmp_all_active_parameters)
+                    tmp_response = list(tmp_database.subgroup(tmp_parts[1], tmp_parts[2]))
+            except KeyError:
+                return tmp_route, 404, json.dumps({'error': f'group {"/".join(tmp_parts[1:])} not found'})
+            return tmp_route, 200, json.dumps(tmp_response, ensure_ascii=False)
 
-    # _______________________________________
+        if tmp_parts == ['stats']:
+            return '/stats', 200, json.dumps({ins_route: latency_percentiles(ins_latencies)
+                                              for ins_route, ins_latencies in self.loc_latencies.items()})
 
-    def select_parameter_for_groups(self, active_groups=None, active_parameters=None):
-        """
-        used to select parameter for group
+        return 'other', 404, json.dumps({'error': f'{path} not found'})
 
-        :param active_groups: either single group name or list of groups
-        :param active_parameters: either reads from database or list of parameters
-        :return: list of groups with selected parameter
+    async def handle_connection(self, reader, writer):
         """
+        reads http requests of one connection and answers them, connection is kept open between requests
+        unless client asks to close it
 
-        # default active_groups are ones which characteristics are not change with other functions
-        if active_groups is None:
-            active_groups = self.loc_all_active_groups
-
-        for tmp_group in active_groups:
-
-            # default active_parameters are ones for active_group
-            if active_parameters is None:
-                tmp_all_active_parameters = self.rarity_classes(False, True, tmp_group)
-            else:
-                tmp_all_active_parameters = self.rarity_classes(False, True, active_parameters)
-
-            tmp_num_of_active_parameters = len(tmp_all_active_parameters)
-            tmp_all_random_chances = []
+        :param reader: asyncio.StreamReader of connection
+        :param writer: asyncio.StreamWriter of connection
+        :return: answered requests
+        """
 
-            tmp_group_index = [ins_group_to_find[0] for ins_group_to_find in self.loc_groups_and_parameters_list] \
-                .index(tmp_group)
+        import asyncio
+        import json
+        import time
+        import urllib.parse
 
-            tmp_parameter_index = 0
+        try:
+            while True:
+                tmp_request_line = await reader.readline()
+                if not tmp_request_line.strip():
+                    break
+                tmp_start = time.perf_counter()
+
+                tmp_headers = {}
+                while True:
+                    tmp_header_line = await reader.readline()
+                    if not tmp_header_line.strip():
+                        break
+                    tmp_name, _, tmp_value = tmp_header_line.decode('latin-1').partition(':')
+                    tmp_headers[tmp_name.strip().lower()] = tmp_value.strip()
 
-            # for every element in sublist check for empty string, than replace it with random parameter
-            for tmp_parameter in self.loc_groups_and_parameters_list[tmp_group_index]:
+                try:
+                    tmp_method, tmp_target, tmp_version = tmp_request_line.decode('latin-1').split()
+                    tmp_body_bytes = await reader.readexactly(int(tmp_headers.get('content-length', 0)))
+                    tmp_body = json.loads(tmp_body_bytes) if tmp_body_bytes.strip() else None
+                except (ValueError, asyncio.IncompleteReadError):
+                    tmp_route, tmp_status, tmp_response = 'other', 400, json.dumps({'error': 'bad request'})
+                    tmp_version = 'HTTP/1.0'
+                else:
+                    tmp_url = urllib.parse.urlsplit(tmp_target)
+                    tmp_route, tmp_status, tmp_response = await self.handle_request(
+                        tmp_method.upper(), tmp_url.path, urllib.parse.parse_qs(tmp_url.query), tmp_body)
+
+                tmp_keep_alive = tmp_version == 'HTTP/1.1' and tmp_headers.get('connection', '').lower() != 'close'
+                tmp_response_bytes = tmp_response.encode('utf-8')
+                writer.write(f'HTTP/1.1 {tmp_status} {global_http_reasons.get(tmp_status, "")}\r\n'
+                             f'Content-Type: application/json; charset=utf-8\r\n'
+                             f'Content-Length: {len(tmp_response_bytes)}\r\n'
+                             f'Connection: {"keep-alive" if tmp_keep_alive else "close"}\r\n\r\n'
+                             .encode('latin-1') + tmp_response_bytes)
+                await writer.drain()
+                self.loc_latencies[tmp_route].append(time.perf_counter() - tmp_start)
+
+                if not tmp_keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # client went away or sent line that is too long
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080, ready=None):
+        """
+        :param host: address on which service listens, default is only local machine
+        :param port: port on which service listens, 0 picks free port
+        :param ready: function called with port when service is listening
+        :return: service that runs until it is cancelled
+        """
 
-                if tmp_parameter == '' and tmp_parameter_index <= tmp_num_of_active_parameters:
-                    # ensures that no single parameter will occur more than once
-                    tmp_parameter_chance = random.randint(0, tmp_num_of_active_parameters - 1)
-                    while tmp_parameter_chance in tmp_all_random_chances:
-                        tmp_parameter_chance = random.randint(0, tmp_num_of_active_parameters - 1)
+        import asyncio
 
-                    tmp_all_random_chances.append(tmp_parameter_chance)
+        tmp_server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready is not None:
+            ready(tmp_server.sockets[0].getsockname()[1])
+        try:
+            async with tmp_server:
+                await tmp_server.serve_forever()
+        finally:
+            self.close()
 
-                    self.loc_groups_and_parameters_list[tmp_group_index][tmp_parameter_index] = \
-                        tmp_all_active_parameters[tmp_parameter_chance]
 
-                tmp_parameter_index += 1
+def parse_arguments(argv):
+    """
+    :param argv: command line arguments without name of program
+    :return: parsed arguments, exits with usage message if they are not valid
+    """
 
-            self.loc_groups_and_parameters_list[tmp_group_index] = \
-                [ins_parameter for ins_parameter in self.loc_groups_and_parameters_list[tmp_group_index] if
-                 ins_parameter not in ['']]
+    import argparse
+
+    tmp_parser = argparse.ArgumentParser(prog='main.py', description='NPC generator, without arguments it starts '
+                                                                      'interactive console')
+    tmp_subparsers = tmp_parser.add_subparsers(dest='command', required=True)
+
+    tmp_generate_parser = tmp_subparsers.add_parser('generate', help='generate NPC-s into file or standard output')
+    tmp_generate_parser.add_argument('-n', '--count', type=int, help='number of NPC-s (default 1, with --target sum '
+                                                                    'of target counts)')
+    tmp_generate_parser.add_argument('-f', '--force', action='append', default=[], metavar='GROUP=PARAMETER',
+                                     help='force parameter to every NPC for certain group, can be repeated')
+    tmp_generate_parser.add_argument('-t', '--target', action='append', default=[],
+                                     metavar='GROUP=PARAMETER:WEIGHT',
+                                     help='exact share of NPC-s with parameter, weights of group are counts or ratios, '
+                                          'empty parameter means NPC without optional group, can be repeated')
+    tmp_generate_parser.add_argument('-s', '--seed', help='seed of NPC-s, same seed gives same NPC-s')
+    tmp_generate_parser.add_argument('--format', choices=list(global_sink_formats),
+                                     help='output format (default from extension of --out, text for output)')
+    tmp_generate_parser.add_argument('-w', '--workers', type=int, default=1,
+                                     help='number of worker processes (default 1)')
+    tmp_generate_parser.add_argument('-o', '--out', default='-', help='output file, can end with .gz '
+                                                                      '(default standard output)')
+    tmp_generate_parser.add_argument('--append', action='store_true', help='add NPC-s at the end of output file')
+    tmp_generate_parser.add_argument('-u', '--unique', action='store_true',
+                                     help='no two NPC-s are the same, fails if config can not make that many')
+    tmp_generate_parser.add_argument('--vectorized', action='store_true',
+                                     help='generate whole population at once with numpy, same distributions but '
+                                          'different NPC-s for same seed')
+    tmp_generate_parser.add_argument('--stats', action='store_true',
+                                     help='print time of every stage of generation and counters to standard error '
+                                          '(stages are timed only without --workers and --vectorized)')
+
+    tmp_serve_parser = tmp_subparsers.add_parser('serve', help='serve NPC-s as json over local http')
+    tmp_serve_parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default 127.0.0.1)')
+    tmp_serve_parser.add_argument('-p', '--port', type=int, default=8080, help='port to listen on (default 8080)')
+    tmp_serve_parser.add_argument('-w', '--workers', type=int, default=None,
+                                  help='number of worker processes for large batches (default number of CPU-s)')
+
+    for tmp_subparser in (tmp_generate_parser, tmp_serve_parser):
+        tmp_subparser.add_argument('--config', default=global_config_path, help='path to config.txt')
+        tmp_subparser.add_argument('--database', default=global_database_path, help='path to database')
+        tmp_subparser.add_argument('--image', default=global_image_path,
+                                   help='path to database image, database is mapped instead of loaded')
+        tmp_subparser.add_argument('--no-cache', action='store_true', help='do not read or write database.cache')
+
+    out_arguments = tmp_parser.parse_args(argv)
+
+    if out_arguments.workers is not None and out_arguments.workers < 1:
+        tmp_parser.error('--workers must be at least 1')
+
+    if out_arguments.command == 'generate':
+        if out_arguments.count is not None and out_arguments.count < 0:
+            tmp_parser.error('--count can not be negative')
+        # forced parameters are split the same way as in console ('Race=Elf' -> ['Race', 'Elf'])
+        out_arguments.force = [ins_force.split('=') for ins_force in out_arguments.force]
+        for tmp_force in out_arguments.force:
+            if len(tmp_force) < 2 or not tmp_force[0]:
+                tmp_parser.error(f'--force {"=".join(tmp_force)} must be GROUP=PARAMETER')
+        # targets are collected into {group: {parameter: weight}} ('Race=Elf:30' -> {'Race': {'Elf': 30}})
+        tmp_targets = {}
+        for tmp_target in out_arguments.target:
+            tmp_group, tmp_equal, tmp_parameter_weight = tmp_target.partition('=')
+            tmp_parameter, tmp_colon, tmp_weight = tmp_parameter_weight.rpartition(':')
+            try:
+                tmp_weight = int(tmp_weight) if tmp_weight.isdigit() else float(tmp_weight)
+            except ValueError:
+                tmp_colon = ''
+            if not tmp_group or not tmp_equal or not tmp_colon or tmp_weight < 0:
+                tmp_parser.error(f'--target {tmp_target} must be GROUP=PARAMETER:WEIGHT')
+            tmp_targets.setdefault(tmp_group, {})[tmp_parameter or None] = tmp_weight
+        out_arguments.target = tmp_targets
+        if (tmp_targets or out_arguments.unique) and (out_arguments.vectorized or out_arguments.workers > 1):
+            tmp_parser.error('--target and --unique can not be used with --vectorized or --workers')
+        if out_arguments.count is None:
+            try:
+                out_arguments.count = sum(ins_stratum[2] for ins_stratum in constrained_strata(None, tmp_targets)) \
+                    if tmp_targets else 1
+            except ValueError as tmp_error:
+                tmp_parser.error(f'--target without --count: {tmp_error}')
+        if out_arguments.seed is not None and out_arguments.seed.lstrip('-').isdigit():
+            out_arguments.seed = int(out_arguments.seed)
+        if out_arguments.format is None and out_arguments.out == '-':
+            out_arguments.format = 'text'
 
-    def __call__(self, force=[]):
+    return out_arguments
 
-        # check force and manipulate local groups
-        if force:
-            for tmp_force in force:
-                tmp_force_group = tmp_force[0]
-                # add forced group to all groups if not in
-                self.loc_all_groups_list.append(tmp_force_group)
-                self.loc_all_groups_list = list(set(self.loc_all_groups_list))
 
-        # resetting non playable character specific lists every time it is called
-        self.loc_all_rarity_classes = []  # list of all additional rarity classes
-        self.loc_all_active_groups = self.loc_all_groups_list.copy()  # groups witch selection of parameters is not
-        # conditioned by document config.txt
-        self.loc_groups_and_parameters_list = []  # all groups and thai parameters in one list
-
-        # add empty parameter to each group
-        for tmp_group in self.loc_all_groups_list:
-            self.loc_groups_and_parameters_list.append([tmp_group, ''])
-            # [[group, ''], [group_2, ''], [group__3, ''], ... ]
-
-        self.rarity_classes(True)
-        if self.loc_optional_groups[0][0] != 'None':
-            self.optional_groups()
-        if self.loc_multiple_groups[0][0] != 'None':
-            self.multiple_groups()
-        if self.loc_conditioned_groups[0][0] != 'None':
-            self.conditioned_groups(list_conditioned_groups=True)
+def load_command_plan(arguments):
+    """
+    :param arguments: parsed arguments of command
+    :return: GenerationPlan, None if it could not be loaded (error is printed to standard error)
+    """
 
-        # Insert forced parameters
-        if force:
-            for tmp_force2 in force:
-                tmp_force_group2 = [tmp_force2[0]]
-                tmp_force_parameter2 = tmp_force2[1:]
-                self.select_parameter_for_groups(active_groups=tmp_force_group2, active_parameters=tmp_force_parameter2)
+    try:
+        out_plan = load_generation_plan(arguments.config, arguments.database,
+                                        None if arguments.no_cache else global_cache_path, arguments.image)
+    except (OSError, ValueError) as tmp_error:
+        print(f'error: {tmp_error}', file=sys.stderr)
+        return None
+    for tmp_warning in out_plan.loc_warnings:
+        print(f'warning: {tmp_warning}', file=sys.stderr)
+    return out_plan
 
-        self.select_parameter_for_groups()
 
-        if self.loc_conditioned_groups[0][0] != 'None':
-            self.conditioned_groups(select_conditioned_parameters=True)
+def generate_command(arguments):
+    """
+    generates NPC-s for 'generate' command and reports throughput to standard error
 
-        return self.loc_groups_and_parameters_list
+    :param arguments: parsed arguments of 'generate' command
+    :return: exit code
+    """
 
+    import time
 
-def print_non_playable_character(npc_data, print1=False, save=False):
+    tmp_start = time.perf_counter()
+    tmp_plan = load_command_plan(arguments)
+    if tmp_plan is None:
+        return 1
+    try:
+        tmp_sink = open_sink(arguments.out, arguments.format, arguments.append,
+                             groups=tmp_plan.loc_database.group_names())
+    except (OSError, ValueError) as tmp_error:
+        print(f'error: {tmp_error}', file=sys.stderr)
+        return 1
+    tmp_loaded = time.perf_counter()
+
+    tmp_npc = NonPlayableCharacter(tmp_plan)
+    if arguments.stats:
+        tmp_npc.enable_stats()
+    with tmp_sink:
+        # request that can not be met is rejected before first NPC, retries that run out stop it while writing
+        try:
+            if arguments.target:
+                tmp_npcs = tmp_npc.iter_constrained(arguments.count, arguments.target, arguments.force,
+                                                    arguments.seed, arguments.unique)
+            elif arguments.vectorized:
+                tmp_npcs = generate_population(arguments.count, arguments.force, arguments.seed, tmp_plan)
+            elif arguments.workers > 1:
+                tmp_npcs = tmp_npc.generate_parallel(arguments.count, arguments.force, arguments.seed,
+                                                     arguments.workers)
+            else:
+                # NPC-s are written while they are generated, so memory does not grow with count
+                tmp_npcs = tmp_npc.iter_many(arguments.count, arguments.force, arguments.seed, arguments.unique)
+            tmp_sink.write_many(tmp_npcs)
+        except ValueError as tmp_error:
+            # unique NPC-s can run out of retries half way, file is not left with part of them
+            tmp_sink.discard()
+            print(f'error: {tmp_error}', file=sys.stderr)
+            return 1
+    tmp_end = time.perf_counter()
+
+    tmp_generation_time = max(tmp_end - tmp_loaded, 1e-9)
+    print(f'{arguments.count} NPC-s in {tmp_generation_time:.3f} s ({arguments.count / tmp_generation_time:.0f} NPC/s),'
+          f' loading took {tmp_loaded - tmp_start:.3f} s', file=sys.stderr)
+    if arguments.stats:
+        print(format_generation_stats(tmp_npc.stats()), file=sys.stderr)
+        tmp_npc.disable_stats()
+    return 0
+
+
+def serve_command(arguments):
     """
-    prints out or saves character scheat
+    runs GenerationService until it is interrupted
 
-    :param print1: if True print character scheat
-    :param save: if True save character scheat to save.txt
-    :param npc_data: list of groups ad parameters of nps
-    :return: printed or saved character scheat
+    :param arguments: parsed arguments of 'serve' command
+    :return: exit code
     """
 
-    tmp_max_group_length = max(len(ins_group[0]) for ins_group in npc_data) if npc_data else 10
-    try:
-        tmp_string = '\n'
+    import asyncio
 
-        for tmp_group in npc_data:
-            tmp_formatted_params = ', '.join(tmp_group[1:])
-            tmp_string += f'{tmp_group[0]: <{tmp_max_group_length}}\t: {tmp_formatted_params} \n'
+    tmp_plan = load_command_plan(arguments)
+    if tmp_plan is None:
+        return 1
 
-        tmp_string += r'-' * 120 + '\n'
+    tmp_service = GenerationService(tmp_plan, arguments.workers)
+    try:
+        asyncio.run(tmp_service.serve(arguments.host, arguments.port, lambda port: print(
+            f'serving NPC-s on http://{arguments.host}:{port}/npc', file=sys.stderr)))
+    except KeyboardInterrupt:
+        pass
+    except OSError as tmp_error:
+        print(f'error: {tmp_error}', file=sys.stderr)
+        return 1
+    return 0
 
-        if print1:
-            print(tmp_string)
 
-        if save:
-            with open('./save.txt', 'a', encoding='utf-8') as Save:
-                Save.write(tmp_string)
-    except TypeError:
-        print('no NPC detected')
+def command_line(argv):
+    """
+    :param argv: command line arguments without name of program
+    :return: exit code of command
+    """
+
+    tmp_arguments = parse_arguments(argv)
+    if tmp_arguments.command == 'generate':
+        return generate_command(tmp_arguments)
+    if tmp_arguments.command == 'serve':
+        return serve_command(tmp_arguments)
 
 
 if __name__ == '__main__':
 
+    # command line mode, console is started only without arguments
+    if len(sys.argv) > 1:
+        sys.exit(command_line(sys.argv[1:]))
+
     # _______________________________________
     print('┌─┬┬─┬─┐┌──┐           ┌┐     \n'
           '││││┼│┌┘│┌─┼─┬─┬┬─┬┬┬─┐│└┬─┬┬┐\n'
@@ -640,6 +4544,22 @@ if __name__ == '__main__':
                          '--\'GroupName\'>\'SubGroupName\'\t- list all parameters of subgroup'
                  },
 
+        'watch': {'ControlList': ['w', 'watch'],
+                  'Description': 'reload database when its files change',
+                  'Help': 'Turns watching of config.txt and database on or off, changed groups are reloaded\n'
+                          'before next NPC'
+                  },
+
+        'stats': {'ControlList': ['st', 'stats'],
+                  'Description': 'show generation statistics',
+                  'Help': 'First call turns counting of time of every stage of generation, random draws and probes\n'
+                          'of conditioned groups on, next calls show counters and opened files and regex evaluations\n'
+                          'of loading current plan\n'
+                          'Additional functions for \'stats\':\n'
+                          '-reset\t- set all counters to zero\n'
+                          '-off\t- stop counting'
+                  },
+
         'help': {'ControlList': ['help', 'h'],
                  'Description': 'shows help',
                  'Help': ''
@@ -664,17 +4584,38 @@ if __name__ == '__main__':
             print(ControlDict[inp_control]['Help'])
 
     # _______________________________________
-    Config = load_files(global_config_path)
-    try:
-        Database = load_files(global_database_path)
-    except FileNotFoundError:
-        try:
-            Database = load_files(f'{global_database_path}.txt')
-            print(f'database directory not found at {global_database_path}, you are using legacy version of database')
-        except FileNotFoundError:
-            raise FileNotFoundError
-    NPC = NonPlayableCharacter()
+    # plan is loaded by first command that needs it, so prompt is shown without reading database
+    Plan = None
+    Database = None
+    NPC = None
     npc = None
+    Watcher = None
+
+    def console_plan():
+        """
+        :return: loaded plan, first call loads it and creates NPC generator
+        """
+
+        global Plan, Database, NPC
+        if NPC is None:
+            Plan = load_generation_plan()
+            Database = Plan.loc_database
+            if Database.loc_legacy:
+                print(f'database directory not found at {global_database_path}, you are using legacy version of '
+                      f'database')
+            for tmp_warning in Plan.loc_warnings:
+                print(f'warning: {tmp_warning}')
+            NPC = NonPlayableCharacter()
+        return Plan
+
+    def reload_plan(plan):
+        global Plan, Database
+        Plan = plan
+        Database = plan.loc_database
+        NPC.set_plan(plan)
+        print('\ndatabase reloaded')
+        for tmp_warning in plan.loc_warnings:
+            print(f'warning: {tmp_warning}')
 
     call_help()
     # _______________________________________
@@ -688,6 +4629,7 @@ if __name__ == '__main__':
 
             # new character
             elif Control[0].lower() in ControlDict['new']['ControlList']:
+                console_plan()
                 # generate new character (no special conditions)
                 if len(Control) == 1:
                     npc = NPC()
@@ -725,33 +4667,34 @@ if __name__ == '__main__':
             elif Control[0].lower() in ControlDict['list']['ControlList']:
                 PrintList = []
                 if len(Control) == 1:
-                    PrintList = extract_groups(Database)[0]
+                    # group names are taken from directory if plan is not loaded yet
+                    PrintList = None if Plan else database_group_names()
+                    if PrintList is None:
+                        PrintList = console_plan().loc_database.group_names()
 
                 else:
+                    console_plan()
                     # list parameters in group
                     if Control[1].startswith('-'):
                         Group = Control[1][1:]
                         try:    # first check if group is in database
-                            PrintList = extract_list(Database, Group)[0]
+                            PrintList = Database.group(Group)
                         except KeyError:
                             pass
                         if not PrintList:   # if there was no group found in database check is it a path
                             Group = Group.split('>')
                             try:    # try path to find list
-                                PrintList = extract_list(load_files(f'{global_database_path}/{Group[0]}'), Group[1])[0]
+                                PrintList = Database.subgroup(Group[0], Group[1])
                             except KeyError:
                                 try:    # replace space with dash and try again to find a list
                                     print(Group[1].replace(' ', '_'))
-                                    PrintList = extract_list(load_files(f'{global_database_path}'
-                                                                        f'/{Group[0]}'), Group[1].replace(' ', '_'))[0]
+                                    PrintList = Database.subgroup(Group[0], Group[1].replace(' ', '_'))
                                 except KeyError:
                                     pass
                     # list subgroups
                     elif Control[1].startswith('>'):
                         SubGroup = Control[1][1:]
-                        SubGroupPath = rf'{global_database_path}/{SubGroup}'
-                        SubGroupDatabase = load_files(SubGroupPath)
-                        PrintList = extract_groups(SubGroupDatabase)[0]
+                        PrintList = Database.subgroup_names(SubGroup)
                     # help
                     elif Control[1] in ControlDict['help']['ControlList']:
                         call_help('list')
@@ -760,6 +4703,37 @@ if __name__ == '__main__':
                     for Element in PrintList:
                         print(Element)
 
+            # watch database
+            elif Control[0].lower() in ControlDict['watch']['ControlList']:
+                console_plan()
+                if len(Control) > 1 and Control[1] in ControlDict['help']['ControlList']:
+                    call_help('watch')
+                elif Watcher is None:
+                    Watcher = DatabaseWatcher(Plan)
+                    Watcher.start(reload_plan)
+                    print('watching database for changes')
+                else:
+                    Watcher.stop()
+                    Watcher = None
+                    print('stopped watching database')
+
+            # generation statistics
+            elif Control[0].lower() in ControlDict['stats']['ControlList']:
+                console_plan()
+                if len(Control) > 1 and Control[1] in ControlDict['help']['ControlList']:
+                    call_help('stats')
+                elif len(Control) > 1 and Control[1] == 'off':
+                    NPC.disable_stats()
+                    print('stopped counting generation statistics')
+                elif NPC.loc_stats is None:
+                    NPC.enable_stats()
+                    print('counting generation statistics, call \'stats\' again to show them')
+                elif len(Control) > 1 and Control[1] == 'reset':
+                    NPC.loc_stats.reset()
+                    print('generation statistics set to zero')
+                else:
+                    print(format_generation_stats(NPC.stats()))
+
             # popup help
             elif Control[0].lower() in ControlDict['help']['ControlList']:
                 call_help()
@@ -771,3 +4745,6 @@ if __name__ == '__main__':
 
         except IndexError:
             print('invalid input, try \'help\'')
+        except (OSError, ValueError) as tmp_error:
+            # database is loaded with first command that needs it, console keeps running if it can not be loaded
+            print(f'error: {tmp_error}')
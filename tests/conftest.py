@@ -0,0 +1,40 @@
+"""
+# NPC generator tests
+# _______________________________________
+# Run: python -m pytest
+# _______________________________________
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+global_root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, global_root_path)
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def plan():
+    """
+    :return: GenerationPlan of shipped config.txt and database, compiled without cache
+    """
+
+    return main.load_generation_plan(os.path.join(global_root_path, 'config.txt'),
+                                     os.path.join(global_root_path, 'database'), None)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """
+    :return: paths to copies of shipped config.txt and database that test can change
+    """
+
+    tmp_config_path = str(tmp_path / 'config.txt')
+    tmp_database_path = str(tmp_path / 'database')
+    shutil.copy(os.path.join(global_root_path, 'config.txt'), tmp_config_path)
+    shutil.copytree(os.path.join(global_root_path, 'database'), tmp_database_path)
+    return tmp_config_path, tmp_database_path
@@ -0,0 +1,157 @@
+import collections
+import json
+
+import pytest
+
+import main
+
+
+def group_counts(strata):
+    """
+    :param strata: list of strata from constrained_strata
+    :return: {group: {parameter: number of NPC-s}}, parameter None for NPC-s without group
+    """
+
+    out_counts = collections.defaultdict(collections.Counter)
+    for tmp_force, tmp_presence, tmp_count in strata:
+        tmp_forced = dict(tmp_force)
+        for tmp_group in tmp_presence:
+            out_counts[tmp_group][tmp_forced.get(tmp_group)] += tmp_count
+    return out_counts
+
+
+
+def impossible_pairs(plan, batch):
+    """
+    :param plan: GenerationPlan of batch
+    :param batch: NonPlayableCharacterBatch
+    :return: number of NPC-s that have parameter of conditioned group which choosing pool of their influential
+    groups gives chance 0
+    """
+
+    tmp_model = main.ProbabilityModel(plan)
+    out_count = 0
+    for tmp_npc in batch:
+        tmp_outcomes = {ins_group_and_parameters[0]: tuple(ins_group_and_parameters[1:])
+                        for ins_group_and_parameters in tmp_npc}
+        for tmp_group, tmp_influential_groups in plan.loc_config.loc_conditioned_group_conditions:
+            tmp_pool = tmp_model.pool(tmp_group, {ins_group: tmp_outcomes.get(ins_group)
+                                                  for ins_group in tmp_influential_groups})
+            tmp_probabilities = tmp_model.selection_probabilities(tmp_pool, tmp_model.slot_distribution(tmp_group))
+            out_count += any(not tmp_probabilities.get(ins_parameter) for ins_parameter in tmp_outcomes[tmp_group])
+    return out_count
+
+@pytest.mark.parametrize('n, targets', [
+    (None, {'Race': {'Elf': 1, 'Dwarf': 1, 'Human': 1}, 'Sex': {'Male': 1, 'Female': 1, 'X': 1}}),
+    (None, {'Race': {'Elf': 5, 'Dwarf': 2}, 'Sex': {'Male': 3, 'Female': 4}, 'Religion': {'Gozreh': 1, None: 6}}),
+    (1000, {'Race': {'Elf': 0.4, 'Dwarf': 0.35, 'Human': 0.25}, 'Sex': {'Male': 2, 'Female': 1}}),
+    (7, {'Race': {'Elf': 1, 'Dwarf': 1, 'Human': 1}}),
+])
+def test_every_group_has_exact_target_counts(n, targets):
+    tmp_strata = main.constrained_strata(n, targets, main.RandomSource(1))
+    tmp_n = sum(ins_count for _, _, ins_count in tmp_strata)
+    assert tmp_n == (n if n is not None else sum(next(iter(targets.values())).values()))
+
+    tmp_counts = group_counts(tmp_strata)
+    for tmp_group, tmp_parameters in targets.items():
+        tmp_expected = main.apportion(list(tmp_parameters.values()), tmp_n)
+        assert [tmp_counts[tmp_group][ins_parameter] for ins_parameter in tmp_parameters] == tmp_expected, tmp_group
+
+
+def test_groups_are_paired_independently():
+    tmp_strata = main.constrained_strata(20000, {'Race': {'Elf': 1, 'Dwarf': 3}, 'Sex': {'Male': 1, 'Female': 1}},
+                                         main.RandomSource(2))
+    tmp_cells = {tuple(ins_parameter for _, ins_parameter in ins_force): ins_count
+                 for ins_force, _, ins_count in tmp_strata}
+    assert tmp_cells[('Elf', 'Male')] == pytest.approx(2500, abs=200)
+    assert tmp_cells[('Dwarf', 'Female')] == pytest.approx(7500, abs=200)
+
+
+
+def test_random_apportion_keeps_quota():
+    tmp_random = main.RandomSource(4)
+    tmp_totals = [0, 0, 0, 0]
+    for _ in range(2000):
+        tmp_counts = main.apportion([5, 0, 3, 2], 1, tmp_random)
+        assert sum(tmp_counts) == 1 and tmp_counts[1] == 0
+        tmp_totals = [ins_total + ins_count for ins_total, ins_count in zip(tmp_totals, tmp_counts)]
+    # largest remainder would give every NPC to first part
+    assert tmp_totals[2] == pytest.approx(600, abs=100)
+    assert tmp_totals[3] == pytest.approx(400, abs=100)
+
+@pytest.mark.parametrize('n, targets', [
+    (10, {}),
+    (10, {'Race': {}}),
+    (10, {'Race': {'Elf': -1, 'Dwarf': 2}}),
+    (10, {'Race': {'Elf': 0}}),
+    (None, {'Race': {'Elf': 1}, 'Sex': {'Male': 2}}),
+    (None, {'Race': {'Elf': 0.5}}),
+])
+def test_invalid_targets_are_rejected(n, targets):
+    with pytest.raises(ValueError):
+        main.constrained_strata(n, targets)
+
+
+def test_population_has_exact_mix(plan):
+    tmp_targets = {'Race': {'Elf': 6, 'Dwarf': 4}, 'Sex': {'Male': 7, 'Female': 3}, 'Religion': {None: 5, 'Gozreh': 5}}
+    tmp_npc = main.NonPlayableCharacter(plan, 1)
+    tmp_batch = tmp_npc.generate_constrained(None, tmp_targets, seed=3)
+
+    assert len(tmp_batch) == 10
+    for tmp_group, tmp_parameters in tmp_targets.items():
+        tmp_counts = collections.Counter(ins_cell[0] if ins_cell else None
+                                         for ins_cell in tmp_batch.loc_columns[tmp_group])
+        assert tmp_counts == {ins_parameter: ins_count for ins_parameter, ins_count in tmp_parameters.items()}
+    assert list(tmp_npc.generate_constrained(None, tmp_targets, seed=3)) == list(tmp_batch)
+
+
+
+def test_conditioned_target_follows_influential_groups(plan):
+    tmp_npc = main.NonPlayableCharacter(plan, 1)
+    tmp_batch = tmp_npc.generate_constrained(2000, {'Race': {'Catfolk': 1}}, seed=1)
+    assert len(tmp_batch) == 2000
+    assert impossible_pairs(plan, tmp_batch) == 0
+    # nationality that has Catfolk as special (S) parameter is more common than one that has them as common (C)
+    tmp_nationalities = collections.Counter(ins_cell[0] for ins_cell in tmp_batch.loc_columns['Nationality'])
+    assert tmp_nationalities['Resident of Črnjamura(Murnjani)'] > tmp_nationalities['Resident of Čaršija'] > 0
+
+
+def test_targets_of_conditioned_groups_are_met_together(plan):
+    tmp_targets = {'Race': {'Elf': 3, 'Dwarf': 2, 'Catfolk': 1}, 'Sex': {'Male': 3, 'Female': 2, 'Asexual': 1},
+                   'Religion': {None: 1, 'Gozreh': 1}}
+    tmp_npc = main.NonPlayableCharacter(plan, 1)
+    tmp_batch = tmp_npc.generate_constrained(600, tmp_targets, seed=5)
+
+    for tmp_group, tmp_parameters in tmp_targets.items():
+        tmp_counts = collections.Counter(ins_cell[0] if ins_cell else None
+                                         for ins_cell in tmp_batch.loc_columns[tmp_group])
+        assert tmp_counts == dict(zip(tmp_parameters, main.apportion(list(tmp_parameters.values()), 600)))
+    assert impossible_pairs(plan, tmp_batch) == 0
+    assert list(tmp_npc.generate_constrained(600, tmp_targets, seed=5)) == list(tmp_batch)
+
+    with pytest.raises(ValueError):
+        tmp_npc.generate_constrained(5, {'Sex': {'Nobody': 1}}, seed=2)
+
+def test_invalid_request_keeps_random_source(plan):
+    tmp_npc = main.NonPlayableCharacter(plan, 1)
+    tmp_random = tmp_npc.loc_random
+    with pytest.raises(ValueError):
+        tmp_npc.generate_constrained(5, {'Race': {'Elf': 1}}, [['Race', 'Dwarf']], seed=2)
+    with pytest.raises(ValueError):
+        tmp_npc.generate_constrained(5, {'Race': {None: 1}}, seed=2)
+    with pytest.raises(ValueError):
+        tmp_npc.generate_constrained(5, {'Race': {'Elf': 0}}, seed=2)
+    assert tmp_npc.loc_random is tmp_random
+
+
+def test_command_line_target(sources, tmp_path):
+    tmp_config_path, tmp_database_path = sources
+    tmp_out_path = str(tmp_path / 'npcs.jsonl')
+    assert main.command_line(['generate', '--config', tmp_config_path, '--database', tmp_database_path, '--no-cache',
+                              '-t', 'Race=Elf:3', '-t', 'Race=Dwarf:2', '-t', 'Sex=Male:4', '-t', 'Sex=Female:1',
+                              '-s', '9', '-o', tmp_out_path]) == 0
+
+    with open(tmp_out_path, encoding='utf-8') as tmp_out_f:
+        tmp_npcs = [json.loads(ins_line) for ins_line in tmp_out_f]
+    assert collections.Counter(ins_npc['Race'][0] for ins_npc in tmp_npcs) == {'Elf': 3, 'Dwarf': 2}
+    assert collections.Counter(ins_npc['Sex'][0] for ins_npc in tmp_npcs) == {'Male': 4, 'Female': 1}
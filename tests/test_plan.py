@@ -0,0 +1,140 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+import main
+
+
+def replace_section(config_path, section, lines):
+    """
+    :param config_path: path to config.txt
+    :param section: name of group of config.txt
+    :param lines: new lines of group
+    :return: config.txt with group replaced
+    """
+
+    with open(config_path, encoding='utf-8') as tmp_config_f:
+        tmp_config = tmp_config_f.read()
+    tmp_start = tmp_config.index(f'__{section}__')
+    tmp_end = tmp_config.index('/end', tmp_start)
+    with open(config_path, 'w', encoding='utf-8') as tmp_config_f:
+        tmp_config_f.write(tmp_config[:tmp_start] + f'__{section}__\n' + ''.join(f'{ins_line}\n' for ins_line in lines)
+                           + tmp_config[tmp_end:])
+
+
+def test_config_is_compiled(plan):
+    tmp_config = plan.loc_config
+    assert tmp_config.loc_rarity_classes == {'S': 100, 'C': 80, 'U': 50, 'R': 30, 'M': 10, 'N': 0}
+    assert ['Religion', 45] in tmp_config.loc_optional_group_chances
+    assert ['Personalities', 55, 1, 4] in tmp_config.loc_multiple_group_ranges
+    assert tmp_config.loc_sampling == 'pool'
+
+    # every influential group is selected before groups it influences
+    tmp_order = [ins_group for ins_group, _ in tmp_config.loc_conditioned_group_conditions]
+    assert tmp_order.index('Race') < tmp_order.index('Sex') < tmp_order.index('Name')
+
+
+@pytest.mark.parametrize('section, lines', [
+    ('Rarity', ['S_by_101']),
+    ('Rarity', ['TOOLONG_by_10']),
+    ('MultipleGroup', ['Race_by_10_min3max2']),
+    ('ConditionedGroup', ['Name_by_Name']),
+    ('Sampling', ['Sometimes']),
+])
+def test_invalid_config_is_rejected(sources, section, lines):
+    tmp_config_path, tmp_database_path = sources
+    replace_section(tmp_config_path, section, lines)
+    with pytest.raises(ValueError):
+        main.load_generation_plan(tmp_config_path, tmp_database_path, None)
+
+
+def test_circular_conditions_are_rejected(sources):
+    tmp_config_path, tmp_database_path = sources
+    replace_section(tmp_config_path, 'ConditionedGroup', ['Race_by_Sex', 'Sex_by_Race'])
+    with pytest.raises(ValueError):
+        main.load_generation_plan(tmp_config_path, tmp_database_path, None)
+
+
+def test_plan_is_read_from_cache(sources, tmp_path):
+    tmp_config_path, tmp_database_path = sources
+    tmp_cache_path = str(tmp_path / 'database.cache')
+
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    assert os.path.exists(tmp_cache_path)
+    tmp_cached_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    assert tmp_cached_plan is not tmp_plan
+    assert tmp_cached_plan.loc_database.group_names() == tmp_plan.loc_database.group_names()
+    assert main.NonPlayableCharacter(tmp_cached_plan, 3)() == main.NonPlayableCharacter(tmp_plan, 3)()
+
+
+def test_load_counters_are_kept_on_plan(sources, tmp_path):
+    tmp_config_path, tmp_database_path = sources
+    tmp_cache_path = str(tmp_path / 'database.cache')
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    tmp_cached_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    assert tmp_plan.loc_load_counters['files_opened'] > 1
+    assert tmp_plan.loc_load_counters['regex_evaluations'] > 0
+    assert tmp_cached_plan.loc_load_counters == {'files_opened': 1}
+
+    # every generator reports counters of its own plan, no matter which one started counting last
+    tmp_npc = main.NonPlayableCharacter(tmp_plan, 1)
+    tmp_cached_npc = main.NonPlayableCharacter(tmp_cached_plan, 1)
+    tmp_npc.enable_stats()
+    tmp_cached_npc.enable_stats()
+    tmp_npc()
+    assert tmp_npc.stats()['load'] == tmp_plan.loc_load_counters
+    assert tmp_cached_npc.stats()['load'] == {'files_opened': 1}
+    assert 'load files_opened' in main.format_generation_stats(tmp_npc.stats())
+
+
+def test_cache_of_script_is_read_by_module(sources, tmp_path):
+    # main.py run as script pickles its classes as '__main__'
+    tmp_config_path, tmp_database_path = sources
+    subprocess.run([sys.executable, main.__file__, 'generate', '--config', tmp_config_path, '--database',
+                    tmp_database_path, '-o', str(tmp_path / 'npc.txt')], cwd=tmp_path, check=True)
+    tmp_cache_path = str(tmp_path / 'database.cache')
+    tmp_cache_time = os.stat(tmp_cache_path).st_mtime_ns
+
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    assert type(tmp_plan) is main.GenerationPlan
+    assert os.stat(tmp_cache_path).st_mtime_ns == tmp_cache_time  # plan compiled again would be saved again
+    assert main.NonPlayableCharacter(tmp_plan, 3)()
+
+
+def test_changed_source_compiles_plan_again(sources, tmp_path):
+    tmp_config_path, tmp_database_path = sources
+    tmp_cache_path = str(tmp_path / 'database.cache')
+    main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+
+    with open(os.path.join(tmp_database_path, 'Years.txt'), 'a', encoding='utf-8') as tmp_years_f:
+        tmp_years_f.write('\n1000-1005\n')
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, tmp_cache_path)
+    assert '1000-1005' in tmp_plan.loc_database.group('Years')
+
+
+@pytest.mark.parametrize('content', [b'', b'not a pickle',
+                                     pickle.dumps((main.global_cache_version - 1, (), None))])
+def test_broken_or_old_cache_is_ignored(sources, tmp_path, content):
+    tmp_config_path, tmp_database_path = sources
+    tmp_cache_path = tmp_path / 'database.cache'
+    tmp_cache_path.write_bytes(content)
+
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, str(tmp_cache_path))
+    assert 'Race' in tmp_plan.loc_database.group_names()
+    assert pickle.loads(tmp_cache_path.read_bytes())[0] == main.global_cache_version
+
+
+def test_legacy_database_is_used_without_directory(tmp_path):
+    (tmp_path / 'database.txt').write_text('__Race__\nElf(U)\nDwarf\n/end\n__Name__\nAna\n/end\n'
+                                           '==ElfName==\nLia\n/end\n', encoding='utf-8')
+
+    tmp_database = main.CompiledDatabase(str(tmp_path / 'database'))
+    assert tmp_database.loc_legacy
+    assert tmp_database.group('Race') == ('Elf(U)', 'Dwarf')
+    assert tmp_database.subgroup('Name', 'ElfName') == ('Lia',)
+
+    with pytest.raises(FileNotFoundError):
+        main.CompiledDatabase(str(tmp_path / 'missing'))
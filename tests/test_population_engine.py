@@ -0,0 +1,51 @@
+import collections
+
+import pytest
+
+import main
+
+pytest.importorskip('numpy')
+
+global_population_size = 10000
+global_tolerance = 0.03  # about 4 standard deviations of difference of two frequencies of population size
+
+
+def frequencies(batch):
+    """
+    :param batch: NonPlayableCharacterBatch
+    :return: {(group, parameter): share of NPC-s that have it}, {(group, number of parameters): share of NPC-s},
+    number of parameters 0 means that NPC does not have group
+    """
+
+    tmp_parameters = collections.Counter()
+    tmp_lengths = collections.Counter()
+    for tmp_group, tmp_cells in batch.loc_columns.items():
+        for tmp_cell in tmp_cells:
+            tmp_lengths[tmp_group, len(tmp_cell or ())] += 1
+            tmp_parameters.update((tmp_group, ins_parameter) for ins_parameter in tmp_cell or ())
+    return ({ins_key: ins_count / len(batch) for ins_key, ins_count in tmp_parameters.items()},
+            {ins_key: ins_count / len(batch) for ins_key, ins_count in tmp_lengths.items()})
+
+
+@pytest.mark.parametrize('force', [None, [['Race', 'Elf']]])
+def test_engine_matches_per_npc_generator(plan, force):
+    tmp_engine = frequencies(main.PopulationEngine(plan, seed=11).generate(global_population_size, force))
+    tmp_npc = frequencies(main.NonPlayableCharacter(plan, seed=11).generate_many(global_population_size, force))
+
+    for tmp_engine_shares, tmp_npc_shares in zip(tmp_engine, tmp_npc):
+        for tmp_key in set(tmp_engine_shares) | set(tmp_npc_shares):
+            assert tmp_engine_shares.get(tmp_key, 0) == pytest.approx(tmp_npc_shares.get(tmp_key, 0),
+                                                                      abs=global_tolerance), tmp_key
+
+
+def test_engine_with_seed_is_repeatable(plan):
+    tmp_first = main.PopulationEngine(plan, seed='population').generate(500)
+    tmp_second = main.PopulationEngine(plan, seed='population').generate(500)
+    assert list(tmp_first) == list(tmp_second)
+    assert len(tmp_first) == 500
+
+
+def test_chunks_make_one_batch(plan):
+    tmp_batch = main.PopulationEngine(plan, seed=5, chunk_size=64).generate(200, [['Sex', 'Female']])
+    assert len(tmp_batch) == 200
+    assert all(ins_cell == ('Female',) for ins_cell in tmp_batch.loc_columns['Sex'])
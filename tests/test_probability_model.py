@@ -0,0 +1,46 @@
+import collections
+
+import pytest
+
+import main
+
+global_population_size = 20000
+global_deviations = 5  # how many standard deviations frequency can be away from probability
+
+
+@pytest.mark.parametrize('force, groups', [
+    (None, ['Nationality', 'Race', 'Sex', 'Religion', 'Personalities']),
+    ([['Race', 'Elf']], ['Race', 'Sex', 'Name']),
+])
+def test_model_matches_sampled_frequencies(plan, force, groups):
+    tmp_model = main.ProbabilityModel(plan, force)
+    tmp_batch = main.NonPlayableCharacter(plan, seed=2).generate_many(global_population_size, force)
+
+    for tmp_group in groups:
+        tmp_probabilities = tmp_model.parameter_probabilities(tmp_group)
+        tmp_frequencies = collections.Counter(ins_parameter for ins_cell in tmp_batch.loc_columns[tmp_group]
+                                              if ins_cell for ins_parameter in ins_cell)
+        assert set(tmp_frequencies) <= set(tmp_probabilities), tmp_group
+        for tmp_parameter, tmp_probability in tmp_probabilities.items():
+            tmp_expected = global_population_size * tmp_probability
+            tmp_deviation = max(tmp_expected * (1 - tmp_probability), 1.0) ** 0.5
+            assert abs(tmp_frequencies[tmp_parameter] - tmp_expected) <= global_deviations * tmp_deviation, \
+                (tmp_group, tmp_parameter)
+
+
+def test_optional_group_presence_matches_config(plan):
+    tmp_model = main.ProbabilityModel(plan)
+    assert tmp_model.presence('Religion') == pytest.approx(0.44)
+    assert tmp_model.presence('Race') == 1.0
+    assert sum(tmp_model.count_distribution('Religion').values()) == pytest.approx(1.0)
+
+
+def test_marginals_are_computed_once(plan):
+    tmp_model = main.ProbabilityModel(plan)
+    tmp_probabilities = tmp_model.parameter_probabilities('Sex')
+    tmp_pools = len(tmp_model.loc_conditioned_pools)
+
+    tmp_probabilities.clear()  # returned dictionary is a copy
+    assert tmp_model.parameter_probabilities('Sex')
+    assert len(tmp_model.loc_conditioned_pools) == tmp_pools
+    assert sum(tmp_model.joint_distribution(['Race']).values()) == pytest.approx(1.0)
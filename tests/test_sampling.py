@@ -0,0 +1,91 @@
+import collections
+
+import pytest
+
+import main
+
+global_rarity_classes = {'S': 100, 'C': 80, 'U': 50, 'R': 30, 'M': 10, 'N': 0}
+global_draws = 20000
+
+
+@pytest.mark.parametrize('weights', [[1], [3, 1], [100, 80, 50, 0, 30], [0, 0, 7], [5] * 9])
+def test_alias_table_keeps_every_weight(weights):
+    tmp_thresholds, tmp_aliases, tmp_total, tmp_nonzero = main.build_alias_table(weights)
+
+    # every column gives its threshold to its index and rest of its height to its alias
+    tmp_heights = [0] * len(weights)
+    for tmp_index, (tmp_threshold, tmp_alias) in enumerate(zip(tmp_thresholds, tmp_aliases)):
+        tmp_heights[tmp_index] += tmp_threshold
+        tmp_heights[tmp_alias] += tmp_total - tmp_threshold
+    assert tmp_heights == [ins_weight * len(weights) for ins_weight in weights]
+    assert tmp_total == sum(weights)
+    assert tmp_nonzero == len(weights) - weights.count(0)
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 10])
+def test_selected_parameters_are_different(k):
+    tmp_rarity_list = main.RarityList(['A(S)', 'B(C)', 'C(U)', 'D(N)', 'E(R)'], global_rarity_classes)
+    tmp_rng = main.RandomSource(1)
+    for _ in range(200):
+        for tmp_picked in (tmp_rarity_list.select(tmp_rng, k), tmp_rarity_list.select_weighted(tmp_rng, k)):
+            assert len(tmp_picked) == len(set(tmp_picked)) <= k
+            assert 'D' not in tmp_picked
+
+
+def test_weighted_selection_is_never_empty():
+    tmp_rarity_list = main.RarityList(['A(M)', 'B(M)', 'C(N)'], global_rarity_classes)
+    tmp_rng = main.RandomSource(2)
+    assert all(len(tmp_rarity_list.select_weighted(tmp_rng, 5)) == 2 for _ in range(100))
+    assert main.RarityList(['A(N)'], global_rarity_classes).select_weighted(tmp_rng, 1) == []
+
+
+@pytest.mark.parametrize('parameters', [
+    ['A(S)', 'B(C)', 'C(U)', 'D(R)', 'E(N)'],  # alias table
+    ['A(S)', 'B(R)', 'C(N)'],  # random keys, k is a big part of parameters
+])
+def test_weighted_selection_follows_chances(parameters):
+    tmp_rarity_list = main.RarityList(parameters, global_rarity_classes)
+    tmp_rng = main.RandomSource(3)
+    tmp_counts = collections.Counter(tmp_rarity_list.select_weighted(tmp_rng, 1)[0] for _ in range(global_draws))
+
+    tmp_total = sum(tmp_rarity_list.loc_chances)
+    for tmp_index, tmp_chance in enumerate(tmp_rarity_list.loc_chances):
+        tmp_probability = tmp_chance / tmp_total
+        tmp_deviation = max(global_draws * tmp_probability * (1 - tmp_probability), 1.0) ** 0.5
+        assert abs(tmp_counts[tmp_rarity_list.parameter(tmp_index)] - global_draws * tmp_probability) \
+            <= 5 * tmp_deviation
+
+
+def test_lazy_selection_picks_same_as_choosing_pool():
+    # long list with small k is visited in random order instead of drawing whole choosing pool
+    tmp_rarity_list = main.RarityList([f'P{ins_index}({"SR"[ins_index % 2]})' for ins_index in range(200)],
+                                      global_rarity_classes)
+    assert 2 * 32 <= tmp_rarity_list.loc_expected_size
+
+    tmp_rng = main.RandomSource(4)
+    tmp_lazy = collections.Counter()
+    tmp_pool = collections.Counter()
+    for _ in range(global_draws // 10):
+        tmp_lazy.update(int(ins_parameter[1:]) % 2 for ins_parameter in tmp_rarity_list.select(tmp_rng, 2))
+        tmp_drawn = tmp_rarity_list.draw(tmp_rng)
+        tmp_pool.update(int(tmp_drawn[ins_index][1:]) % 2 for ins_index in tmp_rng.sample(len(tmp_drawn), 2))
+
+    # share of picks from rare half is 30 / 130 in both cases
+    assert tmp_lazy[1] / sum(tmp_lazy.values()) == pytest.approx(tmp_pool[1] / sum(tmp_pool.values()), abs=0.02)
+    assert tmp_lazy[1] / sum(tmp_lazy.values()) == pytest.approx(30 / 130, abs=0.02)
+
+
+def test_weighted_mode_is_compiled_from_config(sources):
+    tmp_config_path, tmp_database_path = sources
+    with open(tmp_config_path, encoding='utf-8') as tmp_config_f:
+        tmp_config = tmp_config_f.read()
+    tmp_start = tmp_config.index('__Sampling__')
+    with open(tmp_config_path, 'w', encoding='utf-8') as tmp_config_f:
+        tmp_config_f.write(tmp_config[:tmp_start] + '__Sampling__\nweighted\n'
+                           + tmp_config[tmp_config.index('/end', tmp_start):])
+
+    tmp_plan = main.load_generation_plan(tmp_config_path, tmp_database_path, None)
+    tmp_npc = main.NonPlayableCharacter(tmp_plan, seed=5)
+    assert tmp_npc.loc_weighted
+    tmp_batch = tmp_npc.generate_many(200)
+    assert all(ins_cell for ins_cell in tmp_batch.loc_columns['Race'])
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def service(plan):
+    tmp_service = main.GenerationService(plan, workers=1)
+    yield tmp_service
+    tmp_service.close()
+
+
+def request(service, path, query=None, body=None, method='GET'):
+    """
+    :param service: GenerationService
+    :param path: path of request
+    :param query: dictionary of query parameters and lists of their values
+    :param body: json body of request
+    :param method: http method
+    :return: http status and decoded json response
+    """
+
+    _, tmp_status, tmp_response = asyncio.run(service.handle_request(method, path, query or {}, body))
+    return tmp_status, json.loads(tmp_response)
+
+
+def test_npc_with_seed_is_repeatable(service):
+    tmp_first = request(service, '/npc', {'seed': ['7']})
+    request(service, '/npc')
+    assert request(service, '/npc', {'seed': ['7']}) == tmp_first
+    assert tmp_first[0] == 200
+
+
+def test_forced_parameters_are_used(service):
+    tmp_status, tmp_npcs = request(service, '/npc/batch', body={'n': 20, 'force': {'Race': 'Elf'}, 'seed': 3})
+    assert tmp_status == 200
+    assert len(tmp_npcs) == 20
+    assert all(ins_npc['Race'] == ['Elf'] for ins_npc in tmp_npcs)
+
+
+def test_force_does_not_leak_into_later_responses(service):
+    tmp_groups = set(request(service, '/npc', {'seed': ['1']})[1])
+    request(service, '/npc', {'force': ['Race=Elf']})
+    assert request(service, '/npc', {'force': ['Hat=Red']})[0] == 400
+    assert set(request(service, '/npc', {'seed': ['1']})[1]) == tmp_groups
+    assert 'Hat' not in service.loc_npc.loc_group_index
+
+
+@pytest.mark.parametrize('query, body', [
+    ({'n': ['many']}, None),
+    ({'n': ['-1']}, None),
+    ({}, {'force': 'Race'}),
+    ({}, {'seed': [1]}),
+])
+def test_invalid_options_are_rejected(service, query, body):
+    assert request(service, '/npc/batch', query, body)[0] == 400
+
+
+def test_groups_are_listed(service, plan):
+    assert request(service, '/groups')[1] == plan.loc_database.group_names()
+    assert request(service, '/groups/Hat')[0] == 404
+    assert request(service, '/npc', method='DELETE')[0] == 405
+
+
+def test_npc_is_answered_while_batch_is_generated(service):
+    async def requests():
+        tmp_batch = asyncio.ensure_future(service.handle_request('GET', '/npc/batch', {'n': ['1000']}, None))
+        await asyncio.sleep(0)  # batch is started
+        _, tmp_status, _ = await service.handle_request('GET', '/npc', {}, None)
+        tmp_batch_done = tmp_batch.done()
+        _, tmp_batch_status, tmp_batch_response = await tmp_batch
+        return tmp_status, tmp_batch_done, tmp_batch_status, len(json.loads(tmp_batch_response))
+
+    assert asyncio.run(requests()) == (200, False, 200, 1000)
@@ -0,0 +1,77 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def npcs(plan):
+    return main.NonPlayableCharacter(plan, seed=7).generate_many(20, seed=7)
+
+
+def test_text_sink_writes_character_sheets(npcs, tmp_path):
+    tmp_path = str(tmp_path / 'npcs.txt')
+    with main.open_sink(tmp_path) as tmp_sink:
+        assert tmp_sink.write_many(npcs) == 20
+    with open(tmp_path, encoding='utf-8') as tmp_f:
+        assert tmp_f.read() == ''.join(main.format_non_playable_character(ins_npc) for ins_npc in npcs)
+
+
+def test_json_lines_sink_writes_one_object_per_npc(npcs, tmp_path):
+    tmp_path = str(tmp_path / 'npcs.jsonl')
+    with main.open_sink(tmp_path, chunk_size=3) as tmp_sink:
+        tmp_sink.write_many(npcs)
+    with open(tmp_path, encoding='utf-8') as tmp_f:
+        tmp_objects = [json.loads(ins_line) for ins_line in tmp_f]
+    assert tmp_objects == [main.npc_to_json_object(ins_npc) for ins_npc in npcs]
+
+
+def test_csv_sink_writes_header_once_when_appending(npcs, tmp_path):
+    tmp_path = str(tmp_path / 'npcs.csv')
+    with main.open_sink(tmp_path) as tmp_sink:
+        tmp_sink.write_many(npcs)
+    with main.open_sink(tmp_path, append=True, groups=list(npcs.loc_groups)) as tmp_sink:
+        tmp_sink.write_many(npcs)
+    with open(tmp_path, encoding='utf-8', newline='') as tmp_f:
+        tmp_rows = list(csv.reader(tmp_f))
+
+    assert tmp_rows[0] == list(npcs.loc_groups)
+    assert len(tmp_rows) == 1 + 2 * 20
+    tmp_first = {ins_group[0]: ', '.join(ins_group[1:]) for ins_group in list(npcs)[0]}
+    assert tmp_rows[1] == [tmp_first.get(ins_group, '') for ins_group in tmp_rows[0]]
+
+
+def test_gzip_is_chosen_by_extension(npcs, tmp_path):
+    tmp_path = str(tmp_path / 'npcs.jsonl.gz')
+    with main.open_sink(tmp_path) as tmp_sink:
+        tmp_sink.write_many(npcs)
+    with gzip.open(tmp_path, 'rt', encoding='utf-8') as tmp_f:
+        assert sum(1 for _ in tmp_f) == 20
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        main.open_sink(str(tmp_path / 'npcs.xml'))
+
+
+def test_sink_without_format_can_not_be_created(tmp_path):
+    with pytest.raises(TypeError):
+        main.NonPlayableCharacterSink(str(tmp_path / 'npcs.txt'))
+
+
+def test_failed_sink_leaves_file_as_it_was(npcs, tmp_path):
+    tmp_path = tmp_path / 'npcs.jsonl.gz'
+    with main.open_sink(str(tmp_path)) as tmp_sink:
+        tmp_sink.write_many(npcs)
+    tmp_content = tmp_path.read_bytes()
+
+    for tmp_append in (False, True):
+        with pytest.raises(KeyError):
+            with main.open_sink(str(tmp_path), append=tmp_append, chunk_size=3) as tmp_sink:
+                tmp_sink.write_many(npcs)
+                raise KeyError('generator failed half way')
+        assert tmp_path.read_bytes() == tmp_content
+    assert [ins_path.name for ins_path in tmp_path.parent.iterdir()] == ['npcs.jsonl.gz']
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+import main
+
+global_small_config = '''__Rarity__
+S_by_100
+N_by_0
+/end
+__OptionalGroup__
+Hat_by_51
+/end
+__MultipleGroup__
+/end
+__ConditionedGroup__
+Race_by_Nationality
+Name_by_Race
+/end
+__Sampling__
+Pool
+/end
+'''
+global_small_database = {
+    'Nationality.txt': ['North', 'South'],
+    'Race.txt': ['Elf', 'Dwarf', 'Human', 'Orc'],
+    'Race/NorthRace.txt': ['Elf'],
+    'Race/SouthRace.txt': ['Dwarf', 'Human', 'Orc(N)'],
+    'Name.txt': ['Anna', 'Bob'],
+    'Name/ElfName.txt': ['Lia', 'Nim'],
+    'Name/DwarfName.txt': ['Thor'],
+    'Hat.txt': ['Red'],
+}
+
+
+@pytest.fixture
+def small_sources(tmp_path):
+    """
+    database where every outcome of Nationality resolves to conditioned group of Race, only Human has no
+    conditioned group of Name
+    (North Elf has 2 names, South Dwarf 1 and South Human 2 from whole group, every NPC can have hat or not)
+    """
+
+    tmp_config_path = str(tmp_path / 'config.txt')
+    with open(tmp_config_path, 'w', encoding='utf-8') as tmp_config_f:
+        tmp_config_f.write(global_small_config)
+    tmp_database_path = str(tmp_path / 'database')
+    for tmp_file, tmp_parameters in global_small_database.items():
+        os.makedirs(os.path.dirname(os.path.join(tmp_database_path, tmp_file)), exist_ok=True)
+        with open(os.path.join(tmp_database_path, tmp_file), 'w', encoding='utf-8') as tmp_group_f:
+            tmp_group_f.write('\n'.join(tmp_parameters) + '\n')
+    return tmp_config_path, tmp_database_path
+
+
+@pytest.fixture
+def small_npc(small_sources):
+    return main.NonPlayableCharacter(main.load_generation_plan(*small_sources, None), seed=1)
+
+
+def test_capacity_counts_reachable_npcs(small_npc):
+    tmp_fingerprints = {ins_npc.fingerprint() for ins_npc in small_npc.iter_many(2000)}
+    assert len(tmp_fingerprints) == 10
+    assert small_npc.capacity() == 10
+    assert small_npc.capacity([['Nationality', 'South']]) == 6
+    assert small_npc.capacity([['Race', 'Elf']]) == 2 * 2 * 2  # nationality is drawn, names follow race
+    assert small_npc.capacity(presence={'Hat': True}) == 5
+
+
+def test_capacity_without_following_outcomes_is_upper_bound(small_npc):
+    # whole Race and every conditioned group of Name are counted for every nationality
+    assert small_npc.capacity(limit=0) == 2 * 4 * 5 * 2
+
+
+
+def test_capacity_is_counted_once_for_every_force(small_npc, monkeypatch):
+    tmp_calls = []
+    tmp_conditioned_subgroups = small_npc.conditioned_subgroups
+    monkeypatch.setattr(small_npc, 'conditioned_subgroups',
+                        lambda *args: tmp_calls.append(args) or tmp_conditioned_subgroups(*args))
+
+    assert small_npc.capacity([['Race', 'Elf']]) == 8
+    tmp_counted_calls = len(tmp_calls)
+    assert tmp_counted_calls
+    assert small_npc.capacity([['Race', 'Elf']]) == 8
+    assert small_npc.capacity([('Race', 'Elf')]) == 8
+    assert len(tmp_calls) == tmp_counted_calls
+
+    # plan can change what config can make
+    small_npc.use_plan(small_npc.loc_plan)
+    assert small_npc.capacity([['Race', 'Elf']]) == 8
+    assert len(tmp_calls) == 2 * tmp_counted_calls
+
+def test_unique_npcs_fill_whole_capacity(small_npc):
+    tmp_npcs = list(small_npc.iter_many(10, seed=2, unique=True))
+    assert len({ins_npc.fingerprint() for ins_npc in tmp_npcs}) == 10
+
+
+def test_impossible_request_is_rejected_at_call(small_npc):
+    with pytest.raises(ValueError):
+        small_npc.iter_many(11, unique=True)
+    with pytest.raises(ValueError):
+        small_npc.iter_constrained(None, {'Nationality': {'North': 5, 'South': 5}}, unique=True)
+    assert len(list(small_npc.iter_constrained(None, {'Nationality': {'North': 4, 'South': 6}}, unique=True))) == 10
+
+
+def test_fingerprint_is_same_between_processes(small_npc):
+    tmp_npc = small_npc.generate_record([['Race', 'Elf']])
+    assert tmp_npc.fingerprint() == tuple((ins_group[0], tuple(sorted(ins_group[1:]))) for ins_group in tmp_npc)
+
+
+def test_command_line_unique(small_sources, tmp_path):
+    tmp_config_path, tmp_database_path = small_sources
+    tmp_arguments = ['generate', '--config', tmp_config_path, '--database', tmp_database_path, '--no-cache', '-u',
+                     '--format', 'jsonl', '-o', str(tmp_path / 'npcs.jsonl')]
+    assert main.command_line(tmp_arguments + ['-n', '10']) == 0
+    with open(tmp_path / 'npcs.jsonl', encoding='utf-8') as tmp_out_f:
+        assert len(set(tmp_out_f)) == 10
+    assert main.command_line(tmp_arguments + ['-n', '11']) == 1
+
+
+def test_late_failure_leaves_output_file_unchanged(small_sources, tmp_path, monkeypatch):
+    # upper bound without following outcomes lets 11 NPC-s through, retries run out at the last one
+    tmp_capacity = main.NonPlayableCharacter.capacity
+    monkeypatch.setattr(main.NonPlayableCharacter, 'capacity',
+                        lambda self, force=None, presence=None: tmp_capacity(self, force, presence, limit=0))
+    tmp_config_path, tmp_database_path = small_sources
+    tmp_out_path = tmp_path / 'npcs.jsonl'
+    tmp_out_path.write_text('{}\n', encoding='utf-8')
+    tmp_arguments = ['generate', '--config', tmp_config_path, '--database', tmp_database_path, '--no-cache', '-u',
+                     '-n', '11', '-o', str(tmp_out_path)]
+
+    assert main.command_line(tmp_arguments) == 1
+    assert main.command_line(tmp_arguments + ['--append']) == 1
+    assert tmp_out_path.read_text(encoding='utf-8') == '{}\n'
+    assert not os.path.exists(f'{tmp_out_path}.tmp')